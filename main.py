@@ -15,6 +15,13 @@ if "rp_step" not in st.session_state:
 if "form_data" not in st.session_state:
     st.session_state.form_data = {}
 
+# --- Background market data refresh ---
+# Keeps cached ETF histories and derived metrics warm so pages only read them.
+# Set MARKET_DATA_WORKER=external when running `python -m modules.scheduler` instead.
+if os.getenv("MARKET_DATA_WORKER") != "external":
+    from modules.scheduler import start_background_refresh
+    start_background_refresh()
+
 # --- Helper function to navigate pages ---
 def go(page, rp_step=None):
     st.session_state.page = page
@@ -0,0 +1,174 @@
+import hashlib
+import importlib
+import logging
+import os
+import threading
+import time
+from openai import AzureOpenAI, DefaultHttpxClient, Timeout
+
+logger = logging.getLogger(__name__)
+
+AZURE_ENDPOINT = "https://anju-mcrequpq-eastus2.cognitiveservices.azure.com/"
+AZURE_DEPLOYMENT = "gpt-35-turbo_anju"
+AZURE_API_VERSION = "2024-12-01-preview"
+AZURE_KEY_ENV = "AZURE_AI_KEY"
+
+# Connection pool and timeouts, overridable through the environment. Idle
+# connections are kept for minutes rather than httpx's 5 seconds, since
+# users take longer than that to type their next message.
+MAX_CONNECTIONS = int(os.getenv("AZURE_OPENAI_MAX_CONNECTIONS", "20"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("AZURE_OPENAI_MAX_KEEPALIVE", "10"))
+KEEPALIVE_EXPIRY = float(os.getenv("AZURE_OPENAI_KEEPALIVE_EXPIRY", "240"))
+CONNECT_TIMEOUT = float(os.getenv("AZURE_OPENAI_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("AZURE_OPENAI_READ_TIMEOUT", "60"))
+
+
+def _http_library():
+    """The HTTP library openai is built on (httpx, or httpx2 in newer releases), for its Limits."""
+    base = next(c for c in DefaultHttpxClient.__mro__ if not c.__module__.startswith("openai"))
+    return importlib.import_module(base.__module__.split(".")[0])
+
+
+class ConnectionStats:
+    """
+    Requests sent through one client and the connections opened for them,
+    counted from httpx's `trace` request extension. Every request that did
+    not open a connection reused a pooled keep-alive one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+        self.handshake_seconds = 0.0
+
+    def on_request(self, request):
+        with self._lock:
+            self.requests += 1
+        chained = request.extensions.get("trace")
+        started = {}
+
+        def trace(event, info):
+            if event.endswith(".started"):
+                started[event[:-len(".started")]] = time.perf_counter()
+            elif event in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+                elapsed = time.perf_counter() - started.pop(event[:-len(".complete")], time.perf_counter())
+                with self._lock:
+                    self.connections_opened += event == "connection.connect_tcp.complete"
+                    self.handshake_seconds += elapsed
+            if chained is not None:
+                chained(event, info)
+
+        request.extensions["trace"] = trace
+
+    def on_response(self, response):
+        stats = self.snapshot()
+        logger.info(
+            "Azure OpenAI %s: %d requests, %d connections opened, %.0f%% reused, %.3fs in handshakes",
+            response.request.url.host, stats["requests"], stats["connections_opened"],
+            100 * stats["reuse_ratio"], stats["handshake_seconds"],
+        )
+
+    def snapshot(self):
+        with self._lock:
+            reused = max(self.requests - self.connections_opened, 0)
+            return {
+                "requests": self.requests,
+                "connections_opened": self.connections_opened,
+                "connections_reused": reused,
+                "reuse_ratio": reused / self.requests if self.requests else 0.0,
+                "handshake_seconds": self.handshake_seconds,
+            }
+
+
+class AzureClientPool:
+    """
+    One AzureOpenAI client per (endpoint, key, api_version), shared by every
+    session in the process.
+
+    Each client owns an httpx connection pool, so after the first message
+    later ones skip the TCP and TLS handshake. Clients are created under a
+    lock (concurrent first callers wait instead of creating a second one).
+    A client that fails to construct is not cached, so the next call
+    retries.
+    """
+
+    def __init__(self, max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                 keepalive_expiry=KEEPALIVE_EXPIRY, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT):
+        self.limits = _http_library().Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = Timeout(read_timeout, connect=connect_timeout)
+        self._lock = threading.Lock()
+        self._clients = {}
+
+    @staticmethod
+    def _key(endpoint, api_key, api_version):
+        # The key itself is not kept around as a dictionary key
+        return endpoint, hashlib.sha256((api_key or "").encode()).hexdigest(), api_version
+
+    def get(self, endpoint, api_key, api_version):
+        key = self._key(endpoint, api_key, api_version)
+        entry = self._clients.get(key)
+        if entry is not None:
+            return entry["client"]
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is None:
+                stats = ConnectionStats()
+                http_client = DefaultHttpxClient(
+                    limits=self.limits,
+                    timeout=self.timeout,
+                    event_hooks={"request": [stats.on_request], "response": [stats.on_response]},
+                )
+                try:
+                    client = AzureOpenAI(
+                        api_version=api_version,
+                        azure_endpoint=endpoint,
+                        api_key=api_key,
+                        timeout=self.timeout,
+                        http_client=http_client,
+                    )
+                except Exception:
+                    http_client.close()
+                    raise
+                entry = {"client": client, "stats": stats, "endpoint": endpoint, "api_version": api_version}
+                self._clients[key] = entry
+                logger.info("Created Azure OpenAI client for %s (api %s)", endpoint, api_version)
+            return entry["client"]
+
+    def stats(self):
+        """Connection reuse per client: [{endpoint, api_version, requests, connections_opened, ...}]."""
+        with self._lock:
+            entries = list(self._clients.values())
+        return [{"endpoint": e["endpoint"], "api_version": e["api_version"], **e["stats"].snapshot()} for e in entries]
+
+    def close(self):
+        with self._lock:
+            entries, self._clients = list(self._clients.values()), {}
+        for entry in entries:
+            entry["client"].close()
+
+
+_pool = None
+_pool_guard = threading.Lock()
+
+
+def get_client_pool():
+    global _pool
+    with _pool_guard:
+        if _pool is None:
+            _pool = AzureClientPool()
+        return _pool
+
+
+def get_azure_client():
+    """(client, deployment) for the app's chatbot; (None, None) when it cannot be created."""
+    try:
+        client = get_client_pool().get(AZURE_ENDPOINT, os.getenv(AZURE_KEY_ENV), AZURE_API_VERSION)
+    except Exception as e:
+        logger.warning("Azure OpenAI client unavailable: %s", e)
+        return None, None
+    return client, AZURE_DEPLOYMENT
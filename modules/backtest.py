@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+from .stress import proxy_monthly_returns, portfolio_returns
+
+OUTCOME_PERCENTILES = (5, 10, 25, 50, 75, 90, 95)
+
+
+def rolling_start_values(returns, horizon, initial_balance, monthly_contribution):
+    """
+    Final balance of investing over `horizon` months from every possible
+    start month of `returns`, all windows in one pass.
+
+    With prefix products P_j = prod_{k<=j} (1 + r_k) and prefix sums
+    S_j = sum_{k<j} 1 / P_k, a window starting at s (contributions at the
+    start of each month) ends at
+    V_s = P_{s+H} * (V_0 / P_s + c * (S_{s+H} - S_s)).
+    """
+    returns = np.asarray(returns, dtype=float)
+    n_starts = len(returns) - horizon + 1
+    if horizon < 1 or n_starts < 1:
+        return np.zeros(0)
+    # log P_j as prefix sums of log(1 + r). The window growth P_{s+H} / P_s
+    # is taken as a difference of logs, so it never goes through P itself.
+    # The contributions still need the prefix sums S of 1 / P. Monthly
+    # histories keep |log P| far below exp's overflow range, so they stay
+    # finite.
+    log_growth = np.concatenate([[0.0], np.cumsum(np.log1p(returns))])
+    inverse_sums = np.concatenate([[0.0], np.cumsum(np.exp(-log_growth[:-1]))])
+
+    starts = np.arange(n_starts)
+    ends = starts + horizon
+    window_growth = np.exp(log_growth[ends] - log_growth[starts])
+    contributions = np.exp(log_growth[ends]) * (inverse_sums[ends] - inverse_sums[starts])
+    return initial_balance * window_growth + monthly_contribution * contributions
+
+
+def run_backtest(allocation, initial_balance, monthly_contribution, horizon_months, asset_returns=None):
+    """
+    Distribution of outcomes of the allocation over every historical start
+    month, or None when the history is shorter than the horizon.
+
+    Returns a dict with the final value per start month, its percentiles,
+    the worst and best start, the amount invested and the share of starts
+    that ended below it.
+    """
+    if asset_returns is None:
+        asset_returns = proxy_monthly_returns()
+    if asset_returns.empty:
+        return None
+    returns = portfolio_returns(asset_returns, allocation)
+    values = rolling_start_values(returns.to_numpy(), horizon_months, initial_balance, monthly_contribution)
+    if not len(values):
+        return None
+
+    # Each start is labelled with the month of its first return
+    outcomes = pd.Series(values, index=returns.index[:len(values)])
+    total_invested = initial_balance + monthly_contribution * horizon_months
+    return {
+        "outcomes": outcomes,
+        "percentiles": dict(zip(OUTCOME_PERCENTILES, np.percentile(values, OUTCOME_PERCENTILES))),
+        "worst_start": outcomes.idxmin(),
+        "worst_value": outcomes.min(),
+        "best_start": outcomes.idxmax(),
+        "best_value": outcomes.max(),
+        "total_invested": total_invested,
+        "loss_share": float(np.mean(values < total_invested)),
+    }
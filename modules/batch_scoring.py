@@ -0,0 +1,116 @@
+import argparse
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from .model_registry import get_registry
+from .risk import map_answer_frame_to_model_format, profile_label
+from .risk_inference import predict_proba_frame
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_ROWS = 50_000
+OUTPUT_COLUMNS = ["row", "profile", "confidence", "model_version"]
+
+
+def read_answer_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Streams a CSV or JSONL export of raw questionnaire answers (one column
+    per question key) as DataFrames of at most `chunk_rows` rows. Values are
+    read as text so answers such as "None" or "18-24" survive unparsed;
+    only empty cells count as unanswered.
+    """
+    if path.endswith((".jsonl", ".json")):
+        reader = pd.read_json(path, lines=True, chunksize=chunk_rows, dtype=False)
+    else:
+        reader = pd.read_csv(path, chunksize=chunk_rows, dtype=str, keep_default_na=False, na_values=[""])
+    with reader:
+        yield from reader
+
+
+def score_answers(answers, model_path=None, id_column=None):
+    """
+    Profile, confidence and model version for a chunk of raw answers, scored
+    with a single predict_proba call. Runs in pool workers too, where each
+    process loads the model once through its own registry.
+    """
+    model_entry = get_registry(model_path).get()
+    model_frame = map_answer_frame_to_model_format(answers)
+    classes, probabilities = predict_proba_frame(model_entry, model_frame)
+    best = probabilities.argmax(axis=1)
+    labels = {c: profile_label(c, len(classes)) for c in classes}
+
+    scored = pd.DataFrame({
+        "row": answers.index,
+        "profile": [labels[c] for c in classes[best]],
+        "confidence": probabilities[np.arange(len(best)), best],
+        "model_version": model_entry["version"],
+    })
+    if id_column:
+        scored.insert(0, id_column, answers[id_column].to_numpy())
+    return scored
+
+
+def _write_chunk(scored, output, first):
+    if output.endswith((".jsonl", ".json")):
+        scored.to_json(output, orient="records", lines=True, mode="w" if first else "a")
+    else:
+        scored.to_csv(output, index=False, header=first, mode="w" if first else "a")
+
+
+def score_file(input_path, output_path, model_path=None, chunk_rows=DEFAULT_CHUNK_ROWS, workers=0, id_column=None):
+    """
+    Scores an answers export chunk by chunk and appends the results to
+    `output_path` in input order; returns the number of rows scored.
+
+    With `workers` > 0 chunks are scored in a process pool. At most two
+    chunks per worker are in flight, so memory stays bounded by the chunk
+    size whatever the file size.
+    """
+    written = 0
+    started = time.perf_counter()
+
+    def write(scored):
+        nonlocal written
+        _write_chunk(scored, output_path, first=written == 0)
+        written += len(scored)
+        logger.info("Scored %d rows (%.0f rows/s)", written, written / (time.perf_counter() - started))
+
+    chunks = read_answer_chunks(input_path, chunk_rows)
+    if workers <= 0:
+        for answers in chunks:
+            write(score_answers(answers, model_path, id_column))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for answers in chunks:
+                pending.append(pool.submit(score_answers, answers, model_path, id_column))
+                if len(pending) >= 2 * workers:
+                    write(pending.popleft().result())
+            while pending:
+                write(pending.popleft().result())
+
+    if written == 0:
+        _write_chunk(pd.DataFrame(columns=([id_column] if id_column else []) + OUTPUT_COLUMNS), output_path, first=True)
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score exported questionnaire answers with the risk-profile model.")
+    parser.add_argument("input", help="CSV or JSONL of raw answers, one column per question key")
+    parser.add_argument("output", help="CSV or JSONL to write profile, confidence and model_version to")
+    parser.add_argument("--model", default=None, help="pickled pipeline or exported bundle (default: the app's model)")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="rows read and scored at a time")
+    parser.add_argument("--workers", type=int, default=0, help="score chunks in this many processes (0: in-process)")
+    parser.add_argument("--id-column", default=None, help="input column copied to the output to join results back")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if os.path.abspath(args.input) == os.path.abspath(args.output):
+        sys.exit("input and output must be different files")
+    rows = score_file(args.input, args.output, args.model, args.chunk_rows, args.workers, args.id_column)
+    print(f"Scored {rows} rows into {args.output}")
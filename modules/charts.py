@@ -0,0 +1,117 @@
+import streamlit as st
+import numpy as np
+import plotly.graph_objects as go
+
+# Roughly one point per horizontal pixel of a half-width chart
+DEFAULT_POINT_BUDGET = 800
+
+
+# --- Shape-preserving downsampling ---
+
+def lttb_indices(y, threshold=DEFAULT_POINT_BUDGET):
+    """
+    Indices kept by Largest-Triangle-Three-Buckets downsampling of a series.
+
+    The first and last points are always kept; every bucket in between keeps
+    the point forming the largest triangle with the previously kept point
+    and the mean of the next bucket, which preserves peaks and troughs far
+    better than striding. x is taken as the sample position.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    kept = np.empty(threshold, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+
+    anchor = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+        # Twice the triangle area for every candidate in the bucket at once
+        areas = np.abs(
+            (x[anchor] - next_x) * (y[start:end] - y[anchor])
+            - (x[anchor] - x[start:end]) * (next_y - y[anchor])
+        )
+        anchor = start + int(np.nanargmax(areas)) if np.isfinite(areas).any() else start
+        kept[i + 1] = anchor
+    return kept
+
+
+def minmax_indices(y, threshold=DEFAULT_POINT_BUDGET):
+    """
+    Indices of the minimum and maximum of each bucket (fully vectorized), a
+    cheaper alternative to LTTB that never drops an extreme.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    buckets = threshold // 2
+    if threshold >= n or buckets < 1:
+        return np.arange(n)
+
+    size = int(np.ceil(n / buckets))
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    blocks = padded.reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    with np.errstate(invalid="ignore"):
+        lows = offsets + np.nanargmin(np.where(np.isnan(blocks), np.inf, blocks), axis=1)
+        highs = offsets + np.nanargmax(np.where(np.isnan(blocks), -np.inf, blocks), axis=1)
+    return np.unique(np.concatenate([[0, n - 1], lows, highs]).clip(0, n - 1))
+
+
+# --- Cached figures ---
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def price_chart_figure(ticker, period_label, last_bar, _data, point_budget=DEFAULT_POINT_BUDGET):
+    """
+    Plotly price chart with 30/90-day moving averages, built once per ticker,
+    period and last bar. The close is downsampled with LTTB and the moving
+    averages reuse the same dates so the three lines stay aligned.
+    """
+    close = _data["Close"]
+    kept = lttb_indices(close.to_numpy(), point_budget)
+    sampled = _data.iloc[kept]
+    color = "green" if close.iloc[-1] >= close.iloc[0] else "red"
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=sampled.index, y=sampled["Close"], mode="lines", name="Close Price", line=dict(color=color, width=2)))
+    fig.add_trace(go.Scatter(x=sampled.index, y=sampled["MA_30"], mode="lines", name="30-day MA", line=dict(dash="dash"), opacity=0.7))
+    fig.add_trace(go.Scatter(x=sampled.index, y=sampled["MA_90"], mode="lines", name="90-day MA", line=dict(dash="dot"), opacity=0.7))
+    fig.update_layout(
+        title=f"{ticker} - Price Over {period_label}",
+        yaxis_title="Price (€)",
+        template="plotly_white",
+        height=400,
+        margin=dict(t=50, b=30, l=30, r=30),
+        legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5),
+    )
+    return fig
+
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def median_returns_bar_figure(ticker, last_bar, labels, values):
+    """Bar chart of median projected returns, cached on the ticker, last bar and the values shown."""
+    values = list(values)
+    fig = go.Figure(go.Bar(
+        x=list(labels),
+        y=values,
+        marker_color="#0068c9",
+        text=[f"{v * 100:.1f}%" for v in values],
+        textposition="outside",
+    ))
+    fig.update_layout(
+        title="Median Projected Returns (%)",
+        yaxis_title="Return (%)",
+        yaxis_tickformat=".0%",
+        template="plotly_white",
+        height=400,
+        margin=dict(t=50, b=30, l=30, r=30),
+    )
+    fig.update_yaxes(range=[min(0, min(values)) * 1.2, max(0, max(values)) * 1.2], gridcolor="rgba(0,0,0,0.15)", griddash="dash")
+    return fig
@@ -1,24 +1,11 @@
+import contextlib
 import streamlit as st
 import streamlit.components.v1 as components
-from openai import AzureOpenAI
-import os
+from .azure_clients import get_azure_client
 
 def init_azure_client():
-    """Initialize Azure OpenAI client"""
-    endpoint = "https://anju-mcrequpq-eastus2.cognitiveservices.azure.com/"
-    deployment = "gpt-35-turbo_anju"
-    subscription_key = os.getenv("AZURE_AI_KEY") 
-    api_version = "2024-12-01-preview"
-    
-    try:
-        client = AzureOpenAI(
-            api_version=api_version,
-            azure_endpoint=endpoint,
-            api_key=subscription_key,
-        )
-        return client, deployment
-    except Exception as e:
-        return None, None
+    """Shared Azure OpenAI client, reusing its keep-alive connections across messages and sessions"""
+    return get_azure_client()
 
 def create_system_prompt():
     """Create system prompt based on user profile from ALL sections"""
@@ -135,40 +122,53 @@ def create_system_prompt():
     
     return base_prompt
 
-def get_ai_response(user_message):
-    """Get response from Azure OpenAI"""
+def build_chat_messages(user_message):
+    """System prompt, recent chat history and the new message, as sent to Azure OpenAI"""
+    messages = [{"role": "system", "content": create_system_prompt()}]
+    
+    # Add recent chat history (last 6 messages)
+    if 'chat_messages' in st.session_state:
+        recent_messages = st.session_state.chat_messages[-6:]
+        for msg in recent_messages:
+            messages.append({"role": msg["role"], "content": msg["content"]})
+    
+    # Add current message
+    messages.append({"role": "user", "content": user_message})
+    return messages
+
+def stream_ai_response(messages):
+    """Yield the Azure OpenAI response piece by piece as it is generated"""
     client, deployment = init_azure_client()
     
     if not client:
-        return "Sorry, I'm having trouble connecting. Please try again or contact support."
+        yield "Sorry, I'm having trouble connecting. Please try again or contact support."
+        return
     
+    stream = None
     try:
-        system_prompt = create_system_prompt()
-        
-        # Prepare messages
-        messages = [{"role": "system", "content": system_prompt}]
-        
-        # Add recent chat history (last 6 messages)
-        if 'chat_messages' in st.session_state:
-            recent_messages = st.session_state.chat_messages[-6:]
-            for msg in recent_messages:
-                messages.append({"role": msg["role"], "content": msg["content"]})
-        
-        # Add current message
-        messages.append({"role": "user", "content": user_message})
-        
-        # Call Azure OpenAI
-        response = client.chat.completions.create(
+        stream = client.chat.completions.create(
             messages=messages,
             max_tokens=500,
             temperature=0.7,
-            model=deployment
+            model=deployment,
+            stream=True
         )
-        
-        return response.choices[0].message.content
+        for chunk in stream:
+            # Azure sends content-filter chunks without choices
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
         
     except Exception as e:
-        return f"I'm experiencing technical difficulties. Please try again. Error: {str(e)[:100]}..."
+        yield f"I'm experiencing technical difficulties. Please try again. Error: {str(e)[:100]}..."
+    
+    finally:
+        # Also runs when the reader stops early, handing the connection back to the pool
+        if stream is not None:
+            stream.close()
+
+def get_ai_response(user_message):
+    """Get the complete response from Azure OpenAI"""
+    return "".join(stream_ai_response(build_chat_messages(user_message)))
 
 def render_popup_chatbot():
     """Main function to render floating chatbot with sidebar popup"""
@@ -332,6 +332,9 @@ def show_chat_sidebar():
                     </div>
                     """, unsafe_allow_html=True)
         
+        # Where a reply streams in before the rerun shows it with the others
+        reply_slot = st.empty()
+        
         st.markdown("---")
         
         # Chat input with form for Enter key support
@@ -366,11 +369,39 @@ def show_chat_sidebar():
                 
                 # Add user message
                 st.session_state.chat_messages.append({"role": "user", "content": user_input.strip()})
+                messages = build_chat_messages(user_input.strip())
+                
+                # The reply lives in session state from the start, so whatever
+                # has arrived survives if a newer message interrupts this run
+                reply = {"role": "assistant", "content": ""}
+                st.session_state.chat_messages.append(reply)
+                
+                with reply_slot.container():
+                    st.markdown(f"""
+                    <div class="user-message">
+                        <strong>You:</strong> {user_input.strip()}
+                    </div>
+                    """, unsafe_allow_html=True)
+                    reply_placeholder = st.empty()
+                    reply_placeholder.caption("🤔 Thinking...")
                 
-                # Get AI response
-                with st.spinner("🤔 Thinking..."):
-                    response = get_ai_response(user_input.strip())
-                    st.session_state.chat_messages.append({"role": "assistant", "content": response})
+                # Render tokens as they arrive. Sending another message reruns the
+                # script, which stops this loop at its next render; closing the
+                # generator then closes the HTTP stream.
+                completed = False
+                try:
+                    with contextlib.closing(stream_ai_response(messages)) as pieces:
+                        for piece in pieces:
+                            reply["content"] += piece
+                            reply_placeholder.markdown(f"""
+                            <div class="assistant-message">
+                                <strong>Assistant:</strong> {reply["content"]}▌
+                            </div>
+                            """, unsafe_allow_html=True)
+                    completed = True
+                finally:
+                    if not completed:
+                        reply["content"] += " … (stopped)"
                 
                 # Rerun to update the chat
 
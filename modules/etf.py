@@ -1,9 +1,15 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import streamlit.components.v1 as components
+from .projection import cached_horizon_returns, cached_monthly_installments
+from .generators import RETURN_GENERATORS
+from .metrics import ROLLING_WINDOWS, cached_rolling_metrics
+from .metric_state import refresh_metric_state, risk_metrics_from_state
+from .market_data import fetch_history, fetch_info, fetch_many, align_closes, slice_period
+from .fx import FxUnavailableError, to_eur, histories_to_eur, ticker_currency, latest_eur_rate, major_currency, eur_key
+from .charts import price_chart_figure, median_returns_bar_figure, minmax_indices
+from .universe import load_universe, search_universe, filter_universe, load_metrics_table, universe_frame
 
 def run(session):
     st.markdown("""
@@ -12,25 +18,9 @@ def run(session):
     </div>""", unsafe_allow_html=True)
 
     # --- ETF Metadata ---
-    low_risk_etfs = {
-    "Vanguard Total Bond Market ETF": {"ticker": "BND"},
-    "iShares 1-3 Year Treasury Bond ETF": {"ticker": "SHY"},
-    "Vanguard Dividend Appreciation ETF": {"ticker": "VIG"},
-    }
-
-    high_risk_etfs = {
-    "Invesco QQQ Trust": {"ticker": "QQQ"},
-    "ARK Innovation ETF": {"ticker": "ARKK"},
-    "SPDR S&P 500 ETF Trust": {"ticker": "SPY"},
-    }
-
-    # This price_data is only used for the "Since Inception" months calculation
-    np.random.seed(42)
-    days = 252 * 3  # 3 years trading days approx
-    dates = pd.date_range(end=pd.Timestamp.today(), periods=days)
-    price_data = pd.DataFrame({
-    "Close": 100 * np.cumprod(1 + np.random.normal(0, 0.001, days))
-    }, index=dates)
+    # Searchable index of UCITS (and a few US-listed) ETFs, built once per process
+    universe = load_universe()
+    columns = universe["columns"]
 
     # Define your projection periods dictionary for the Monte Carlo simulation
     # These are the periods for which we will run MC and display results in the bar chart
@@ -43,73 +33,56 @@ def run(session):
     }
 
     def fetch_etf_data(ticker, period):
-        etf = yf.Ticker(ticker)
-        data = etf.history(period=period)
+        # Histories and info snapshots come from the shared market data cache,
+        # prices converted to euros against the cached FX series
+        try:
+            data = to_eur(fetch_history(ticker, period), ticker_currency(ticker, universe)).copy()
+        except FxUnavailableError as e:
+            st.error(f"Prices for {ticker} cannot be shown in euros: {e}")
+            st.stop()
         if data.empty:
             return data, {}
         data["MA_30"] = data["Close"].rolling(window=30).mean()
         data["MA_90"] = data["Close"].rolling(window=90).mean()
-        return data, etf.info
-
-    def calculate_risk_metrics(data):
-        returns = data["Close"].pct_change().dropna()
-        volatility = returns.std() * np.sqrt(252)
-        sharpe_ratio = (returns.mean() / returns.std()) * np.sqrt(252)
-        max_drawdown = (data["Close"] / data["Close"].cummax() - 1).min()
-        return volatility, sharpe_ratio, max_drawdown
-
-    def monte_carlo_simulation(data, months, sims=1000):
-        if data.empty or "Close" not in data.columns or len(data) < 2:
-            return None, None
-        returns = data["Close"].pct_change().dropna()
-        if returns.empty: # Handle case where pct_change results in empty Series
-             return None, None
-        last_price = data["Close"].iloc[-1]
-        
-        # Ensure that mean and std are not NaN before proceeding
-        if returns.mean() is None or np.isnan(returns.mean()) or returns.std() is None or np.isnan(returns.std()):
-            return None, None
-
-        mu = returns.mean() * 252  # annual drift
-        sigma = returns.std() * np.sqrt(252)  # annual volatility
-
-        dt = 1/252
-        steps = int(months * 21)  # approx trading days in months
-
-        if steps == 0: # Handle cases where months is very small and steps becomes 0
-            return None, None
-
-        price_paths = np.zeros((steps + 1, sims))
-        price_paths[0] = last_price
-
-        for t in range(1, steps + 1):
-            rand = np.random.standard_normal(sims)
-            price_paths[t] = price_paths[t-1] * np.exp((mu - 0.5 * sigma**2)*dt + sigma * np.sqrt(dt) * rand)
-
-        # Calculate projected returns as % change from last price to last simulated price
-        projected_returns = (price_paths[-1] / last_price) - 1
-        return price_paths, projected_returns
+        return data, fetch_info(ticker)
 
     # --- Main UI ---
 
+    view_mode = st.radio("View:", ["Single ETF", "Compare ETFs", "Browse Universe"], horizontal=True, key="etf_view_mode")
+    if view_mode == "Compare ETFs":
+        show_comparison(universe)
+        return
+    if view_mode == "Browse Universe":
+        show_universe_browser(universe)
+        return
+
     # --- Risk Category Dropdown ---
     risk_category = st.selectbox("Select Risk Category:", ["Low Risk", "High Risk"])
-
-    # --- Dynamic ETF Dropdown based on Risk Category ---
-    if risk_category == "Low Risk":
-        selected_etf = st.selectbox("Choose an ETF:", list(low_risk_etfs.keys()))
-        ticker = low_risk_etfs[selected_etf]["ticker"]
-    else:
-        selected_etf = st.selectbox("Choose an ETF:", list(high_risk_etfs.keys()))
-        ticker = high_risk_etfs[selected_etf]["ticker"]
+    ucits_only = st.checkbox("UCITS ETFs only (available to Irish investors)", value=True, key="ucits_only_input")
+    query = st.text_input("Search by name, ticker or ISIN:", key="etf_search_input", placeholder="e.g. MSCI World, CSPX, IE00B5BMR087")
+
+    # --- Dynamic ETF Dropdown based on Risk Category and search ---
+    rows = search_universe(universe, query, mask=filter_universe(universe, risk_bucket=risk_category, ucits_only=ucits_only))
+    if not len(rows):
+        st.warning("No ETFs match this search.")
+        return
+    row = st.selectbox(
+        "Choose an ETF:",
+        rows.tolist(),
+        format_func=lambda r: f"{columns['name'][r]} ({columns['ticker'][r]})",
+    )
+    ticker = columns["ticker"][row]
+    selected_etf = columns["name"][row]
 
     # Fetch data up to max period for initial info and risk metrics
     default_data, info = fetch_etf_data(ticker, "max")
 
     # --- Header and styled metric boxes with tooltips ---
-    quote = info.get('regularMarketPrice', 'N/A')
+    # Quote is in the listing currency (possibly pence); fund assets are reported in the major unit
+    currency = ticker_currency(ticker, universe)
+    quote = eur_amount(info.get('regularMarketPrice'), currency)
     expense = info.get('expenseRatio', 'N/A')
-    aum = info.get('totalAssets', 'N/A')
+    aum = eur_amount(info.get('totalAssets'), major_currency(currency))
     st.markdown(f"""
         <style>
         .metric-container {{
@@ -157,7 +130,7 @@ def run(session):
             <div class="metric-box">
                 <span class="info-icon" title="The most recent market price for this ETF.">ⓘ</span>
                 <div class="metric-label">Quote</div>
-                <div class="metric-value">€{quote:.2f}</div>
+                <div class="metric-value">{f"€{quote:.2f}" if quote is not None else 'N/A'}</div>
             </div>
             <div class="metric-box">
                 <span class="info-icon" title="Annual operating expenses as a percentage of assets.">ⓘ</span>
@@ -167,7 +140,7 @@ def run(session):
             <div class="metric-box">
                 <span class="info-icon" title="Total value of assets managed by the fund.">ⓘ</span>
                 <div class="metric-label">Assets Under Management</div>
-                <div class="metric-value">€{aum:,.0f}</div>
+                <div class="metric-value">{f"€{aum:,.0f}" if aum is not None else 'N/A'}</div>
             </div>
         </div>
     """, unsafe_allow_html=True)
@@ -189,31 +162,18 @@ def run(session):
         if data_for_chart.empty:
             st.warning("No data found for this period.")
         else:
-            start_price = data_for_chart["Close"].iloc[0]
-            end_price = data_for_chart["Close"].iloc[-1]
-            color = "green" if end_price >= start_price else "red"
-
-            fig, ax = plt.subplots(figsize=(8, 4))
-            ax.plot(data_for_chart.index, data_for_chart["Close"], label="Close Price", color=color, linewidth=2)
-            ax.plot(data_for_chart.index, data_for_chart["MA_30"], label="30-day MA", linestyle="--", alpha=0.7)
-            ax.plot(data_for_chart.index, data_for_chart["MA_90"], label="90-day MA", linestyle=":", alpha=0.7)
-            ax.set_ylabel("Price (€)")
-            ax.set_title(f"{ticker} - Price Over {selected_period_label}")
-            ax.legend()
-            ax.tick_params(axis='x', rotation=45)
-            ax.set_facecolor("white")
-            ax.spines["top"].set_visible(False)
-            ax.spines["right"].set_visible(False)
-            ax.grid(False)
-            st.pyplot(fig)
-            st.caption(f"Data from Yahoo Finance | Range: {selected_period_label}")
+            # Downsampled and cached per ticker, range and last bar, so reruns skip the rebuild
+            fig = price_chart_figure(ticker, selected_period_label, data_for_chart.index[-1], data_for_chart)
+            st.plotly_chart(fig, use_container_width=True)
+            st.caption(f"Data from Yahoo Finance, converted to EUR | Range: {selected_period_label}")
 
     with col2:
         st.subheader("ETF Description")
         st.write(info.get("longBusinessSummary", "No detailed description available."))
 
         st.subheader("Risk Metrics")
-        volatility, sharpe_ratio, max_drawdown = calculate_risk_metrics(default_data)
+        # Served from the persisted per-ticker state, which only folds in bars added since the last visit
+        volatility, sharpe_ratio, max_drawdown = risk_metrics_from_state(refresh_metric_state(eur_key(ticker), default_data))
 
         st.markdown(f"""
         <ul style="list-style-type:none; padding-left:0;">
@@ -235,6 +195,35 @@ def run(session):
         </ul>
         """, unsafe_allow_html=True)
 
+    # --- Rolling Risk Metrics vs Benchmark ---
+    benchmark_ticker = "SPY"
+    if not default_data.empty and st.checkbox(f"Show rolling risk metrics vs {benchmark_ticker}", key="rolling_metrics_toggle"):
+        benchmark_data, _ = fetch_etf_data(benchmark_ticker, "max")
+        close = default_data[["Close"]].rename(columns={"Close": ticker})
+        rolling = cached_rolling_metrics(
+            (ticker,), close.index[-1], len(close), close,
+            benchmark_data["Close"] if not benchmark_data.empty else None,
+            benchmark_ticker=benchmark_ticker,
+        )
+
+        window_col, metric_col = st.columns(2)
+        window_label = window_col.radio("Rolling window", list(ROLLING_WINDOWS.keys()), horizontal=True, key="rolling_window_input")
+        metric_labels = {
+            "Volatility": "volatility", "Sharpe Ratio": "sharpe", "Sortino Ratio": "sortino",
+            "Max Drawdown": "max_drawdown", "Beta": "beta", "Correlation": "correlation",
+        }
+        available = {label: name for label, name in metric_labels.items() if name in rolling[window_label]}
+        metric_label = metric_col.selectbox("Metric", list(available.keys()), key="rolling_metric_input")
+
+        series = rolling[window_label][available[metric_label]][ticker].dropna()
+        if series.empty:
+            st.info(f"Not enough history for a {window_label} rolling window.")
+        else:
+            # Min/max bucketing keeps every trough (the worst drawdowns) in the downsampled line
+            series = series.iloc[minmax_indices(series.to_numpy())]
+            st.line_chart(series.rename(f"{metric_label} ({window_label})"))
+            st.caption(f"Rolling {window_label} window | Beta and correlation measured against {benchmark_ticker}")
+
     # --- Full Width Section for Monte Carlo Simulation Inputs ---
     st.markdown("---") # Optional: A horizontal rule for visual separation
     st.subheader("Projected Returns via Monte Carlo Simulation Inputs")
@@ -248,6 +237,10 @@ def run(session):
 
     # The main slider for the Monte Carlo simulation duration
     months = st.slider("Select duration for projection (months):", 1, 120, 12, key="mc_duration_slider_input")
+    generator = RETURN_GENERATORS[st.selectbox(
+        "Market model:", list(RETURN_GENERATORS.keys()), key="mc_generator_input",
+        help="How monthly returns are drawn: normal, with fatter tails, with calm and crisis periods, or with volatility clustering.",
+    )]
 
     # --- Second Row: Monte Carlo Projection Chart (Left) and Summary (Right) ---
     st.markdown("---") # Optional: Another horizontal rule
@@ -259,8 +252,10 @@ def run(session):
     """, unsafe_allow_html=True)
 
     mc_chart_col, mc_summary_col = st.columns(2)
-    # Run Monte Carlo for the selected duration
-    price_paths, projected_returns = monte_carlo_simulation(default_data, months)
+    # One cached Monte Carlo pass covers every slider duration and bar chart period
+    last_bar = default_data.index[-1] if not default_data.empty else None
+    horizon_returns = cached_horizon_returns(eur_key(ticker), last_bar, default_data, generator=generator)
+    projected_returns = horizon_returns[months] if horizon_returns else None
 
     if projected_returns is None:
         mc_summary_col.warning("Insufficient or invalid data for Monte Carlo simulation. Please select a valid ETF and period.")
@@ -280,37 +275,38 @@ def run(session):
                  st.write(f"**One-time Investment:** €{invest_amt:.2f}")
             st.write(f"**Duration:** {months} months")
 
-            st.success(f"""
-                        - Most likely outcome:
-                          _(Median projected return: {median_return:.2%})_
+            if investment_type == "Monthly Installment":
+                # Each monthly purchase is priced on its own simulated path
+                installments = cached_monthly_installments(eur_key(ticker), last_bar, default_data, months, invest_amt, generator=generator)
+                outcomes = installments["percentiles"]
+                invested = installments["total_invested"]
 
-                        - Pessimistic case (5% worst outcomes):
-                          Return could be as low as **{lower_pct:.2%}**
+                st.success(f"""
+                            - Most likely outcome:
+                              _(Median portfolio value: €{outcomes[50]:,.2f})_
 
-                        - Optimistic case (top 5%):
-                          Return could be as high as **{upper_pct:.2%}**
-                        """)
-    #st.subheader("Monte Carlo Simulation Results") # New subheader for the results section
-    
-        
-                  # Calculate FV based on investment type and median return
-            if investment_type == "Monthly Installment":
-                # Assuming the median_return is the total return for the 'months' period
-                # We need an effective monthly rate for compounding monthly investments
-                if (1 + median_return) <= 0: # Avoid issues with power of negative numbers
-                    r_monthly = -1 # Effective monthly loss of 100%
-                else:
-                    r_monthly = (1 + median_return)**(1/months) - 1
+                            - Pessimistic case (5% worst outcomes):
+                              Value could be as low as **€{outcomes[5]:,.2f}** ({outcomes[5] / invested - 1:.2%})
 
-                if r_monthly == 0:
-                    fv = invest_amt * months # Simple sum if no growth/decay
-                else:
-                    fv = invest_amt * (((1 + r_monthly) ** months - 1) / r_monthly)
+                            - Optimistic case (top 5%):
+                              Value could be as high as **€{outcomes[95]:,.2f}** ({outcomes[95] / invested - 1:.2%})
+                            """)
                 st.markdown(f"""
-                    - Projected portfolio value after **{months} months** with **€{invest_amt:.2f}/month**:
-                    **€{fv:,.2f}**
+                    - Projected portfolio value after **{months} months** with **€{invest_amt:.2f}/month**
+                    (€{invested:,.2f} invested in total):
+                    **€{outcomes[50]:,.2f}**
                     """)
             else: # One-time Investment
+                st.success(f"""
+                            - Most likely outcome:
+                              _(Median projected return: {median_return:.2%})_
+
+                            - Pessimistic case (5% worst outcomes):
+                              Return could be as low as **{lower_pct:.2%}**
+
+                            - Optimistic case (top 5%):
+                              Return could be as high as **{upper_pct:.2%}**
+                            """)
                 fv = invest_amt * (1 + median_return)
                 st.markdown(f"""
                     - Projected portfolio value after **{months} months** with a **€{invest_amt:.2f} one-time investment**:
@@ -321,8 +317,8 @@ def run(session):
             # Calculate median returns for the specific bar chart periods using MC simulation
             actual_median_returns = {}
             for label, period_months in mc_bar_chart_projection_periods.items():
-                # We need to ensure we use default_data for historical volatility/return calculation
-                _, period_projected_returns = monte_carlo_simulation(default_data, period_months)
+                # Every period was read from the same simulation pass as the slider duration
+                period_projected_returns = horizon_returns.get(period_months)
                 if period_projected_returns is not None:
                     actual_median_returns[label] = np.median(period_projected_returns)
                 else:
@@ -331,37 +327,124 @@ def run(session):
             labels = list(actual_median_returns.keys())
             values = list(actual_median_returns.values())
 
-            fig, ax = plt.subplots(figsize=(8, 4))
-            # Plot raw return values, which are decimals (e.g., 0.15 for 15%)
-            bars = ax.bar(labels, values, color='#0068c9')
-
-            # Set title and y-axis label to reflect percentages if that's the desired display
-            ax.set_title("Median Projected Returns (%)", fontsize=14)
-            ax.set_ylabel("Return (%)")
-
-            # Adjust y-axis limits to show percentage range, potentially from negative to positive
-            # Find min and max values to set dynamic limits
-            min_val = min(0, min(values))
-            max_val = max(0, max(values))
-            ax.set_ylim(min_val * 1.2, max_val * 1.2) # Add some padding
-
-            ax.grid(axis='y', linestyle='--', alpha=0.7)
-
-            # Labels on bars: Display as percentages (multiply by 100 and format)
-            for bar, ret in zip(bars, values):
-                height = bar.get_height()
-                # Check if the return is negative to adjust label position
-                if height >= 0:
-                    va = 'bottom'
-                    offset = 0.005 * (max_val - min_val) # Dynamic offset based on range
-                else:
-                    va = 'top'
-                    offset = -0.005 * (max_val - min_val) # Dynamic offset for negative bars
+            fig = median_returns_bar_figure(ticker, last_bar, tuple(labels), tuple(values))
+            st.plotly_chart(fig, use_container_width=True)
+            st.caption(f"These returns are simulated values and are subject to market changes.")
+    
 
-                ax.text(bar.get_x() + bar.get_width() / 2, height + offset, f"{ret * 100:.1f}%", ha='center', va=va, fontsize=10)
 
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            st.pyplot(fig)
-            st.caption(f"These returns are simulated values and are subject to market changes.")
-    
\ No newline at end of file
+def eur_amount(value, currency):
+    """`value` in euros, or None when yfinance has no number for it or there is no FX rate."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    value = value * latest_eur_rate(currency)
+    return value if np.isfinite(value) else None
+
+
+def show_comparison(universe):
+    """Side-by-side view of several ETFs, downloaded concurrently and aligned on common dates"""
+    columns = universe["columns"]
+    names_by_ticker = dict(zip(columns["ticker"], columns["name"]))
+    tickers = st.multiselect(
+        "Choose ETFs to compare:",
+        list(names_by_ticker.keys()),
+        default=[t for t in ["CSPX.L", "EQQQ.DE", "VAGF.DE"] if t in names_by_ticker],
+        format_func=lambda t: f"{t} - {names_by_ticker[t]}",
+        key="compare_tickers_input",
+    )
+    if len(tickers) < 2:
+        st.info("Select at least two ETFs to compare.")
+        return
+
+    period_map = {"1 Year": "1y", "3 Years": "3y", "5 Years": "5y", "Since Common Inception": "max"}
+    period_label = st.radio("Select Time Range", list(period_map.keys()), index=1, horizontal=True, key="compare_period_input")
+
+    # One concurrent round of downloads; every later slice is served from the cache
+    histories = fetch_many(tickers, "max")
+    histories, fx_errors = histories_to_eur(histories, lambda t: ticker_currency(t, universe))
+    for error in fx_errors.values():
+        st.warning(f"Left out: {error}")
+    missing = [t for t in tickers if t in histories and histories[t].empty]
+    if missing:
+        st.warning(f"No data found for: {', '.join(missing)}")
+
+    closes = align_closes({t: slice_period(h, period_map[period_label]) for t, h in histories.items() if t not in missing})
+    if len(closes) < 2:
+        st.warning("These ETFs have no overlapping price history for this period.")
+        return
+
+    perf_col, corr_col = st.columns(2)
+    with perf_col:
+        st.subheader("Normalized Performance")
+        st.line_chart(closes / closes.iloc[0] * 100)
+        st.caption(f"Growth of 100 invested on {closes.index[0]:%d %b %Y}")
+
+    with corr_col:
+        st.subheader("Correlation of Daily Returns")
+        correlation = closes.pct_change().dropna().corr()
+        st.dataframe(correlation.style.format("{:.2f}").background_gradient(cmap="RdYlGn_r", vmin=-1, vmax=1))
+
+    st.subheader("Risk Metrics")
+    rows = []
+    for ticker in closes.columns:
+        volatility, sharpe_ratio, max_drawdown = risk_metrics_from_state(refresh_metric_state(eur_key(ticker), histories[ticker]))
+        period_return = closes[ticker].iloc[-1] / closes[ticker].iloc[0] - 1
+        rows.append({
+            "ETF": names_by_ticker[ticker],
+            "Ticker": ticker,
+            f"Return ({period_label})": f"{period_return:.2%}",
+            "Volatility (Annualized)": f"{volatility:.2%}",
+            "Sharpe Ratio": f"{sharpe_ratio:.2f}",
+            "Max Drawdown": f"{max_drawdown:.2%}",
+        })
+    st.dataframe(pd.DataFrame(rows).set_index("Ticker"), use_container_width=True)
+    st.caption("Volatility, Sharpe ratio and max drawdown use each ETF's full history | Data from Yahoo Finance")
+
+
+def show_universe_browser(universe):
+    """Filterable, sortable table of the ETF universe read from the precomputed metrics table"""
+    columns = universe["columns"]
+    metrics = load_metrics_table(universe)
+
+    filter_col1, filter_col2, filter_col3 = st.columns(3)
+    with filter_col1:
+        query = st.text_input("Search by name, ticker or ISIN:", key="universe_search_input")
+        asset_classes = st.multiselect("Asset class:", sorted(set(columns["asset_class"])), key="universe_asset_class_input")
+    with filter_col2:
+        risk_bucket = st.selectbox("Risk category:", ["All", "Low Risk", "High Risk"], key="universe_risk_input")
+        domiciles = st.multiselect("Domicile:", sorted(set(columns["domicile"])), key="universe_domicile_input")
+    with filter_col3:
+        max_ter = st.slider("Maximum TER (%):", 0.0, 1.0, 1.0, 0.01, key="universe_ter_input")
+        ucits_only = st.checkbox("UCITS ETFs only", value=True, key="universe_ucits_input")
+
+    mask = filter_universe(
+        universe,
+        asset_classes=asset_classes,
+        risk_bucket=None if risk_bucket == "All" else risk_bucket,
+        domiciles=domiciles,
+        max_ter=max_ter,
+        ucits_only=ucits_only,
+    )
+    rows = search_universe(universe, query, mask=mask, limit=universe["size"])
+
+    sort_options = {
+        "TER": ("ter", True), "Sharpe Ratio": ("sharpe", False), "Volatility": ("volatility", True),
+        "1Y Return": ("return_1y", False), "3Y Return": ("return_3y", False), "5Y Return": ("return_5y", False),
+    }
+    sort_label = st.radio("Sort by:", list(sort_options.keys()), horizontal=True, key="universe_sort_input")
+    sort_key, ascending = sort_options[sort_label]
+    values = columns["ter"][rows] if sort_key == "ter" else metrics[sort_key][rows]
+    # NaNs (no metrics yet) always sort last; ties keep the search's relevance order
+    values = np.where(np.isnan(values), np.inf, values if ascending else -values)
+    rows = rows[np.argsort(values, kind="stable")]
+
+    st.caption(f"{len(rows)} of {universe['size']} ETFs")
+    st.dataframe(
+        universe_frame(universe, rows, metrics).style.format({
+            "TER (%)": "{:.2f}", "Volatility": "{:.2%}", "Sharpe": "{:.2f}", "Max Drawdown": "{:.2%}",
+            "1Y Return": "{:.2%}", "3Y Return": "{:.2%}", "5Y Return": "{:.2%}",
+        }, na_rep="–"),
+        use_container_width=True,
+        hide_index=True,
+    )
+    st.caption("Metrics are precomputed from cached price histories and refreshed in the background; funds without cached data show –.")
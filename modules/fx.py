@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+from .market_data import fetch_history, fetch_info
+
+BASE_CURRENCY = "EUR"
+
+# Yahoo FX pairs quoted as units of the currency per one euro, refreshed in
+# the background; any other currency uses the same EUR<ccy>=X pattern
+FX_TICKERS = {"USD": "EURUSD=X", "GBP": "EURGBP=X", "CHF": "EURCHF=X"}
+
+# Exchanges quoting in minor units (London lines are often in pence)
+MINOR_UNITS = {"GBp": ("GBP", 100), "GBX": ("GBP", 100)}
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Dividends"]
+
+
+class FxUnavailableError(ValueError):
+    """No exchange rates could be loaded to convert a currency to euros."""
+
+
+def ticker_currency(ticker, universe=None):
+    """
+    Quote currency of a ticker: the universe metadata when it lists the
+    ticker, otherwise the cached info snapshot, falling back to USD.
+    """
+    if universe is not None:
+        row = universe["row_by_ticker"].get(ticker)
+        if row is not None:
+            return universe["columns"]["currency"][row]
+    return fetch_info(ticker).get("currency") or "USD"
+
+
+def major_currency(currency):
+    """The currency itself, or the major currency of a minor-unit code such as GBp."""
+    return MINOR_UNITS.get(currency, (currency, 1))[0]
+
+
+def fx_ticker(major):
+    """Yahoo pair quoting `major` per euro."""
+    return FX_TICKERS.get(major, f"{BASE_CURRENCY}{major}=X")
+
+
+def _fx_close(major):
+    ticker = fx_ticker(major)
+    history = fetch_history(ticker, "max")
+    close = history["Close"] if not history.empty else pd.Series(dtype=float)
+    close = close[close > 0]
+    if close.empty:
+        raise FxUnavailableError(f"no euro exchange rates available for {major} ({ticker})")
+    return close
+
+
+def eur_rates(currency, index):
+    """
+    Euros per unit of `currency` on each date of `index`, forward-filled
+    from the cached daily FX series (FX and exchange holidays differ). Dates
+    before the FX history starts are NaN. Raises FxUnavailableError when
+    there is no FX series for the currency.
+    """
+    major, divisor = MINOR_UNITS.get(currency, (currency, 1))
+    if major == BASE_CURRENCY:
+        return pd.Series(1.0 / divisor, index=index)
+    fx_close = _fx_close(major)
+    aligned = fx_close.reindex(fx_close.index.union(index)).ffill().reindex(index)
+    return 1.0 / (aligned * divisor)
+
+
+def to_eur(history, currency):
+    """
+    Converts the price columns of a daily history to euros in one
+    date-aligned multiply. Volume is left as is, and bars older than the FX
+    series are dropped since they cannot be converted. Raises
+    FxUnavailableError rather than returning an empty frame when the
+    currency's FX series cannot be loaded.
+    """
+    if history.empty:
+        return history
+    rates = eur_rates(currency, history.index)
+    converted = history[rates.notna()].copy()
+    rates = rates[rates.notna()]
+    columns = [c for c in PRICE_COLUMNS if c in converted.columns]
+    converted[columns] = converted[columns].mul(rates, axis=0)
+    return converted
+
+
+def histories_to_eur(histories, currency_of):
+    """
+    to_eur over several histories, `currency_of(ticker)` giving each quote
+    currency. Returns (converted, errors): tickers that cannot be converted
+    are left out and their FX errors listed, so a page can show the rest
+    and say what is missing.
+    """
+    converted, errors = {}, {}
+    for ticker, history in histories.items():
+        try:
+            converted[ticker] = to_eur(history, currency_of(ticker))
+        except FxUnavailableError as e:
+            errors[ticker] = str(e)
+    return converted, errors
+
+
+def latest_eur_rate(currency):
+    """Euros per unit of `currency` at the most recent cached FX close."""
+    major, divisor = MINOR_UNITS.get(currency, (currency, 1))
+    if major == BASE_CURRENCY:
+        return 1.0 / divisor
+    try:
+        fx_close = _fx_close(major)
+    except FxUnavailableError:
+        return np.nan
+    return 1.0 / (fx_close.iloc[-1] * divisor)
+
+
+def eur_key(ticker):
+    """Cache key for state derived from a ticker's EUR history, kept apart from native-currency state."""
+    return f"{ticker}@{BASE_CURRENCY}"
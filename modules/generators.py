@@ -0,0 +1,127 @@
+import numpy as np
+
+# Display label -> generator kind, for the simulation pages
+RETURN_GENERATORS = {
+    "Normal": "normal",
+    "Fat tails (Student-t)": "student_t",
+    "Calm/crisis regimes": "regime",
+    "Volatility clustering (GARCH)": "garch",
+}
+
+# Parameters are per month; draw_shocks rescales them to other step lengths
+DEFAULT_PARAMS = {
+    "student_t": {"df": 5},
+    "regime": {
+        "calm_stay": 0.98,     # a calm spell lasts 50 months on average
+        "crisis_stay": 0.85,   # a crisis lasts about 7 months
+        "crisis_vol": 2.0,     # crisis volatility relative to calm
+        "crisis_mean": -0.5,   # crisis drift, in unconditional standard deviations
+    },
+    "garch": {"alpha": 0.10, "beta": 0.85},
+}
+
+
+def _student_t(rng, shape, df):
+    # Scaled to unit variance so only the tails change
+    return rng.standard_t(df, size=shape) * np.sqrt((df - 2) / df)
+
+
+def regime_states(rng, steps, runs, calm_stay, crisis_stay):
+    """
+    Boolean (steps, runs) array, True where a path is in the crisis regime.
+
+    Spell lengths of a two-state Markov chain are geometric, so whole spells
+    are drawn up front, alternating from each path's starting state, and
+    their end points are scattered into a per-step counter. A cumulative sum
+    of that counter gives the spell index at every step, whose parity is the
+    regime. No loop runs over steps.
+    """
+    crisis_share = (1 - calm_stay) / (2 - calm_stay - crisis_stay)
+    start_in_crisis = rng.random(runs) < crisis_share
+    mean_cycle = 1 / (1 - calm_stay) + 1 / (1 - crisis_stay)
+    spells = 2 * int(np.ceil(steps / mean_cycle)) + 4
+
+    while True:
+        calm = rng.geometric(1 - calm_stay, size=(runs, spells))
+        crisis = rng.geometric(1 - crisis_stay, size=(runs, spells))
+        # Even spells are in the starting regime, odd spells in the other
+        even = (np.arange(spells) % 2 == 0)[None, :]
+        durations = np.where(even == start_in_crisis[:, None], crisis, calm)
+        ends = np.cumsum(durations, axis=1)
+        if ends[:, -1].min() >= steps:
+            break
+        spells *= 2
+
+    switches = np.zeros((runs, steps + 1), dtype=np.int64)
+    rows = np.repeat(np.arange(runs), spells)
+    np.add.at(switches, (rows, np.minimum(ends, steps).ravel()), 1)
+    spell_index = np.cumsum(switches, axis=1)[:, :steps]
+    return ((spell_index % 2 == 1) ^ start_in_crisis[:, None]).T
+
+
+def _regime_steps(rng, steps, runs, dims, calm_stay, crisis_stay, crisis_vol, crisis_mean):
+    crisis = regime_states(rng, steps, runs, calm_stay, crisis_stay)
+
+    # Regime means and volatilities chosen so the mixture has mean 0 and variance 1
+    crisis_share = (1 - calm_stay) / (2 - calm_stay - crisis_stay)
+    calm_share = 1 - crisis_share
+    calm_mean = -crisis_share * crisis_mean / calm_share
+    calm_vol = np.sqrt(
+        (1 - calm_share * calm_mean**2 - crisis_share * crisis_mean**2)
+        / (calm_share + crisis_share * crisis_vol**2)
+    )
+    for in_crisis in crisis:
+        # Every asset of a path shares its regime
+        means = np.where(in_crisis, crisis_mean, calm_mean)[:, None]
+        vols = np.where(in_crisis, crisis_vol * calm_vol, calm_vol)[:, None]
+        yield means + vols * rng.standard_normal((runs, dims))
+
+
+def _garch_steps(rng, steps, runs, dims, alpha, beta):
+    # Unit unconditional variance; the recursion carries one variance per path and asset
+    omega = 1 - alpha - beta
+    variance = np.ones((runs, dims))
+    for _ in range(steps):
+        shocks = rng.standard_normal((runs, dims)) * np.sqrt(variance)
+        variance = omega + alpha * shocks**2 + beta * variance
+        yield shocks
+
+
+def shock_steps(kind, rng, steps, runs, dims=1, periods_per_year=12, params=None):
+    """
+    The shocks of draw_shocks one step at a time, each of shape (runs,
+    dims), for loops that should not hold the whole (steps, runs, dims)
+    array. Only the regime path, (steps, runs), is drawn up front.
+
+    Monthly parameters are converted to the step length given by
+    `periods_per_year` (e.g. 1 for yearly steps).
+    """
+    params = {**DEFAULT_PARAMS.get(kind, {}), **(params or {})}
+    scale = 12 / periods_per_year
+
+    if kind == "normal":
+        return (rng.standard_normal((runs, dims)) for _ in range(steps))
+    if kind == "student_t":
+        return (_student_t(rng, (runs, dims), params["df"]) for _ in range(steps))
+    if kind == "regime":
+        return _regime_steps(
+            rng, steps, runs, dims, params["calm_stay"] ** scale, params["crisis_stay"] ** scale,
+            params["crisis_vol"], params["crisis_mean"],
+        )
+    if kind == "garch":
+        # Keep the split between reaction and decay while rescaling the persistence
+        persistence = (params["alpha"] + params["beta"]) ** scale
+        alpha = persistence * params["alpha"] / (params["alpha"] + params["beta"])
+        return _garch_steps(rng, steps, runs, dims, alpha, persistence - alpha)
+    raise ValueError(f"unknown return generator: {kind}")
+
+
+def draw_shocks(kind, rng, steps, runs, dims=1, periods_per_year=12, params=None):
+    """
+    Standardized return shocks of shape (steps, runs, dims): mean 0 and
+    unconditional variance 1 for every generator, so they slot in wherever a
+    standard normal draw was used and only the shape of the distribution and
+    its dependence over time change. The same draws as shock_steps, stacked.
+    """
+    steps_iter = shock_steps(kind, rng, steps, runs, dims, periods_per_year, params)
+    return np.stack(list(steps_iter)) if steps else np.empty((0, runs, dims))
@@ -0,0 +1,231 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import yfinance as yf
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(current_dir, '..', 'Assets', 'cache', 'market_data')
+
+# Cached histories older than this are downloaded again
+MAX_CACHE_AGE_SECONDS = 6 * 60 * 60
+
+# Upper bound on concurrent downloads so a large comparison cannot flood Yahoo
+MAX_FETCH_WORKERS = 8
+
+# Histories and info snapshots kept in memory, least recently used dropped first
+MAX_MEMORY_ENTRIES = 256
+
+PERIOD_OFFSETS = {
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "1y": pd.DateOffset(years=1),
+    "3y": pd.DateOffset(years=3),
+    "5y": pd.DateOffset(years=5),
+}
+
+_memory_cache = OrderedDict()
+_memory_guard = threading.Lock()
+_ticker_locks = {}
+_locks_guard = threading.Lock()
+
+
+class DownloadError(RuntimeError):
+    """yfinance raised or returned nothing for a ticker."""
+
+
+def _ticker_lock(ticker):
+    with _locks_guard:
+        return _ticker_locks.setdefault(ticker, threading.Lock())
+
+
+def _cache_path(ticker, kind):
+    extension = "pkl" if kind == "history" else "json"
+    return os.path.join(CACHE_DIR, f"{ticker.replace('/', '_')}.{kind}.{extension}")
+
+
+def _is_fresh(path, max_age):
+    return os.path.exists(path) and time.time() - os.path.getmtime(path) < max_age
+
+
+def _memory_hit(ticker, kind, path, max_age):
+    """
+    The in-memory copy if it is younger than max_age and no other process
+    (such as the background refresher) has written a newer file since.
+    """
+    with _memory_guard:
+        cached = _memory_cache.get((ticker, kind))
+        if cached is not None:
+            _memory_cache.move_to_end((ticker, kind))
+    if cached is None or time.time() - cached[0] >= max_age:
+        return None
+    if os.path.exists(path) and os.path.getmtime(path) > cached[0]:
+        return None
+    return cached
+
+
+def _remember(ticker, kind, fetched_at, value):
+    with _memory_guard:
+        _memory_cache[(ticker, kind)] = (fetched_at, value)
+        _memory_cache.move_to_end((ticker, kind))
+        while len(_memory_cache) > MAX_MEMORY_ENTRIES:
+            _memory_cache.popitem(last=False)
+
+
+def _last_good(ticker, kind, path, read):
+    """
+    The newest successful copy, from memory or disk whatever its age, after
+    a failed download; None when there has never been one.
+    """
+    disk_time = os.path.getmtime(path) if os.path.exists(path) else None
+    with _memory_guard:
+        cached = _memory_cache.get((ticker, kind))
+    if cached is not None and (disk_time is None or cached[0] >= disk_time):
+        return cached[1]
+    if disk_time is None:
+        return None
+    value = read(path)
+    _remember(ticker, kind, disk_time, value)
+    return value
+
+
+def _write_atomic(path, write):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def slice_period(history, period):
+    """Trims a full history to a yfinance-style period ("1mo", "1y", ..., "max")."""
+    if history.empty or period not in PERIOD_OFFSETS:
+        return history
+    start = history.index[-1] - PERIOD_OFFSETS[period]
+    return history[history.index >= start]
+
+
+def _download_history(ticker):
+    try:
+        history = yf.Ticker(ticker).history(period="max")
+    except Exception as e:
+        raise DownloadError(f"history download for {ticker} failed: {e}") from e
+    if history.empty:
+        raise DownloadError(f"no price history returned for {ticker}")
+    if history.index.tz is not None:
+        history.index = history.index.tz_localize(None)
+    history.index = history.index.normalize()
+    return history
+
+
+def fetch_history(ticker, period="max", max_age=MAX_CACHE_AGE_SECONDS, stale_ok=True):
+    """
+    Daily OHLCV history for a ticker, sliced to `period`.
+
+    Only the full history is ever downloaded; it is kept in memory and on
+    disk, so every period of every ticker costs at most one network call per
+    `max_age`. The index is normalised to naive dates so listings on
+    different exchanges line up.
+
+    A failed or empty download is never cached. With `stale_ok` the last
+    good copy is served instead (an empty frame if there is none); without
+    it DownloadError is raised, so the refresher can retry.
+    """
+    path = _cache_path(ticker, "history")
+    with _ticker_lock(ticker):
+        cached = _memory_hit(ticker, "history", path, max_age)
+        if cached is not None:
+            return slice_period(cached[1], period)
+
+        if _is_fresh(path, max_age):
+            history = pd.read_pickle(path)
+            _remember(ticker, "history", os.path.getmtime(path), history)
+            return slice_period(history, period)
+
+        try:
+            history = _download_history(ticker)
+        except DownloadError:
+            if not stale_ok:
+                raise
+            history = _last_good(ticker, "history", path, pd.read_pickle)
+            return pd.DataFrame() if history is None else slice_period(history, period)
+        _write_atomic(path, history.to_pickle)
+        _remember(ticker, "history", time.time(), history)
+    return slice_period(history, period)
+
+
+def _read_info(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def fetch_info(ticker, max_age=MAX_CACHE_AGE_SECONDS, stale_ok=True):
+    """The yfinance `info` snapshot for a ticker, cached like fetch_history ({} if never fetched)."""
+    path = _cache_path(ticker, "info")
+    with _ticker_lock(ticker):
+        cached = _memory_hit(ticker, "info", path, max_age)
+        if cached is not None:
+            return cached[1]
+
+        if _is_fresh(path, max_age):
+            info = _read_info(path)
+            _remember(ticker, "info", os.path.getmtime(path), info)
+            return info
+
+        try:
+            info = yf.Ticker(ticker).info
+        except Exception as e:
+            info = None
+            error = DownloadError(f"info download for {ticker} failed: {e}")
+        else:
+            error = DownloadError(f"no info returned for {ticker}")
+        if not info:
+            if not stale_ok:
+                raise error
+            return _last_good(ticker, "info", path, _read_info) or {}
+
+        def write(tmp_path):
+            with open(tmp_path, "w") as f:
+                json.dump(info, f, default=str)
+        _write_atomic(path, write)
+        _remember(ticker, "info", time.time(), info)
+    return info
+
+
+def fetch_many(tickers, period="max", max_workers=MAX_FETCH_WORKERS):
+    """
+    Histories for several tickers fetched concurrently on a bounded thread
+    pool; wall time is close to that of the slowest single download.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return {}
+    workers = max(1, min(max_workers, len(tickers)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        histories = pool.map(lambda t: fetch_history(t, period), tickers)
+        return dict(zip(tickers, histories))
+
+
+def align_closes(histories):
+    """Closing prices of several histories on their common date index."""
+    closes = {
+        ticker: history["Close"] for ticker, history in histories.items() if not history.empty
+    }
+    if not closes:
+        return pd.DataFrame()
+    return pd.concat(closes, axis=1, join="inner").dropna()
+
+
+def monthly_returns(histories):
+    """
+    Month-on-month returns of the closes of several histories over the
+    months they all cover, indexed by month end.
+    """
+    closes = align_closes(histories)
+    if closes.empty:
+        return closes
+    month_ends = closes.groupby(closes.index.to_period("M")).last()
+    month_ends.index = month_ends.index.to_timestamp(how="end").normalize()
+    return month_ends.pct_change().dropna()
@@ -0,0 +1,138 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS_PER_YEAR = 252
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+STATE_DIR = os.path.join(current_dir, '..', 'Assets', 'cache', 'metric_state')
+
+
+def empty_metric_state(ticker):
+    return {
+        "ticker": ticker,
+        "last_bar": None,
+        "last_close": None,
+        "count": 0,        # number of daily returns seen
+        "mean": 0.0,       # running mean of daily returns (Welford)
+        "m2": 0.0,         # running sum of squared deviations (Welford)
+        "peak": None,      # highest close seen so far
+        "max_drawdown": 0.0,
+        "settled": None,   # this state before its last (still moving) bar was folded
+    }
+
+
+def _state_path(ticker):
+    return os.path.join(STATE_DIR, f"{ticker.replace('/', '_')}.json")
+
+
+def load_metric_state(ticker):
+    """Loads the persisted state for a ticker, or an empty one if none was saved yet."""
+    try:
+        with open(_state_path(ticker)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return empty_metric_state(ticker)
+
+
+def save_metric_state(state):
+    """Writes the state atomically so a concurrent reader never sees a partial file."""
+    os.makedirs(STATE_DIR, exist_ok=True)
+    path = _state_path(state["ticker"])
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def _fold(state, new_close):
+    """The state with the closes of `new_close` (all after state["last_bar"]) folded in."""
+    state = {key: value for key, value in state.items() if key != "settled"}
+    prices = new_close.to_numpy(dtype=float)
+    previous = np.concatenate([[np.nan if state["last_close"] is None else state["last_close"]], prices[:-1]])
+    returns = prices / previous - 1
+    returns = returns[~np.isnan(returns)]
+
+    # Chan et al. merge of the running (count, mean, M2) with this batch
+    if len(returns):
+        batch_count = len(returns)
+        batch_mean = returns.mean()
+        batch_m2 = ((returns - batch_mean) ** 2).sum()
+        total = state["count"] + batch_count
+        delta = batch_mean - state["mean"]
+        state["mean"] = state["mean"] + delta * batch_count / total
+        state["m2"] = state["m2"] + batch_m2 + delta**2 * state["count"] * batch_count / total
+        state["count"] = total
+
+    peaks = np.maximum.accumulate(prices)
+    if state["peak"] is not None:
+        peaks = np.maximum(peaks, state["peak"])
+    state["max_drawdown"] = float(min(state["max_drawdown"], (prices / peaks - 1).min()))
+    state["peak"] = float(peaks[-1])
+    state["mean"] = float(state["mean"])
+    state["m2"] = float(state["m2"])
+    state["last_close"] = float(prices[-1])
+    state["last_bar"] = new_close.index[-1].isoformat()
+    return state
+
+
+def update_metric_state(state, data):
+    """
+    Folds the bars after the state's settled bar into the state.
+
+    The last bar of a history moves until its session closes (and, in
+    euros, whenever the FX rate does), so it is never settled: the state
+    keeps a copy of itself from before that bar ("settled") and every
+    update folds the bars after the settled bar again, replacing the last
+    bar's earlier version instead of adding to it.
+
+    Yahoo back-adjusts earlier closes for dividends and splits by a common
+    factor, which leaves past returns and drawdowns unchanged. A settled
+    close that changed is such an adjustment, and the settled close and
+    peak are rescaled by it instead of replaying the history. If the
+    settled or last bar is no longer in the data (or the state predates
+    the settled copy) the state is rebuilt from scratch.
+    """
+    close = data["Close"].dropna()
+    if close.empty:
+        return state
+
+    if state["last_bar"] is None:
+        settled = empty_metric_state(state["ticker"])
+    else:
+        settled = state.get("settled")
+        if settled is None or pd.Timestamp(state["last_bar"]) not in close.index:
+            return update_metric_state(empty_metric_state(state["ticker"]), data)
+        if settled["last_bar"] is not None:
+            settled_bar = pd.Timestamp(settled["last_bar"])
+            if settled_bar not in close.index:
+                return update_metric_state(empty_metric_state(state["ticker"]), data)
+            rescale = close.loc[settled_bar] / settled["last_close"]
+            if rescale != 1.0:
+                settled = dict(settled, last_close=settled["last_close"] * rescale, peak=settled["peak"] * rescale)
+            close = close[close.index > settled_bar]
+
+    settled = _fold(settled, close[:-1]) if len(close) > 1 else settled
+    state = _fold(settled, close[-1:])
+    state["settled"] = settled
+    return state
+
+
+def refresh_metric_state(ticker, data):
+    """Loads, updates with any new bars and persists the state for one ticker."""
+    state = load_metric_state(ticker)
+    updated = update_metric_state(state, data)
+    if updated != state:
+        save_metric_state(updated)
+    return updated
+
+
+def risk_metrics_from_state(state):
+    """Full-history annualised volatility, Sharpe ratio (sample std, 252-day year) and max drawdown."""
+    if state["count"] < 2:
+        return np.nan, np.nan, np.nan
+    daily_std = np.sqrt(state["m2"] / (state["count"] - 1))
+    volatility = daily_std * np.sqrt(TRADING_DAYS_PER_YEAR)
+    sharpe_ratio = (state["mean"] / daily_std) * np.sqrt(TRADING_DAYS_PER_YEAR)
+    return volatility, sharpe_ratio, state["max_drawdown"]
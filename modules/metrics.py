@@ -0,0 +1,141 @@
+import streamlit as st
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS_PER_YEAR = 252
+
+ROLLING_WINDOWS = {
+    "1y": 252,
+    "3y": 756,
+    "5y": 1260,
+}
+
+
+# --- O(n) rolling-window primitives over (bars, tickers) arrays ---
+
+def rolling_sum(values, window):
+    """Trailing sums along axis 0 from a single cumulative sum; the first window - 1 rows are NaN"""
+    csum = np.cumsum(values, axis=0)
+    out = np.full(values.shape, np.nan)
+    if len(values) < window:
+        return out
+    out[window - 1] = csum[window - 1]
+    out[window:] = csum[window:] - csum[:-window]
+    return out
+
+
+def rolling_max(values, window):
+    """
+    Trailing maxima along axis 0 using the van Herk/Gil-Werman block scheme:
+    a prefix and a suffix running max inside fixed blocks of `window` rows,
+    so every output costs O(1) regardless of the window length.
+    """
+    n = len(values)
+    out = np.full(values.shape, np.nan)
+    if n < window:
+        return out
+
+    filled = np.where(np.isnan(values), -np.inf, values)
+    pad = (-n) % window
+    if pad:
+        filled = np.concatenate([filled, np.full((pad,) + filled.shape[1:], -np.inf)])
+    blocks = filled.reshape((-1, window) + filled.shape[1:])
+
+    prefix = np.maximum.accumulate(blocks, axis=1).reshape(filled.shape)
+    suffix = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(filled.shape)
+
+    # Window [i, i + window - 1] spans the tail of one block and the head of the next
+    out[window - 1:] = np.maximum(suffix[:n - window + 1], prefix[window - 1:n])
+    out[np.isinf(out)] = np.nan
+    return out
+
+
+def rolling_min(values, window):
+    return -rolling_max(-values, window)
+
+
+# --- Rolling risk metrics ---
+
+def compute_rolling_metrics(prices, benchmark=None, windows=ROLLING_WINDOWS, risk_free_rate=0.0):
+    """
+    Rolling volatility, Sharpe, Sortino, max drawdown and (with a benchmark)
+    beta and correlation for every column of a price DataFrame at once.
+
+    Returns {window_label: {metric_name: DataFrame}} indexed by bar date.
+    Windows with fewer valid returns than their length are left as NaN, so
+    tickers with shorter histories can share one frame. Max drawdown is
+    measured against the peak of the trailing window, a slightly
+    conservative form of the drawdown within the window.
+    """
+    prices = prices.sort_index()
+    price_values = prices.to_numpy(dtype=float)
+    returns = np.full(price_values.shape, np.nan)
+    returns[1:] = price_values[1:] / price_values[:-1] - 1
+
+    valid = ~np.isnan(returns)
+    # Centring first keeps the sum-of-squares differences numerically stable
+    centred = np.where(valid, returns - np.nanmean(returns, axis=0), 0.0)
+    shift = np.nanmean(returns, axis=0)
+    downside = np.where(valid, np.minimum(returns, 0.0), 0.0)
+    excess_daily = risk_free_rate / TRADING_DAYS_PER_YEAR
+
+    if benchmark is not None:
+        bench_prices = benchmark.reindex(prices.index).to_numpy(dtype=float)
+        bench_returns = np.full(bench_prices.shape, np.nan)
+        bench_returns[1:] = bench_prices[1:] / bench_prices[:-1] - 1
+        pair_valid = valid & ~np.isnan(bench_returns)[:, None]
+        bench_centred = np.where(pair_valid, (bench_returns - np.nanmean(bench_returns))[:, None], 0.0)
+        pair_centred = np.where(pair_valid, centred, 0.0)
+
+    def frame(values):
+        return pd.DataFrame(values, index=prices.index, columns=prices.columns)
+
+    results = {}
+    for label, window in windows.items():
+        count = rolling_sum(valid.astype(float), window)
+        full = count >= window
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = rolling_sum(centred, window) / count + shift
+            var = (rolling_sum(centred**2, window) - rolling_sum(centred, window)**2 / count) / (count - 1)
+            std = np.sqrt(np.maximum(var, 0.0))
+            downside_dev = np.sqrt(rolling_sum(downside**2, window) / count)
+
+            volatility = std * np.sqrt(TRADING_DAYS_PER_YEAR)
+            sharpe = (mean - excess_daily) / std * np.sqrt(TRADING_DAYS_PER_YEAR)
+            sortino = (mean - excess_daily) / downside_dev * np.sqrt(TRADING_DAYS_PER_YEAR)
+
+            drawdown = price_values / rolling_max(price_values, window) - 1
+            max_drawdown = rolling_min(drawdown, window)
+
+        metrics = {
+            "volatility": volatility,
+            "sharpe": sharpe,
+            "sortino": sortino,
+            "max_drawdown": max_drawdown,
+        }
+
+        if benchmark is not None:
+            pair_count = rolling_sum(pair_valid.astype(float), window)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                sum_x = rolling_sum(pair_centred, window)
+                sum_b = rolling_sum(bench_centred, window)
+                cov = (rolling_sum(pair_centred * bench_centred, window) - sum_x * sum_b / pair_count) / (pair_count - 1)
+                var_x = (rolling_sum(pair_centred**2, window) - sum_x**2 / pair_count) / (pair_count - 1)
+                var_b = (rolling_sum(bench_centred**2, window) - sum_b**2 / pair_count) / (pair_count - 1)
+                metrics["beta"] = np.where(pair_count >= window, cov / var_b, np.nan)
+                metrics["correlation"] = np.where(pair_count >= window, cov / np.sqrt(var_x * var_b), np.nan)
+
+        results[label] = {
+            name: frame(np.where(full, values, np.nan)) for name, values in metrics.items()
+        }
+    return results
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_rolling_metrics(tickers, last_bar, bar_count, _prices, _benchmark=None, benchmark_ticker=None):
+    """
+    compute_rolling_metrics memoised on the tickers and the last bar of their
+    data, so reruns between market updates skip the computation entirely.
+    The DataFrames themselves are not hashed.
+    """
+    return compute_rolling_metrics(_prices, _benchmark)
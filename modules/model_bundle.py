@@ -0,0 +1,213 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+import numpy as np
+from .risk_inference import compile_pipeline
+
+BUNDLE_FORMAT = 1
+BUNDLE_MANIFEST = "manifest.json"
+
+
+class BundleError(ValueError):
+    """The bundle is incomplete, from another format version or fails its checksums."""
+
+
+def _array_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _json_value(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _knn_arrays(compiled):
+    """
+    Splits the KNN training matrix into its one-hot block and its numeric
+    block. One-hot columns that only ever hold 0/1 (no SMOTE interpolation
+    between categories) are stored as uint8, otherwise float32; the few
+    numeric columns stay float64 so distances keep the pipeline's ordering.
+    """
+    model = compiled["model"]
+    onehot_columns = sorted(c for lookup in compiled["onehot"].values() for c in lookup.values())
+    block_of = {column: i for i, column in enumerate(onehot_columns)}
+    numeric_columns = [column for _, column, _, _ in compiled["numeric"]]
+
+    onehot_block = model["fit_X"][:, onehot_columns]
+    binary = np.isin(onehot_block, (0.0, 1.0)).all()
+    onehot_block = np.asfortranarray(onehot_block.astype(np.uint8 if binary else np.float32))
+    stored = onehot_block.astype(np.float64)
+
+    arrays = {
+        # Column-major, so a query only reads the columns of its own categories
+        "onehot_block": onehot_block,
+        "onehot_sq_norms": np.einsum("ij,ij->i", stored, stored),
+        "numeric_block": np.ascontiguousarray(model["fit_X"][:, numeric_columns]),
+        # Already indices into classes (sklearn's encoding of the training labels)
+        "labels": model["labels"].astype(np.int16),
+    }
+    tables = {
+        "onehot": {f: [[_json_value(v), block_of[c]] for v, c in lookup.items()] for f, lookup in compiled["onehot"].items()},
+        "numeric": [[f, i, mean, scale] for i, (f, _, mean, scale) in enumerate(compiled["numeric"])],
+        "width": compiled["width"],
+    }
+    return arrays, tables, {"kind": "knn_index", "k": int(model["k"]), "weights": model["weights"]}
+
+
+def _linear_arrays(compiled):
+    model = compiled["model"]
+    tables = {
+        "onehot": {f: [[_json_value(v), c] for v, c in lookup.items()] for f, lookup in compiled["onehot"].items()},
+        "numeric": [list(entry) for entry in compiled["numeric"]],
+        "width": compiled["width"],
+    }
+    return {"coef": model["coef"], "intercept": model["intercept"]}, tables, {"kind": "linear"}
+
+
+def export_bundle(pipeline, directory, version, **extra):
+    """
+    Writes a fitted pipeline as a directory of .npy arrays plus a JSON
+    manifest (vocabulary, scaler tables, class labels, per-array checksums).
+
+    The bundle is written next to the target and renamed into place, so a
+    registry watching `directory` never sees a half-written model. Returns
+    the manifest.
+    """
+    compiled = compile_pipeline(pipeline)
+    kind = compiled["model"]["kind"]
+    arrays, tables, model_info = (_knn_arrays if kind == "knn" else _linear_arrays)(compiled)
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "version": version,
+        "created_at": time.time(),
+        "classes": [_json_value(c) for c in compiled["model"]["classes"]],
+        "model": model_info,
+        "tables": tables,
+        **extra,
+    }
+    return write_bundle(directory, arrays, manifest)
+
+
+def write_arrays(directory, arrays, prefix=""):
+    """Saves arrays as .npy files; returns their manifest entries (file, checksum, dtype, shape)."""
+    files = {}
+    for name, array in arrays.items():
+        filename = f"{prefix}{name}.npy"
+        np.save(os.path.join(directory, filename), array, allow_pickle=False)
+        files[name] = {"file": filename, "sha256": _array_sha256(os.path.join(directory, filename)),
+                       "dtype": str(array.dtype), "shape": list(array.shape)}
+    return files
+
+
+def replace_manifest(directory, manifest):
+    """Atomically swaps in a new manifest, which is what a watching registry reloads on."""
+    path = os.path.join(directory, BUNDLE_MANIFEST)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def write_bundle(directory, arrays, manifest):
+    """Writes base arrays and `manifest` to a staging directory and renames it over `directory`."""
+    directory = os.path.abspath(directory)
+    staging = f"{directory}.{os.getpid()}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    manifest = {**manifest, "arrays": write_arrays(staging, arrays)}
+    replace_manifest(staging, manifest)
+
+    if os.path.isdir(directory):
+        retired = f"{directory}.{os.getpid()}.old"
+        os.replace(directory, retired)
+        os.replace(staging, directory)
+        shutil.rmtree(retired, ignore_errors=True)
+    else:
+        os.replace(staging, directory)
+    return manifest
+
+
+def is_bundle(path):
+    return os.path.isfile(os.path.join(path, BUNDLE_MANIFEST))
+
+
+def read_manifest(directory):
+    with open(os.path.join(directory, BUNDLE_MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise BundleError(f"unsupported bundle format {manifest.get('format')!r} in {directory}")
+    return manifest
+
+
+# Files already checked against their manifest checksum, keyed by path and
+# stat, so reloading after a delta append does not re-hash the base arrays
+_verified = {}
+
+
+def load_arrays(directory, specs):
+    """Memory-maps the arrays listed in a manifest after checking their checksums."""
+    arrays = {}
+    for name, spec in specs.items():
+        path = os.path.join(directory, spec["file"])
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            raise BundleError(f"{spec['file']} is missing from {directory}") from None
+        key = (path, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if _verified.get(key) != spec["sha256"]:
+            if _array_sha256(path) != spec["sha256"]:
+                raise BundleError(f"{spec['file']} in {directory} does not match the manifest")
+            _verified[key] = spec["sha256"]
+        # Plain ndarray views of the mapping skip np.memmap's per-slice bookkeeping
+        arrays[name] = np.asarray(np.load(path, mmap_mode="r", allow_pickle=False))
+    return arrays
+
+
+def load_bundle(directory):
+    """
+    Reads a bundle into the tables risk_inference scores with. Arrays are
+    memory-mapped read-only, so worker processes serving the same bundle
+    share its pages through the OS cache; nothing is unpickled.
+    """
+    manifest = read_manifest(directory)
+    arrays = load_arrays(directory, manifest["arrays"])
+    tables = manifest["tables"]
+    classes = np.asarray(manifest["classes"])
+    if manifest["model"]["kind"] == "knn_index":
+        # The base rows and every appended delta segment are searched as one index
+        parts = [arrays] + [load_arrays(directory, segment["arrays"]) for segment in manifest.get("segments", [])]
+        model = {
+            **manifest["model"],
+            "segments": [{name: part[name] for name in ("onehot_block", "onehot_sq_norms", "numeric_block")} for part in parts],
+            "labels": np.concatenate([part["labels"] for part in parts]),
+            "classes": classes,
+        }
+    else:
+        model = {**manifest["model"], **arrays, "classes": classes}
+    compiled = {
+        "onehot": {f: {value: column for value, column in pairs} for f, pairs in tables["onehot"].items()},
+        "numeric": [tuple(entry) for entry in tables["numeric"]],
+        "width": tables["width"],
+        "model": model,
+    }
+    return compiled, manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a pickled risk pipeline as a memory-mappable array bundle.")
+    parser.add_argument("pipeline", help="pickled, fitted pipeline (trusted input)")
+    parser.add_argument("directory", help="bundle directory to create or replace")
+    parser.add_argument("--version", required=True, help="version recorded in the manifest")
+    args = parser.parse_args()
+
+    with open(args.pipeline, "rb") as f:
+        pipeline = pickle.load(f)
+    manifest = export_bundle(pipeline, args.directory, args.version, source=os.path.basename(args.pipeline))
+    print(f"Wrote {args.directory} ({manifest['model']['kind']}, version {manifest['version']})")
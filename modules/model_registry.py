@@ -0,0 +1,188 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+from .model_bundle import BUNDLE_MANIFEST, BundleError, load_bundle
+
+logger = logging.getLogger(__name__)
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+# The fitted risk-profile pipeline, resolved against the repository rather
+# than the working directory; RISK_MODEL_PATH points at another artifact
+DEFAULT_RISK_MODEL_PATH = os.path.join(current_dir, '..', 'final_pipeline_trained_on_real_data_knn.pkl')
+RISK_MODEL_PATH_ENV = "RISK_MODEL_PATH"
+
+
+class ModelUnavailableError(RuntimeError):
+    """The artifact is missing, fails validation or cannot be deserialised."""
+
+
+def manifest_path(artifact_path):
+    """Sidecar manifest written next to an artifact: {"version": ..., "sha256": ...}."""
+    return f"{artifact_path}.manifest.json"
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_manifest(artifact_path, version, staged_path=None, **extra):
+    """
+    Records the version and checksum of an artifact so the registry can
+    validate it. With `staged_path` the checksum is that of a staged copy
+    that is renamed to `artifact_path` afterwards.
+    """
+    checksum = file_sha256(staged_path or artifact_path)
+    manifest = {"version": version, "sha256": checksum, "created_at": time.time(), **extra}
+    path = manifest_path(artifact_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+    return manifest
+
+
+class ModelRegistry:
+    """
+    Loads a pickled model once per process and shares it between sessions.
+
+    The first get() loads under a lock (later callers wait instead of loading
+    again). Every get() compares the artifact's and its manifest's stat with
+    the loaded copy, which costs two stat calls; a changed file is validated
+    and swapped in, while a replacement that fails validation is logged and
+    the previous model keeps serving until either file changes again.
+
+    The file is read once; its SHA-256 must match the manifest when one
+    exists before those same bytes are unpickled. Without a manifest the
+    checksum itself becomes the version.
+
+    A directory path is read as an exported array bundle (model_bundle):
+    memory-mapped, checked against its own manifest and never unpickled.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self._lock = threading.Lock()
+        self._loaded = None
+        self._signature = None
+        self._rejected = None
+
+    def _watched_path(self):
+        # A bundle is swapped in by renaming its directory, which replaces its manifest
+        if os.path.isdir(self.path):
+            return os.path.join(self.path, BUNDLE_MANIFEST)
+        return self.path
+
+    @staticmethod
+    def _stat(path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _stat_signature(self):
+        artifact = self._stat(self._watched_path())
+        if artifact is None:
+            return None
+        manifest = None if os.path.isdir(self.path) else self._stat(manifest_path(self.path))
+        return artifact, manifest
+
+    def _load_bundle(self):
+        try:
+            compiled, manifest = load_bundle(self.path)
+            sha256 = file_sha256(os.path.join(self.path, BUNDLE_MANIFEST))
+        except (BundleError, OSError, ValueError, KeyError) as e:
+            raise ModelUnavailableError(f"could not load bundle {self.path}: {e}") from e
+        return {"model": compiled, "format": "bundle", "version": str(manifest["version"]),
+                "sha256": sha256, "path": self.path, "loaded_at": time.time()}
+
+    def _load(self):
+        if os.path.isdir(self.path):
+            return self._load_bundle()
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            raise ModelUnavailableError(f"model artifact not found at {self.path}") from None
+        sha256 = hashlib.sha256(data).hexdigest()
+        version = f"sha256:{sha256[:12]}"
+        manifest_file = manifest_path(self.path)
+        if os.path.exists(manifest_file):
+            with open(manifest_file) as f:
+                manifest = json.load(f)
+            if manifest.get("sha256") != sha256:
+                raise ModelUnavailableError(f"checksum of {self.path} does not match its manifest")
+            version = str(manifest.get("version", version))
+        else:
+            logger.warning("No manifest for %s; using its checksum as the version", self.path)
+
+        try:
+            model = pickle.loads(data)
+        except Exception as e:
+            raise ModelUnavailableError(f"could not load {self.path}: {e}") from e
+        return {"model": model, "version": version, "sha256": sha256, "path": self.path, "loaded_at": time.time()}
+
+    def get(self):
+        """
+        The current model entry: {"model", "version", "sha256", "path",
+        "loaded_at"}, plus "format": "bundle" when "model" holds bundle tables.
+        """
+        signature = self._stat_signature()
+        loaded = self._loaded
+        if loaded is not None and (signature is None or signature in (self._signature, self._rejected)):
+            return loaded
+
+        with self._lock:
+            signature = self._stat_signature()
+            if self._loaded is not None and (signature is None or signature in (self._signature, self._rejected)):
+                return self._loaded
+            try:
+                entry = self._load()
+            except ModelUnavailableError:
+                if self._loaded is None:
+                    raise
+                logger.exception("Keeping model %s; the replacement failed to load", self._loaded["version"])
+                # Not retried until the artifact or its manifest changes again
+                self._rejected = signature
+                return self._loaded
+            if self._loaded is not None:
+                logger.info("Reloaded %s: %s -> %s", self.path, self._loaded["version"], entry["version"])
+            self._loaded, self._signature, self._rejected = entry, signature, None
+            return entry
+
+    def reload(self):
+        """Forces the next get() to re-read the artifact."""
+        with self._lock:
+            self._signature = self._rejected = None
+        return self.get()
+
+
+_registries = {}
+_registries_guard = threading.Lock()
+
+
+def risk_model_path():
+    return os.environ.get(RISK_MODEL_PATH_ENV) or DEFAULT_RISK_MODEL_PATH
+
+
+def get_registry(path=None):
+    """The process-wide registry for an artifact path (the risk model by default)."""
+    path = os.path.abspath(path or risk_model_path())
+    with _registries_guard:
+        if path not in _registries:
+            _registries[path] = ModelRegistry(path)
+        return _registries[path]
+
+
+def get_risk_model():
+    """The loaded risk-profile model entry; raises ModelUnavailableError if it cannot be served."""
+    return get_registry().get()
@@ -0,0 +1,208 @@
+import argparse
+import contextlib
+import logging
+import os
+import time
+import numpy as np
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+import pandas as pd
+from .model_bundle import BundleError, load_arrays, read_manifest, replace_manifest, write_arrays, write_bundle
+from .risk import map_answer_frame_to_model_format
+from .risk_inference import MODEL_FEATURES
+
+logger = logging.getLogger(__name__)
+
+LABEL_COLUMN = 'risk_rating_num'
+
+# Compact once deltas make up this many segments or this share of the base rows
+MAX_SEGMENTS = 8
+MAX_DELTA_SHARE = 0.1
+
+
+def _try_lock(fd):
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+@contextlib.contextmanager
+def _writer_lock(directory):
+    """
+    One writer per bundle; readers never wait, they keep serving the last
+    manifest. The lock is held on an open handle, so the OS releases it
+    when the writer exits or is killed; the empty lock file stays in place.
+    """
+    lock_path = f"{os.path.abspath(directory)}.lock"
+    fd = os.open(lock_path, os.O_CREAT | os.O_RDWR)
+    try:
+        if not _try_lock(fd):
+            raise BundleError(f"{directory} is being updated by another process ({lock_path})")
+        yield
+    finally:
+        # Closing the handle releases the lock
+        os.close(fd)
+
+
+def _knn_manifest(directory):
+    manifest = read_manifest(directory)
+    if manifest["model"]["kind"] != "knn_index":
+        raise BundleError("incremental updates need a KNN bundle; retrain linear models with modules.training")
+    return manifest
+
+
+def encode_rows(manifest, base_arrays, model_frame):
+    """
+    Encodes model-format rows with the bundle's frozen vocabulary and scaler,
+    into the same one-hot/numeric block layout as its base rows. Categories
+    the bundle has never seen are left out, as OneHotEncoder(handle_unknown
+    ='ignore') does.
+    """
+    tables = manifest["tables"]
+    n = len(model_frame)
+    onehot = np.zeros((n, base_arrays["onehot_block"].shape[1]), dtype=base_arrays["onehot_block"].dtype)
+    for feature, pairs in tables["onehot"].items():
+        columns = model_frame[feature].map(dict(pairs)).to_numpy(dtype=float)
+        known = ~np.isnan(columns)
+        onehot[np.flatnonzero(known), columns[known].astype(int)] = 1
+
+    numeric = np.empty((n, len(tables["numeric"])))
+    for feature, column, mean, scale in tables["numeric"]:
+        numeric[:, column] = (model_frame[feature].to_numpy(dtype=float) - mean) / scale
+
+    stored = onehot.astype(np.float64)
+    return {
+        "onehot_block": np.asfortranarray(onehot),
+        "onehot_sq_norms": np.einsum("ij,ij->i", stored, stored),
+        "numeric_block": numeric,
+    }
+
+
+def _class_indices(manifest, labels):
+    classes = manifest["classes"]
+    index = {c: i for i, c in enumerate(classes)}
+    unknown = set(labels) - set(index)
+    if unknown:
+        raise BundleError(f"labels {sorted(unknown)} are not among the bundle's classes {classes}")
+    return np.array([index[label] for label in labels], dtype=np.int16)
+
+
+def append_rows(directory, model_frame, labels):
+    """
+    Adds labelled rows to a KNN bundle as a new delta segment: its arrays
+    are written first, then the manifest listing it is swapped in, so the
+    registry serving `directory` picks the rows up on its next request
+    while the base arrays stay untouched. Returns the new manifest.
+    """
+    with _writer_lock(directory):
+        manifest = _knn_manifest(directory)
+        base_arrays = load_arrays(directory, manifest["arrays"])
+        arrays = encode_rows(manifest, base_arrays, model_frame)
+        arrays["labels"] = _class_indices(manifest, list(labels))
+
+        sequence = manifest.get("segment_sequence", 0) + 1
+        segment = {
+            "sequence": sequence,
+            "rows": len(model_frame),
+            "created_at": time.time(),
+            "arrays": write_arrays(directory, arrays, prefix=f"delta-{sequence:05d}-"),
+        }
+        base_version = manifest.get("base_version", manifest["version"])
+        manifest = {
+            **manifest,
+            "base_version": base_version,
+            "version": f"{base_version}+d{sequence}",
+            "segment_sequence": sequence,
+            "segments": [*manifest.get("segments", []), segment],
+        }
+        replace_manifest(directory, manifest)
+    logger.info("Appended %d rows to %s as delta %d", len(model_frame), directory, sequence)
+    return manifest
+
+
+def compact(directory):
+    """
+    Folds every delta segment into the base arrays and rewrites the bundle
+    (renamed into place like an export). Scores do not change: rows keep
+    their order, and the version stays that of the last delta.
+    """
+    with _writer_lock(directory):
+        manifest = _knn_manifest(directory)
+        segments = manifest.get("segments", [])
+        if not segments:
+            return manifest
+        parts = [load_arrays(directory, manifest["arrays"])] + [load_arrays(directory, s["arrays"]) for s in segments]
+        arrays = {
+            "onehot_block": np.asfortranarray(np.concatenate([p["onehot_block"] for p in parts])),
+            "onehot_sq_norms": np.concatenate([p["onehot_sq_norms"] for p in parts]),
+            "numeric_block": np.concatenate([p["numeric_block"] for p in parts]),
+            "labels": np.concatenate([p["labels"] for p in parts]),
+        }
+        manifest = {**manifest, "segments": [], "compacted_at": time.time()}
+        manifest.pop("arrays")
+        manifest = write_bundle(directory, arrays, manifest)
+    logger.info("Compacted %d delta segments into %s", len(segments), directory)
+    return manifest
+
+
+def needs_compaction(manifest, max_segments=MAX_SEGMENTS, max_delta_share=MAX_DELTA_SHARE):
+    segments = manifest.get("segments", [])
+    base_rows = manifest["arrays"]["labels"]["shape"][0]
+    delta_rows = sum(s["rows"] for s in segments)
+    return len(segments) >= max_segments or delta_rows > max_delta_share * base_rows
+
+
+def read_labelled_rows(path, classes, label_column=LABEL_COLUMN, binary=True):
+    """
+    Model-format rows and labels from a CSV of new responses, for a bundle
+    with the given classes. Rows may be raw questionnaire answers (mapped as
+    the app maps them) or already in the model's feature columns; binary
+    collapses the label to risk taker vs not, as modules.training does, and
+    is refused for a multiclass bundle (and vice versa), where collapsed
+    labels would still be valid classes and go in silently mislabelled.
+    """
+    if binary != (sorted(classes) == [0, 1]):
+        scheme = "binary" if binary else "multiclass"
+        raise BundleError(f"{scheme} labels do not fit a bundle with classes {classes}")
+    df = pd.read_csv(path, keep_default_na=False, na_values=[""])
+    labels = df.pop(label_column)
+    if binary:
+        labels = (labels != 0).astype(int)
+    if set(MODEL_FEATURES) <= set(df.columns):
+        model_frame = df[MODEL_FEATURES].fillna(0)
+    else:
+        model_frame = map_answer_frame_to_model_format(df)
+    return model_frame, labels.tolist()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add labelled survey responses to a KNN risk bundle, or compact it.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    append = commands.add_parser("append", help="append labelled rows as a delta segment")
+    append.add_argument("bundle")
+    append.add_argument("responses", help="CSV of answers or model features plus the label column")
+    append.add_argument("--label-column", default=LABEL_COLUMN)
+    append.add_argument("--multiclass", action="store_true", help="labels are the three risk classes")
+    append.add_argument("--no-compact", action="store_true", help="never compact after appending")
+    compact_parser = commands.add_parser("compact", help="fold all delta segments into the base arrays")
+    compact_parser.add_argument("bundle")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.command == "append":
+        classes = _knn_manifest(args.bundle)["classes"]
+        model_frame, labels = read_labelled_rows(args.responses, classes, args.label_column, binary=not args.multiclass)
+        manifest = append_rows(args.bundle, model_frame, labels)
+        if not args.no_compact and needs_compaction(manifest):
+            manifest = compact(args.bundle)
+    else:
+        manifest = compact(args.bundle)
+    print(f"{args.bundle}: version {manifest['version']}, {len(manifest.get('segments', []))} delta segments")
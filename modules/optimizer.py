@@ -0,0 +1,155 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from sklearn.covariance import ledoit_wolf
+
+TRADING_DAYS_PER_YEAR = 252
+
+# Annual volatility each questionnaire / preset risk profile is allowed to take on
+PROFILE_TARGET_VOLATILITY = {
+    "Conservative": 0.06,
+    "Moderate": 0.10,
+    "Balanced": 0.10,
+    "Opportunistic": 0.16,
+    "Aggressive": 0.16,
+}
+
+# Last frontier per asset set, reused as the starting point of the next
+# solve; the least recently used sets are dropped beyond MAX_WARM_STARTS
+MAX_WARM_STARTS = 32
+_warm_starts = OrderedDict()
+_warm_starts_guard = threading.Lock()
+
+
+def estimate_inputs(closes, mean_shrinkage=0.5):
+    """
+    Annualised expected returns and Ledoit-Wolf shrunk covariance from
+    aligned daily closes. Sample means are noisy, so they are pulled
+    `mean_shrinkage` of the way towards their cross-sectional average.
+    """
+    log_returns = np.log(closes / closes.shift(1)).dropna().to_numpy()
+    covariance, _ = ledoit_wolf(log_returns)
+    means = log_returns.mean(axis=0)
+    means = (1 - mean_shrinkage) * means + mean_shrinkage * means.mean()
+    # Arithmetic annual return from the log-return mean and variance
+    mu = np.expm1(means * TRADING_DAYS_PER_YEAR + 0.5 * np.diag(covariance) * TRADING_DAYS_PER_YEAR)
+    return mu, covariance * TRADING_DAYS_PER_YEAR
+
+
+def project_capped_simplex(points, cap):
+    """
+    Euclidean projection of each row onto {w : 0 <= w <= cap, sum(w) = 1}.
+
+    The projection is clip(v - tau, 0, cap) for the tau making the row sum to
+    one. That sum is piecewise linear in tau with kinks at v_i and v_i - cap,
+    so it is evaluated at every kink of every row at once and tau is read off
+    by interpolating inside the bracketing segment.
+    """
+    n = points.shape[1]
+    kinks = np.concatenate([points - cap, points], axis=1)
+    order = np.argsort(kinks, axis=1)
+    kinks = np.take_along_axis(kinks, order, axis=1)
+    # Passing v_i - cap puts w_i on its slope, passing v_i takes it off again
+    slope_change = np.where(order < n, -1.0, 1.0)
+    slopes = np.cumsum(slope_change, axis=1)[:, :-1]
+    totals = n * cap + np.concatenate(
+        [np.zeros((len(points), 1)), np.cumsum(slopes * np.diff(kinks, axis=1), axis=1)], axis=1
+    )
+    rows = np.arange(len(points))
+    # totals fall from n * cap >= 1 at the first kink to 0 at the last
+    j = np.minimum((totals >= 1.0).sum(axis=1) - 1, kinks.shape[1] - 2)
+    low, high = kinks[rows, j], kinks[rows, j + 1]
+    fraction = (totals[rows, j] - 1.0) / np.maximum(totals[rows, j] - totals[rows, j + 1], 1e-300)
+    tau = low + fraction * (high - low)
+    return np.clip(points - tau[:, None], 0.0, cap)
+
+
+def solve_frontier(mu, covariance, max_weight=1.0, risk_aversions=None, initial_weights=None, max_iterations=2000, tolerance=1e-8):
+    """
+    Long-only, weight-capped mean-variance portfolios maximising
+    w.mu - (lambda / 2) w'Cw for a grid of risk aversions, solved together as
+    one batch with accelerated projected gradient (FISTA).
+
+    Returns a (len(risk_aversions), n_assets) weight array.
+    """
+    n = len(mu)
+    max_weight = max(max_weight, 1.0 / n)
+    if risk_aversions is None:
+        risk_aversions = np.geomspace(0.5, 200, 40)
+    lambdas = np.asarray(risk_aversions, dtype=float)[:, None]
+
+    if initial_weights is None or initial_weights.shape != (len(lambdas), n):
+        initial_weights = np.full((len(lambdas), n), 1.0 / n)
+    weights = project_capped_simplex(initial_weights, max_weight)
+
+    # Lipschitz constant of each row's gradient gives its step size
+    step = 1.0 / (lambdas * np.linalg.eigvalsh(covariance)[-1])
+    momentum_point = weights.copy()
+    t = np.ones((len(lambdas), 1))
+    for _ in range(max_iterations):
+        gradient = mu[None, :] - lambdas * (momentum_point @ covariance)
+        new_weights = project_capped_simplex(momentum_point + step * gradient, max_weight)
+        change = new_weights - weights
+        if np.abs(change).max() < tolerance:
+            weights = new_weights
+            break
+        # Adaptive restart: drop the momentum of rows where it stopped helping
+        restart = np.sum((momentum_point - new_weights) * change, axis=1, keepdims=True) > 0
+        t = np.where(restart, 1.0, t)
+        t_next = 0.5 * (1 + np.sqrt(1 + 4 * t * t))
+        momentum_point = new_weights + ((t - 1) / t_next) * change
+        weights, t = new_weights, t_next
+    return weights
+
+
+def efficient_frontier(closes, max_weight=0.4, risk_aversions=None):
+    """
+    Frontier portfolios for the columns of `closes`, warm-started from the
+    previous solve over the same assets and cap.
+
+    Returns a dict with the tickers, per-portfolio weights, expected returns
+    and volatilities (sorted by volatility), plus the estimated inputs.
+    """
+    tickers = tuple(closes.columns)
+    mu, covariance = estimate_inputs(closes)
+    key = (tickers, round(max_weight, 4))
+    with _warm_starts_guard:
+        warm_start = _warm_starts.get(key)
+    weights = solve_frontier(mu, covariance, max_weight, risk_aversions, warm_start)
+    with _warm_starts_guard:
+        _warm_starts[key] = weights
+        _warm_starts.move_to_end(key)
+        while len(_warm_starts) > MAX_WARM_STARTS:
+            _warm_starts.popitem(last=False)
+
+    returns = weights @ mu
+    volatilities = np.sqrt(np.einsum("ki,ij,kj->k", weights, covariance, weights))
+    order = np.argsort(volatilities)
+    return {
+        "tickers": list(tickers),
+        "weights": weights[order],
+        "returns": returns[order],
+        "volatilities": volatilities[order],
+        "mu": mu,
+        "covariance": covariance,
+    }
+
+
+def allocation_for_profile(frontier, profile):
+    """
+    Highest-return frontier portfolio within the profile's volatility budget,
+    or the minimum-volatility portfolio when none fits.
+    """
+    target = next(
+        (vol for name, vol in PROFILE_TARGET_VOLATILITY.items() if name.lower() in str(profile).lower()),
+        PROFILE_TARGET_VOLATILITY["Moderate"],
+    )
+    within = np.flatnonzero(frontier["volatilities"] <= target)
+    index = within[np.argmax(frontier["returns"][within])] if len(within) else 0
+    return {
+        "target_volatility": target,
+        "weights": pd.Series(frontier["weights"][index], index=frontier["tickers"]),
+        "expected_return": frontier["returns"][index],
+        "volatility": frontier["volatilities"][index],
+    }
@@ -4,6 +4,15 @@ import pandas as pd
 import plotly.graph_objects as go
 import numpy_financial as npf
 import os
+from .market_data import fetch_many, align_closes
+from .optimizer import efficient_frontier, allocation_for_profile
+from .stress import PROXY_TICKERS, CASH_ANNUAL_RATE, proxy_monthly_returns, run_stress_tests
+from .backtest import run_backtest
+from .simulation import REBALANCING_POLICIES, simulate_allocation
+from .generators import RETURN_GENERATORS
+from .inflation import IRISH_HICP_AR1
+from .universe import load_universe
+from .fx import histories_to_eur, ticker_currency
 
 # --- Data Loading and Helper Functions ---
 def load_salary_data():
@@ -107,6 +116,82 @@ def simulate_portfolio_with_deemed_disposal(
         'tax_rate': tax_rate
     }
 
+def show_etf_optimizer(preset):
+    """Efficient frontier over a chosen set of UCITS ETFs and the allocation matching the user's risk profile"""
+    st.header("Optimised ETF Allocation")
+    universe = load_universe()
+    columns = universe["columns"]
+    ucits = columns["ucits"] == "Yes"
+    names_by_ticker = dict(zip(columns["ticker"][ucits], columns["name"][ucits]))
+    tickers = st.multiselect(
+        "ETFs to allocate across:",
+        list(names_by_ticker.keys()),
+        default=[t for t in ["IWDA.L", "IS3N.DE", "VEUR.AS", "VAGF.DE", "IEAC.AS", "XEON.DE"] if t in names_by_ticker],
+        format_func=lambda t: f"{t} - {names_by_ticker[t]}",
+        key="optimizer_tickers_input",
+    )
+    if len(tickers) < 2:
+        st.info("Select at least two ETFs to build an allocation.")
+        return
+
+    profiles = ["Conservative", "Balanced", "Aggressive"]
+    quiz_profile = st.session_state.get("risk_profile", "")
+    default_profile = next((p for p, q in zip(profiles, ["Conservative", "Moderate", "Opportunistic"]) if q in quiz_profile), preset)
+    col1, col2 = st.columns(2)
+    with col1:
+        profile = st.selectbox("Risk profile:", profiles, index=profiles.index(default_profile), key="optimizer_profile_input")
+    with col2:
+        max_weight = st.slider("Maximum weight per ETF (%)", 10, 100, 40, step=5, key="optimizer_max_weight_input") / 100
+
+    histories = fetch_many(tickers, "5y")
+    histories, fx_errors = histories_to_eur(
+        {t: h for t, h in histories.items() if not h.empty}, lambda t: ticker_currency(t, universe)
+    )
+    for error in fx_errors.values():
+        st.warning(f"Left out: {error}")
+    closes = align_closes(histories)
+    if closes.shape[1] < 2 or len(closes) < 252:
+        st.warning("Not enough overlapping price history for these ETFs.")
+        return
+
+    frontier = efficient_frontier(closes, max_weight)
+    target = allocation_for_profile(frontier, profile)
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=frontier["volatilities"], y=frontier["returns"], mode="lines+markers", name="Efficient Frontier",
+        line=dict(color="#0068c9"), marker=dict(size=5),
+    ))
+    asset_vols = np.sqrt(np.diag(frontier["covariance"]))
+    fig.add_trace(go.Scatter(
+        x=asset_vols, y=frontier["mu"], mode="markers+text", name="Individual ETFs",
+        text=frontier["tickers"], textposition="top center", marker=dict(color="gray", size=8),
+    ))
+    fig.add_trace(go.Scatter(
+        x=[target["volatility"]], y=[target["expected_return"]], mode="markers", name=f"{profile} Allocation",
+        marker=dict(color="#ff8c00", size=14, symbol="star"),
+    ))
+    fig.update_layout(
+        xaxis_title="Expected Volatility (Annualized)", yaxis_title="Expected Return (Annualized)",
+        xaxis_tickformat=".0%", yaxis_tickformat=".0%", template="plotly_white", height=450,
+        legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5),
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    weights = target["weights"][target["weights"] > 0.001].sort_values(ascending=False)
+    st.markdown(
+        f"For a **{profile}** profile (target volatility **{target['target_volatility']:.0%}**), the suggested allocation "
+        f"has an expected return of **{target['expected_return']:.1%}** with volatility of **{target['volatility']:.1%}**."
+    )
+    st.dataframe(pd.DataFrame({
+        "ETF": [names_by_ticker[t] for t in weights.index],
+        "Weight": [f"{w:.1%}" for w in weights],
+    }, index=weights.index), use_container_width=True)
+    st.caption(
+        f"Based on daily returns from {closes.index[0]:%b %Y} to {closes.index[-1]:%b %Y}, with a shrunk covariance "
+        "estimate and expected returns pulled towards their average. Past performance is not a guarantee of future results."
+    )
+
 # --- Main Streamlit App Logic ---
 def run(session):
     fd = session.form_data
@@ -202,6 +287,19 @@ def run(session):
         "cash": st.session_state.cash_slider / 100
     }
 
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        policy_label = st.selectbox("Rebalancing", list(REBALANCING_POLICIES.keys()), key="rebalancing_policy_input")
+    with col2:
+        band = st.slider("Rebalancing band (± %)", 1, 20, 5, key="rebalancing_band_input",
+                         disabled=REBALANCING_POLICIES[policy_label] != "threshold") / 100
+    with col3:
+        transaction_cost = st.number_input("Trading cost (% of amount traded)", 0.0, 2.0, 0.1, step=0.05, key="transaction_cost_input") / 100
+    generator_label = st.selectbox(
+        "Market model", list(RETURN_GENERATORS.keys()), key="portfolio_generator_input",
+        help="How monthly returns are drawn: normal, with fatter tails, with calm and crisis periods, or with volatility clustering.",
+    )
+
     returns = {
         "equity": (0.1, 0.15),
         "bonds": (0.05, 0.05),
@@ -219,37 +317,22 @@ def run(session):
             avg_growth = np.mean(growth_rates)
 
     runs = 1000
-    final_values = []
-    all_paths = []
-    
-    inflation_rate = 0.02
-    inflation_monthly = (1 + inflation_rate) ** (1 / 12) - 1
+    percentiles = [10, 50, 90]
 
-    for _ in range(runs):
-        balance = pension_balance
-        curr_income = income
-        monthly_balances = []
-        for month in range(months_to_retire):
-            yearly_return = sum([
-                np.random.normal(returns[asset][0], returns[asset][1]) * allocation[asset]
-                for asset in allocation
-            ])
-            monthly_return = (1 + yearly_return) ** (1 / 12) - 1
-            
-            if month % 12 == 0 and month > 0:
-                curr_income *= (1 + avg_growth)
-            
-            monthly_contribution = (curr_income * contribution_rate) / 12
-            
-            balance = (balance + monthly_contribution) * (1 + monthly_return)
-            balance /= (1 + inflation_monthly)
-            monthly_balances.append(balance)
-        final_values.append(balance)
-        all_paths.append(monthly_balances)
+    # Deterministic target rate for the cash-only comparison; the simulation draws its own
+    inflation_rate = IRISH_HICP_AR1["target"]
+    inflation_monthly = (1 + inflation_rate) ** (1 / 12) - 1
 
-    all_paths = np.array(all_paths)
-    percentiles = [10, 50, 90]
-    percentile_paths = {p: np.percentile(all_paths, p, axis=0) for p in percentiles}
+    # Salary grows once a year; contributions are a fixed share of it
+    month_index = np.arange(months_to_retire)
+    monthly_contributions = income * (1 + avg_growth) ** (month_index // 12) * contribution_rate / 12
+    simulation = simulate_allocation(
+        allocation, returns, pension_balance, monthly_contributions, runs=runs,
+        policy=REBALANCING_POLICIES[policy_label], band=band, transaction_cost=transaction_cost,
+        percentiles=percentiles, generator=RETURN_GENERATORS[generator_label],
+    )
+    final_values = simulation["final_real"]
+    percentile_paths = simulation["real_percentiles"]
     
     left_col, right_col = st.columns(2)
 
@@ -259,7 +342,7 @@ def run(session):
             """
             <p style="color: #666; font-size: 15px; margin-top: -10px;">
                 Simulated growth of your portfolio under different market scenarios (10th, 50th, and 90th percentiles),
-                adjusted for inflation.
+                adjusted for inflation, which is simulated alongside the markets. The grey line is the median before inflation.
             </p>
             """,
             unsafe_allow_html=True,
@@ -285,9 +368,17 @@ def run(session):
                 name=f"{p}th Percentile",
                 line=dict(color=colors[p], dash="solid" if p == 50 else "dot")
             ))
+        nominal_median = simulation["nominal_percentiles"][50]
+        fig.add_trace(go.Scatter(
+            x=chart_df["Month"],
+            y=nominal_median,
+            mode="lines",
+            name="Median (nominal)",
+            line=dict(color="gray", dash="dash")
+        ))
 
         min_y = min(chart_df[[f"{p}th Percentile (€)" for p in percentiles]].min())
-        max_y = max(chart_df[[f"{p}th Percentile (€)" for p in percentiles]].max())
+        max_y = max(max(chart_df[[f"{p}th Percentile (€)" for p in percentiles]].max()), nominal_median.max())
         y_padding = (max_y - min_y) * 0.1
 
         fig.update_layout(
@@ -301,6 +392,10 @@ def run(session):
         )
 
         st.plotly_chart(fig, use_container_width=True)
+        st.caption(
+            f"{policy_label}: average turnover of {np.mean(simulation['annual_turnover']):.1%} a year, "
+            f"median trading costs of €{np.median(simulation['trading_costs']):,.0f} in total (nominal)."
+        )
 
     with right_col:
         st.subheader("What This Means For You")     
@@ -368,6 +463,99 @@ def run(session):
     
     st.divider()
 
+    st.header("Stress Test: Your Mix Through Past Crises")
+    st.markdown(
+        """
+        <p style="color: #666; font-size: 15px; margin-top: -10px;">
+            How your current balance and monthly contributions, split across your chosen mix, would have fared
+            through real market crises. Drawdown and recovery ignore contributions; values include them.
+        </p>
+        """,
+        unsafe_allow_html=True,
+    )
+    proxy_returns = proxy_monthly_returns()
+    stress_summary, stress_paths = run_stress_tests(allocation, pension_balance, income * contribution_rate / 12, asset_returns=proxy_returns)
+    if stress_summary.empty:
+        st.warning("Historical data for the stress test is currently unavailable.")
+    else:
+        fig = go.Figure()
+        for name, path in stress_paths.items():
+            fig.add_trace(go.Scatter(x=path.index, y=path.values, mode="lines", name=name))
+        fig.update_layout(
+            xaxis_title="Months from Start of Crisis",
+            yaxis_title="Portfolio Value (€)",
+            template="plotly_white",
+            hovermode="x unified",
+            height=450,
+            legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5)
+        )
+        st.plotly_chart(fig, use_container_width=True)
+        st.dataframe(stress_summary.style.format({
+            "Max Drawdown": "{:.1%}",
+            "Months to Recover": lambda m: "Not yet recovered" if pd.isna(m) else f"{m:.0f}",
+            "Lowest Value": "€{:,.0f}",
+            "Final Value": "€{:,.0f}",
+            "Total Invested": "€{:,.0f}",
+        }), use_container_width=True)
+        st.caption(
+            f"Asset classes are represented by {', '.join(f'{t} ({a})' for a, t in PROXY_TICKERS.items())} "
+            f"converted to euros, with cash at {CASH_ANNUAL_RATE:.0%} a year, rebalanced monthly. Returns are nominal."
+        )
+
+    st.divider()
+
+    st.header("Backtest: Every Historical Start Date")
+    st.markdown(
+        """
+        <p style="color: #666; font-size: 15px; margin-top: -10px;">
+            Instead of simulated markets, this replays your plan from every month in the proxy funds' history,
+            showing the spread of real outcomes you could have had depending on when you started.
+        </p>
+        """,
+        unsafe_allow_html=True,
+    )
+    max_horizon_years = len(proxy_returns) // 12 - 1
+    if max_horizon_years < 1:
+        st.warning("Historical data for the backtest is currently unavailable.")
+    else:
+        if max_horizon_years == 1:
+            # st.slider needs min < max; the history only fits a one-year window
+            horizon_years = 1
+            st.caption("The proxy funds' history only covers a one-year investment horizon.")
+        else:
+            horizon_years = st.slider(
+                "Investment horizon (years)", 1, max_horizon_years,
+                max(1, min(years_to_retire, 10, max_horizon_years)), key="backtest_horizon_input"
+            )
+        backtest = run_backtest(allocation, pension_balance, income * contribution_rate / 12, horizon_years * 12, asset_returns=proxy_returns)
+        outcomes = backtest["outcomes"]
+
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=outcomes.index, y=outcomes.values, mode="lines", name="Final Value", line=dict(color="royalblue")))
+        fig.add_hline(y=backtest["total_invested"], line_dash="dot", line_color="gray", annotation_text="Total Invested")
+        fig.update_layout(
+            xaxis_title="Start Month",
+            yaxis_title=f"Value after {horizon_years} Years (€)",
+            template="plotly_white",
+            hovermode="x unified",
+            height=400,
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+        percentiles = backtest["percentiles"]
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Worst Start", f"€{backtest['worst_value']:,.0f}", f"{backtest['worst_start']:%b %Y}", delta_color="off")
+        col2.metric("10th Percentile", f"€{percentiles[10]:,.0f}")
+        col3.metric("Median", f"€{percentiles[50]:,.0f}")
+        col4.metric("Best Start", f"€{backtest['best_value']:,.0f}", f"{backtest['best_start']:%b %Y}", delta_color="off")
+        st.caption(
+            f"{len(outcomes)} start months from {outcomes.index[0]:%b %Y} to {outcomes.index[-1]:%b %Y}; "
+            f"{backtest['loss_share']:.0%} of them ended below the €{backtest['total_invested']:,.0f} invested. "
+            "Nominal euro returns of the proxy funds, rebalanced monthly, without salary growth."
+        )
+
+    st.divider()
+
     st.header("Deep Dive: How Different Assets Perform")
     st.markdown(
         """
@@ -580,6 +768,9 @@ def run(session):
         
     st.divider()
 
+    show_etf_optimizer(preset)
+    st.divider()
+
     # The CSS is updated to apply a larger font size to the entire container
     st.markdown("""
         <style>
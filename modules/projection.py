@@ -0,0 +1,227 @@
+import os
+import zlib
+import streamlit as st
+import numpy as np
+from .generators import draw_shocks
+
+TRADING_DAYS_PER_YEAR = 252
+TRADING_DAYS_PER_MONTH = 21
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+HORIZON_TABLE_DIR = os.path.join(current_dir, '..', 'Assets', 'cache', 'projections')
+
+
+def estimate_gbm_parameters(data):
+    """
+    Annualised drift and volatility of daily closing prices, or (None, None)
+    when there is not enough valid history to fit them.
+    """
+    if data.empty or "Close" not in data.columns or len(data) < 2:
+        return None, None
+    returns = data["Close"].pct_change().dropna()
+    if returns.empty:
+        return None, None
+
+    mean = returns.mean()
+    std = returns.std()
+    if mean is None or np.isnan(mean) or std is None or np.isnan(std):
+        return None, None
+
+    mu = mean * TRADING_DAYS_PER_YEAR  # annual drift
+    sigma = std * np.sqrt(TRADING_DAYS_PER_YEAR)  # annual volatility
+    return mu, sigma
+
+
+def simulate_log_paths(mu, sigma, steps, sims, rng=None):
+    """
+    Cumulative daily log-returns of a GBM, shape (steps + 1, sims).
+
+    Row 0 is zero (the last observed price); every step is drawn in one
+    call and accumulated with a cumulative sum instead of a per-day loop.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    dt = 1 / TRADING_DAYS_PER_YEAR
+
+    log_paths = np.empty((steps + 1, sims))
+    log_paths[0] = 0.0
+    increments = log_paths[1:]
+    increments[:] = rng.standard_normal((steps, sims))
+    increments *= sigma * np.sqrt(dt)
+    increments += (mu - 0.5 * sigma**2) * dt
+    np.cumsum(increments, axis=0, out=increments)
+    return log_paths
+
+
+def sample_horizon_log_returns(mu, sigma, horizon_steps, sims, rng=None):
+    """
+    Terminal log-returns at each horizon (in trading days), shape (len(horizon_steps), sims).
+
+    GBM increments over disjoint intervals are independent normals, so only
+    one draw per horizon is needed; chaining them keeps the horizons of a
+    single simulated path consistent with each other.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    steps = np.asarray(horizon_steps, dtype=float)
+    gaps = np.diff(steps, prepend=0.0)[:, None] / TRADING_DAYS_PER_YEAR
+
+    log_returns = rng.standard_normal((len(steps), sims))
+    log_returns *= sigma * np.sqrt(gaps)
+    log_returns += (mu - 0.5 * sigma**2) * gaps
+    np.cumsum(log_returns, axis=0, out=log_returns)
+    return log_returns
+
+
+def sample_monthly_log_returns(mu, sigma, months, sims, rng=None, generator="normal"):
+    """
+    Cumulative log-returns at each month end, shape (months, sims), with the
+    monthly shocks taken from a return generator (see generators.py). The
+    drift keeps the GBM convexity term, so only the distribution of the
+    shocks around it changes.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    dt = TRADING_DAYS_PER_MONTH / TRADING_DAYS_PER_YEAR
+    log_returns = draw_shocks(generator, rng, months, sims)[..., 0]
+    log_returns *= sigma * np.sqrt(dt)
+    log_returns += (mu - 0.5 * sigma**2) * dt
+    np.cumsum(log_returns, axis=0, out=log_returns)
+    return log_returns
+
+
+def project_returns(data, horizons_months, sims=1000, with_paths=False, rng=None, generator="normal"):
+    """
+    Simulates every projection horizon from one pass over the longest one.
+
+    Returns (price_paths, projected_returns) where projected_returns maps each
+    horizon in months to the simulated % change from the last close. Price
+    paths (steps + 1, sims) are only built when with_paths is set; otherwise
+    terminal values are sampled in closed form. Other generators than
+    "normal" are simulated month by month and do not provide daily paths.
+    Returns (None, None) when the history cannot support a simulation.
+    """
+    mu, sigma = estimate_gbm_parameters(data)
+    if mu is None:
+        return None, None
+
+    horizons = sorted({int(m) for m in horizons_months if int(m * TRADING_DAYS_PER_MONTH) > 0})
+    if not horizons:
+        return None, None
+    horizon_steps = [m * TRADING_DAYS_PER_MONTH for m in horizons]
+
+    price_paths = None
+    if generator != "normal":
+        if with_paths:
+            raise ValueError("daily price paths are only simulated for the normal generator")
+        monthly_log_returns = sample_monthly_log_returns(mu, sigma, horizons[-1], sims, rng, generator)
+        terminal_log_returns = monthly_log_returns[np.array(horizons) - 1]
+    elif with_paths:
+        log_paths = simulate_log_paths(mu, sigma, horizon_steps[-1], sims, rng)
+        terminal_log_returns = log_paths[horizon_steps]
+        price_paths = data["Close"].iloc[-1] * np.exp(log_paths)
+    else:
+        terminal_log_returns = sample_horizon_log_returns(mu, sigma, horizon_steps, sims, rng)
+
+    projected_returns = {
+        months: np.expm1(row) for months, row in zip(horizons, terminal_log_returns)
+    }
+    return price_paths, projected_returns
+
+
+def compute_horizon_returns(ticker, last_bar, data, max_months=120, sims=1000, generator="normal"):
+    """
+    Projected returns for every whole-month horizon up to max_months. The seed
+    is derived from the ticker and last bar, so a given ticker shows the same
+    projections until new data arrives, wherever they were computed.
+    """
+    seed = zlib.crc32(f"{ticker}|{last_bar}".encode())
+    _, horizon_returns = project_returns(
+        data, range(1, max_months + 1), sims, rng=np.random.default_rng(seed), generator=generator
+    )
+    return horizon_returns
+
+
+def _horizon_table_path(ticker):
+    return os.path.join(HORIZON_TABLE_DIR, f"{ticker.replace('/', '_')}.npz")
+
+
+def save_horizon_table(ticker, last_bar, horizon_returns):
+    """Persists a horizon table (as float32) for pages to read instead of simulating."""
+    os.makedirs(HORIZON_TABLE_DIR, exist_ok=True)
+    path = _horizon_table_path(ticker)
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    months = np.array(sorted(horizon_returns), dtype=np.int64)
+    np.savez(
+        tmp_path,
+        last_bar=np.array(str(last_bar)),
+        months=months,
+        returns=np.stack([horizon_returns[m] for m in months]).astype(np.float32),
+    )
+    os.replace(tmp_path, path)
+
+
+def load_horizon_table(ticker, last_bar):
+    """The persisted horizon table for this exact last bar, or None if missing or stale."""
+    path = _horizon_table_path(ticker)
+    if not os.path.exists(path):
+        return None
+    with np.load(path, allow_pickle=False) as saved:
+        if str(saved["last_bar"]) != str(last_bar):
+            return None
+        return {int(m): row.astype(float) for m, row in zip(saved["months"], saved["returns"])}
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_horizon_returns(ticker, last_bar, _data, max_months=120, sims=1000, generator="normal"):
+    """
+    compute_horizon_returns for the page: the table precomputed by the
+    background refresher (normal generator only) when it matches the last
+    bar, otherwise simulated on the spot. Memoised per ticker, last bar and
+    generator either way.
+    """
+    horizon_returns = load_horizon_table(ticker, last_bar) if generator == "normal" else None
+    if horizon_returns is None or max(horizon_returns) < max_months:
+        horizon_returns = compute_horizon_returns(ticker, last_bar, _data, max_months, sims, generator)
+    return horizon_returns
+
+
+def simulate_monthly_installments(data, months, monthly_amount, sims=1000, percentiles=(5, 50, 95), rng=None, generator="normal"):
+    """
+    Dollar-cost averaging along each simulated path.
+
+    A fixed amount is invested at the start of every month and buys units at
+    that path's simulated price, so the final value reflects the timing of
+    every purchase rather than a single averaged rate. Only month-end prices
+    are drawn, giving a (months, sims) array. Returns None when the history
+    cannot support a simulation.
+    """
+    mu, sigma = estimate_gbm_parameters(data)
+    if mu is None or months < 1:
+        return None
+
+    if generator == "normal":
+        horizon_steps = [m * TRADING_DAYS_PER_MONTH for m in range(1, months + 1)]
+        log_prices = sample_horizon_log_returns(mu, sigma, horizon_steps, sims, rng)
+    else:
+        log_prices = sample_monthly_log_returns(mu, sigma, months, sims, rng, generator)
+
+    # Units bought per euro: 1 at today's price, then one purchase per later month start
+    units_per_euro = 1.0 + np.exp(-log_prices[:-1]).sum(axis=0)
+    final_values = monthly_amount * units_per_euro * np.exp(log_prices[-1])
+
+    return {
+        "final_values": final_values,
+        "percentiles": {p: np.percentile(final_values, p) for p in percentiles},
+        "total_invested": monthly_amount * months,
+    }
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_monthly_installments(ticker, last_bar, _data, months, monthly_amount, sims=1000, generator="normal"):
+    """
+    simulate_monthly_installments for the page, seeded from the ticker and
+    last bar like compute_horizon_returns and memoised, so the figures stay
+    put across reruns until new data arrives.
+    """
+    seed = zlib.crc32(f"{ticker}|{last_bar}|dca".encode())
+    return simulate_monthly_installments(
+        _data, months, monthly_amount, sims, rng=np.random.default_rng(seed), generator=generator
+    )
@@ -4,6 +4,9 @@ import pandas as pd
 import os
 import plotly.graph_objs as go
 import streamlit.components.v1 as components
+from .inflation import shock_cholesky, correlated_shocks, initial_inflation, step_inflation, period_price_factor
+from .generators import RETURN_GENERATORS, shock_steps
+from .simulation import annual_returns_from_shocks
 
 
 def load_salary_data():
@@ -165,6 +168,10 @@ def run(session):
 
     elif session.rp_step == 8:
         st.header("Simulation Result")
+        generator_label = st.selectbox(
+            "Market model", list(RETURN_GENERATORS.keys()), key="retirement_generator_input",
+            help="How yearly returns are drawn: normal, with fatter tails, with calm and crisis periods, or with volatility clustering.",
+        )
 
         # Inputs
         age = fd["age"]
@@ -190,7 +197,6 @@ def run(session):
             "cash": (0.02, 0.01)
         }
         
-        inflation = 0.02
         state_pension = 13800
         state_pension_growth = 0.0433
         state_projected_pension = state_pension * ((1 + state_pension_growth) ** years)
@@ -205,42 +211,43 @@ def run(session):
                 growth_rates = np.diff(values) / values[:-1]
                 avg_growth = np.mean(growth_rates)
 
-        results_real = []
         yearly_balances = np.zeros((runs, years + 1))
         yearly_incomes = np.zeros((runs, years + 1))
 
-        for run in range(runs):
-            curr_income = income
-            curr_balance = balance
-            cumulative_inflation = 1.0
-            
-            yearly_balances[run, 0] = curr_balance
-            yearly_incomes[run, 0] = 0
-            
-            for year in range(years):
-                
-                roi = sum([
-                    np.random.normal(returns[asset][0], returns[asset][1]) * allocation[asset]
-                    for asset in allocation
-                ])
-                
-                curr_income *= (1 + avg_growth)
-                contribution = contribution_rate * curr_income
-                curr_balance = (curr_balance + contribution) * (1 + roi)
-                cumulative_inflation *= (1 + inflation)
-                yearly_balances[run, year + 1] = curr_balance / cumulative_inflation
-                state_pension_age = 66
-                if retirement_age >= state_pension_age:
-                     yearly_incomes[run, year + 1] = (
-                     (curr_balance / cumulative_inflation) * 0.04 +
-                     (state_projected_pension / cumulative_inflation if year + 1 == years else 0)
-                 )
-                else:
-                     yearly_incomes[run, year + 1] = (curr_balance / cumulative_inflation) * 0.04
-            final_real = curr_balance / cumulative_inflation
-            withdrawal_income = final_real * 0.04
-            total_income = withdrawal_income + (state_projected_pension / cumulative_inflation)
-            results_real.append(total_income)
+        # All runs advance together, one year per step; inflation is drawn
+        # jointly with the asset shocks instead of a fixed rate
+        rng = np.random.default_rng()
+        assets = list(allocation)
+        weights = np.array([allocation[asset] for asset in assets])
+        means = np.array([returns[asset][0] for asset in assets])
+        stds = np.array([returns[asset][1] for asset in assets])
+        cholesky = shock_cholesky(assets)
+        asset_shocks = shock_steps(RETURN_GENERATORS[generator_label], rng, years, runs, len(assets), periods_per_year=1)
+
+        curr_income = income
+        curr_balance = np.full(runs, float(balance))
+        inflation_rates = initial_inflation(runs)
+        cumulative_inflation = np.ones(runs)
+        yearly_balances[:, 0] = curr_balance
+        state_pension_age = 66
+
+        for year, year_shocks in enumerate(asset_shocks):
+            shocks = correlated_shocks(rng, runs, cholesky, year_shocks)
+            roi = annual_returns_from_shocks(means, stds, shocks[:, :-1]) @ weights
+
+            curr_income *= (1 + avg_growth)
+            contribution = contribution_rate * curr_income
+            curr_balance = (curr_balance + contribution) * (1 + roi)
+            inflation_rates = step_inflation(inflation_rates, shocks[:, -1], periods_per_year=1)
+            cumulative_inflation *= period_price_factor(inflation_rates, periods_per_year=1)
+            yearly_balances[:, year + 1] = curr_balance / cumulative_inflation
+            yearly_incomes[:, year + 1] = (curr_balance / cumulative_inflation) * 0.04
+            if retirement_age >= state_pension_age and year + 1 == years:
+                yearly_incomes[:, year + 1] += state_projected_pension / cumulative_inflation
+
+        final_real = curr_balance / cumulative_inflation
+        withdrawal_income = final_real * 0.04
+        results_real = withdrawal_income + (state_projected_pension / cumulative_inflation)
                                                  
         mean_balances = yearly_balances.mean(axis=0)
         mean_incomes = yearly_incomes.mean(axis=0)
@@ -255,7 +262,8 @@ def run(session):
         expected_monthly_income = np.mean(results_real) / 12
 
         st.info(
-            f"At Retirement (age {retirement_age}), your total retirement savings is: **€{mean_balances[-1]:,.0f}**"
+            f"At Retirement (age {retirement_age}), your total retirement savings is: **€{mean_balances[-1]:,.0f}** in today's money "
+            f"(about **€{np.mean(curr_balance):,.0f}** in future euros)"
             )
 
         # ----------- Year-on-Year Graph -----------
@@ -1,10 +1,11 @@
 import streamlit as st
 import random
 import os
-import pickle
 import pandas as pd
 import numpy as np
 import warnings
+from .model_registry import ModelUnavailableError, get_risk_model
+from .risk_inference import MODEL_FEATURES, predict_one
 warnings.filterwarnings('ignore')
 
 
@@ -23,6 +24,10 @@ def initialize_risk_session_state():
         st.session_state.risk_profile = ""
     if 'model_confidence' not in st.session_state:
         st.session_state.model_confidence = 0.0
+    if 'model_version' not in st.session_state:
+        st.session_state.model_version = ""
+    if 'risk_neighbours' not in st.session_state:
+        st.session_state.risk_neighbours = None
 
 # ========================================
 # QUESTIONNAIRE QUESTIONS
@@ -143,110 +148,98 @@ questions = [
     }
 ]
 
+# Answer key -> (model feature, answer-to-model value mapping). Values
+# missing from a mapping pass through unchanged.
+ANSWER_FEATURES = {
+    'age': ('age_bucket', {
+        "18-24": "18-24",
+        "25-34": "25-34",
+        "35-44": "35-44",
+        "45-54": "45-54",
+        "55-65": "55-64",  # Fix this mismatch
+        "65+": "65+"
+    }),
+    'income': ('income_bucket', {
+        "Less than €30,000": "<30,000",
+        "€30,000–€50,000": "30,000-50,000",
+        "€50,000–€70,000": "50,000-70,000",
+        "More than €70,000": ">70,000"
+    }),
+    'gender': ('gender', {
+        "Male": "Male",
+        "Female": "Female",
+        "Other/prefer not to say": "Other"
+    }),
+    'employment': ('occupation', {
+        "Salaried": "Salaried",
+        "Self-Employed": "Self-Employed",
+        "Student": "Student",
+        "Unemployed / Other": "Unemployed"
+    }),
+    'education': ('education_level', {}),
+    'marital_status': ('marital_status', {}),
+    'insurance': ('has_insurance', {}),
+    'financial_goal': ('financial_goal', {}),
+    'investment_timeline': ('time_horizon', {}),
+    'market_reaction': ('reaction_to_loss', {}),
+    'risk_attitude': ('risk_attitude', {}),
+    'financial_knowledge': ('financial_knowledge_level', {}),
+    'saving_frequency': ('saving_frequency', {}),
+    'investment_frequency': ('investment_frequency', {}),
+}
+
+# Features the questionnaire does not ask about, fixed at typical values
+DEFAULT_MODEL_FEATURES = {
+    'credit_score': 650,
+    'job_tenure': 3,
+    'loan_purpose': 'Personal',
+    'payment_history': 'Good',
+    'debt_to_income_ratio': 0.3,
+}
+
 def map_user_answers_to_model_format(user_answers):
     """
     Transform user-friendly answers to the format expected by the ML model
     """
     model_data = {}
     
-    # 1. AGE MAPPING
-    if 'age' in user_answers:
-        age_mapping = {
-            "18-24": "18-24",
-            "25-34": "25-34", 
-            "35-44": "35-44",
-            "45-54": "45-54",
-            "55-65": "55-64",  # Fix this mismatch
-            "65+": "65+"
-        }
-        model_data['age_bucket'] = age_mapping.get(user_answers['age'], user_answers['age'])
-    
-    # 2. INCOME MAPPING
-    if 'income' in user_answers:
-        income_mapping = {
-            "Less than €30,000": "<30,000",
-            "€30,000–€50,000": "30,000-50,000", 
-            "€50,000–€70,000": "50,000-70,000",
-            "More than €70,000": ">70,000"
-        }
-        model_data['income_bucket'] = income_mapping.get(user_answers['income'], user_answers['income'])
-    
-    # 3. GENDER MAPPING
-    if 'gender' in user_answers:
-        gender_mapping = {
-            "Male": "Male",
-            "Female": "Female",
-            "Other/prefer not to say": "Other"
-        }
-        model_data['gender'] = gender_mapping.get(user_answers['gender'], user_answers['gender'])
-    
-    # 4. EMPLOYMENT MAPPING
-    if 'employment' in user_answers:
-        employment_mapping = {
-            "Salaried": "Salaried",
-            "Self-Employed": "Self-Employed", 
-            "Student": "Student",
-            "Unemployed / Other": "Unemployed"
-        }
-        model_data['occupation'] = employment_mapping.get(user_answers['employment'], user_answers['employment'])
+    for answer_key, (feature, mapping) in ANSWER_FEATURES.items():
+        if answer_key in user_answers:
+            model_data[feature] = mapping.get(user_answers[answer_key], user_answers[answer_key])
     
-    # 5. EDUCATION MAPPING
-    if 'education' in user_answers:
-        model_data['education_level'] = user_answers['education']
-    
-    # 6. MARITAL STATUS
-    if 'marital_status' in user_answers:
-        model_data['marital_status'] = user_answers['marital_status']
-    
-    # 7. DEPENDENTS MAPPING
+    # DEPENDENTS AND LOAN ARE NUMERIC
     if 'dependents' in user_answers:
         model_data['number_of_dependents'] = int(user_answers['dependents'])
-    
-    # 8. INSURANCE MAPPING
-    if 'insurance' in user_answers:
-        model_data['has_insurance'] = user_answers['insurance']
-    
-    # 9. LOAN MAPPING
     if 'loan_repayment' in user_answers:
         model_data['has_loan'] = 1 if user_answers['loan_repayment'] == 'Yes' else 0
     
-    # 10. FINANCIAL GOAL
-    if 'financial_goal' in user_answers:
-        model_data['financial_goal'] = user_answers['financial_goal']
-    
-    # 11. INVESTMENT TIMELINE MAPPING
-    if 'investment_timeline' in user_answers:
-        model_data['time_horizon'] = user_answers['investment_timeline']
-    
-    # 12. MARKET REACTION MAPPING
-    if 'market_reaction' in user_answers:
-        model_data['reaction_to_loss'] = user_answers['market_reaction']
-    
-    # 13. RISK ATTITUDE
-    if 'risk_attitude' in user_answers:
-        model_data['risk_attitude'] = user_answers['risk_attitude']
-    
-    # 14. FINANCIAL KNOWLEDGE MAPPING
-    if 'financial_knowledge' in user_answers:
-        model_data['financial_knowledge_level'] = user_answers['financial_knowledge']
-    
-    # 15. SAVING FREQUENCY
-    if 'saving_frequency' in user_answers:
-        model_data['saving_frequency'] = user_answers['saving_frequency']
-    
-    # 16. INVESTMENT FREQUENCY
-    if 'investment_frequency' in user_answers:
-        model_data['investment_frequency'] = user_answers['investment_frequency']
-    
     # ADD MISSING FEATURES WITH DEFAULTS
-    model_data['credit_score'] = 650
-    model_data['job_tenure'] = 3
-    model_data['loan_purpose'] = 'Personal'
-    model_data['payment_history'] = 'Good'
-    model_data['debt_to_income_ratio'] = 0.3
+    model_data.update(DEFAULT_MODEL_FEATURES)
     
     return model_data
 
+def map_answer_frame_to_model_format(answers):
+    """
+    Column-wise map_user_answers_to_model_format for a DataFrame with one
+    questionnaire per row. Empty cells count as unanswered; the result has
+    the model's feature columns with unanswered features set to 0, as the
+    single-row path does.
+    """
+    model_frame = pd.DataFrame(index=answers.index)
+    for answer_key, (feature, mapping) in ANSWER_FEATURES.items():
+        if answer_key in answers:
+            column = answers[answer_key]
+            model_frame[feature] = column.map(mapping).where(lambda mapped: mapped.notna(), column) if mapping else column
+    
+    if 'dependents' in answers:
+        model_frame['number_of_dependents'] = pd.to_numeric(answers['dependents']).fillna(0).astype(int)
+    if 'loan_repayment' in answers:
+        model_frame['has_loan'] = (answers['loan_repayment'] == 'Yes').astype(int)
+    for feature, value in DEFAULT_MODEL_FEATURES.items():
+        model_frame[feature] = value
+    
+    return model_frame.reindex(columns=MODEL_FEATURES).fillna(0)
+
 # ========================================
 # APP SCREENS
 # ========================================
@@ -285,6 +278,10 @@ def show_start_screen(session):
     
 
 def show_quiz(session):
+    # Errors from the last submission survive the rerun that follows it
+    if st.session_state.get('risk_error'):
+        st.error(st.session_state.pop('risk_error'))
+
     if st.session_state.current_question < len(questions):
         current_q = questions[st.session_state.current_question]
         
@@ -350,67 +347,62 @@ def show_quiz(session):
                 # Store the answer
                 st.session_state.answers[current_q["key"]] = answer
                 if st.session_state.current_question + 1 >= len(questions):
-                    # Quiz completed - process results
-                    process_results()
-                    st.session_state.risk_page = 'results'
+                    # Quiz completed - process results, staying on the quiz if no profile could be predicted
+                    if process_results():
+                        st.session_state.risk_page = 'results'
                 else:
                     st.session_state.current_question += 1
                 st.rerun()
         
         
 
+def profile_label(prediction, n_classes):
+    """Display name of a predicted class for a 2- or 3-class model."""
+    if n_classes == 2:
+        # Binary classification: 0 = Conservative, 1 = Opportunistic
+        risk_mapping = {0: "Conservative Investor", 1: "Opportunistic Investor"}
+    else:
+        # Multi-class: 0 = Conservative, 1 = Moderate, 2 = Opportunistic
+        risk_mapping = {0: "Conservative Investor", 1: "Moderate Investor", 2: "Opportunistic Investor"}
+    return risk_mapping.get(prediction, "Conservative Investor")
+
 def process_results():
-    """Process the quiz results using backend mapping"""
+    """
+    Process the quiz results using backend mapping. Returns True when a
+    profile was predicted; on failure the error is shown and the previous
+    profile is left untouched rather than defaulting to Conservative.
+    """
     try:
         # Transform user answers to model format
         model_ready_data = map_user_answers_to_model_format(st.session_state.answers)
         
-        # Create DataFrame with exact features model expects
-        model_features = [
-            'age_bucket', 'income_bucket', 'gender', 'occupation', 'education_level',
-            'marital_status', 'has_loan', 'credit_score', 'job_tenure', 'number_of_dependents',
-            'loan_purpose', 'payment_history', 'debt_to_income_ratio', 'reaction_to_loss',
-            'financial_knowledge_level', 'saving_frequency', 'investment_frequency',
-            'has_insurance', 'financial_goal', 'time_horizon'
-        ]
-        
-        # Create input data
-        input_data = {}
-        for feature in model_features:
-            input_data[feature] = [model_ready_data.get(feature, 0)]
-        
-        df_input = pd.DataFrame(input_data)
+        # Shared, already-loaded model from the process-wide registry
+        model_entry = get_risk_model()
         
-        # Load model and predict
-        with open("final_pipeline_trained_on_real_data_knn.pkl", "rb") as f:
-            pipeline = pickle.load(f)
-        
-        prediction_num = pipeline.predict(df_input)[0]
-        probabilities = pipeline.predict_proba(df_input)[0]
+        # Compiled NumPy path; falls back to the pipeline on a one-row frame.
+        # KNN models also return the neighbours behind the vote, from the same search
+        classes, probabilities, neighbours = predict_one(model_entry, model_ready_data, explain=True)
+        prediction_num = classes[np.argmax(probabilities)]
         confidence = probabilities.max()
         
-        # Check if model has 2 or 3 classes
-        if len(probabilities) == 2:
-            # Binary classification: 0 = Conservative, 1 = Opportunistic
-            risk_mapping = {0: "Conservative Investor", 1: "Opportunistic Investor"}
-        else:
-            # Multi-class: 0 = Conservative, 1 = Moderate, 2 = Opportunistic  
-            risk_mapping = {0: "Conservative Investor", 1: "Moderate Investor", 2: "Opportunistic Investor"}
-        
-        prediction_text = risk_mapping.get(prediction_num, "Conservative Investor")
+        prediction_text = profile_label(prediction_num, len(probabilities))
         
         st.session_state.risk_profile = prediction_text
         st.session_state.model_confidence = confidence
+        st.session_state.model_version = model_entry["version"]
+        st.session_state.risk_neighbours = [
+            {**neighbour, "profile_label": profile_label(neighbour["label"], len(probabilities))}
+            for neighbour in neighbours
+        ] if neighbours else None
+        return True
         
-    except FileNotFoundError:
-        st.error("❌ Model file not found!")
-        st.session_state.risk_profile = "Conservative Investor"
-        st.session_state.model_confidence = 0.5
+    except ModelUnavailableError as e:
+        st.session_state.risk_error = f"❌ The risk model is unavailable: {e}"
+        return False
         
     except Exception as e:
-        st.error(f"❌ Error: {str(e)}")
-        st.session_state.risk_profile = "Conservative Investor"
-        st.session_state.model_confidence = 0.5
+        st.session_state.risk_error = f"❌ Error: {str(e)}"
+        return False
 
 def show_results(session):
     risk_profile = st.session_state.risk_profile
@@ -465,6 +457,25 @@ def show_results(session):
             if key in st.session_state.answers:
                 st.write(f"• **{display_name}**: {st.session_state.answers[key]}")
 
+        neighbours = st.session_state.get('risk_neighbours')
+        if neighbours:
+            agreeing = sum(n["profile_label"] == risk_profile for n in neighbours)
+            st.write(f"It compared you with the {len(neighbours)} most similar investors it learned from; "
+                     f"{agreeing} of them have the same profile:")
+            table = pd.DataFrame([
+                {"Profile": n["profile_label"], "Distance": round(n["distance"], 2), **n["profile"]}
+                for n in neighbours
+            ])
+            st.dataframe(table, hide_index=True, use_container_width=True)
+
+            # Mean squared difference per feature across the neighbours
+            contributions = pd.DataFrame([n["contributions"] for n in neighbours]).mean()
+            if contributions.sum() > 0:
+                st.write("Where your answers differ most from theirs:")
+                shares = (contributions / contributions.sum()).sort_values(ascending=False).head(5)
+                for feature, share in shares.items():
+                    st.write(f"• **{feature.replace('_', ' ').capitalize()}**: {share:.0%} of the distance")
+
 # ========================================
 # MAIN APP LOGIC
 # ========================================
@@ -0,0 +1,524 @@
+import threading
+import numpy as np
+import pandas as pd
+
+# Columns of the frame the fitted pipeline was trained on, in order
+MODEL_FEATURES = [
+    'age_bucket', 'income_bucket', 'gender', 'occupation', 'education_level',
+    'marital_status', 'has_loan', 'credit_score', 'job_tenure', 'number_of_dependents',
+    'loan_purpose', 'payment_history', 'debt_to_income_ratio', 'reaction_to_loss',
+    'financial_knowledge_level', 'saving_frequency', 'investment_frequency',
+    'has_insurance', 'financial_goal', 'time_horizon'
+]
+
+# Relative gap between the k-th and (k+1)-th neighbour distance below which
+# the neighbour set depends on rounding, so the pipeline decides instead
+TIE_TOLERANCE = 1e-9
+
+# Batch KNN scoring builds (queries x training rows) distance matrices of at
+# most this many cells (8 MB of float64) at a time
+QUERY_BLOCK_CELLS = 1 << 20
+
+# Relative slack (of the squared norms involved) within which a row's
+# matrix-product distance may sit past a query's k-th and still be rescored
+# exactly, far wider than the rounding of the |x|^2 - 2 x.q + |q|^2 expansion
+CANDIDATE_MARGIN = 1e-9
+
+
+class UnsupportedPipelineError(ValueError):
+    """The pipeline uses a step the compiled path does not reproduce exactly."""
+
+
+def _key(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _compile_transformer(transformer, columns, offset, compiled):
+    """Appends one ColumnTransformer part to the tables; returns its output width."""
+    if transformer == "drop":
+        return 0
+    if transformer == "passthrough":
+        for i, column in enumerate(columns):
+            compiled["numeric"].append((column, offset + i, 0.0, 1.0))
+        return len(columns)
+    if hasattr(transformer, "steps"):
+        steps = [step for _, step in transformer.steps if step not in (None, "passthrough")]
+        if len(steps) != 1:
+            raise UnsupportedPipelineError("nested pipelines must hold a single transformer")
+        return _compile_transformer(steps[0], columns, offset, compiled)
+
+    name = type(transformer).__name__
+    if name == "OneHotEncoder":
+        if getattr(transformer, "drop_idx_", None) is not None or getattr(transformer, "_infrequent_enabled", False):
+            raise UnsupportedPipelineError("OneHotEncoder with drop or infrequent categories")
+        if transformer.handle_unknown == "error":
+            raise UnsupportedPipelineError("OneHotEncoder with handle_unknown='error'")
+        width = 0
+        for column, categories in zip(columns, transformer.categories_):
+            compiled["onehot"][column] = {_key(c): offset + width + i for i, c in enumerate(categories)}
+            width += len(categories)
+        return width
+    if name == "StandardScaler":
+        means = transformer.mean_ if transformer.with_mean else np.zeros(len(columns))
+        scales = transformer.scale_ if transformer.with_std else np.ones(len(columns))
+        for i, column in enumerate(columns):
+            compiled["numeric"].append((column, offset + i, float(means[i]), float(scales[i])))
+        return len(columns)
+    raise UnsupportedPipelineError(f"unsupported transformer {name}")
+
+
+def _compile_estimator(estimator):
+    name = type(estimator).__name__
+    if name == "KNeighborsClassifier":
+        if estimator.effective_metric_ != "euclidean" or callable(estimator.weights):
+            raise UnsupportedPipelineError("only euclidean KNN with uniform or distance weights")
+        fit_X = estimator._fit_X
+        fit_X = np.asarray(fit_X.toarray() if hasattr(fit_X, "toarray") else fit_X, dtype=np.float64)
+        return {
+            "kind": "knn",
+            "fit_X": fit_X,
+            "fit_sq_norms": np.einsum("ij,ij->i", fit_X, fit_X),
+            # sklearn stores the training labels as indices into classes_
+            "labels": np.asarray(estimator._y).ravel(),
+            "classes": estimator.classes_,
+            "k": estimator.n_neighbors,
+            "weights": estimator.weights,
+            "estimator": estimator,
+        }
+    if name == "LogisticRegression":
+        return {
+            "kind": "linear",
+            "coef": estimator.coef_.astype(np.float64),
+            "intercept": estimator.intercept_.astype(np.float64),
+            "classes": estimator.classes_,
+        }
+    raise UnsupportedPipelineError(f"unsupported estimator {name}")
+
+
+def compile_pipeline(pipeline):
+    """
+    Extracts lookup tables from a fitted (sklearn or imblearn) pipeline of
+    a ColumnTransformer with one-hot and standard-scaled parts followed by a
+    KNN or logistic regression classifier. Resampling steps such as SMOTE
+    only act during fit and are skipped.
+
+    The result maps each categorical (feature, value) to its one-hot column
+    and each numeric feature to (column, mean, scale), so a row is encoded
+    with a handful of dictionary lookups into a zero vector.
+    """
+    steps = [step for _, step in getattr(pipeline, "steps", [("model", pipeline)])
+             if step not in (None, "passthrough") and not hasattr(step, "fit_resample")]
+    *transformers, estimator = steps
+    compiled = {"onehot": {}, "numeric": [], "width": 0}
+    if len(transformers) > 1:
+        raise UnsupportedPipelineError("expected a single ColumnTransformer before the classifier")
+    if transformers:
+        column_transformer = transformers[0]
+        if not hasattr(column_transformer, "transformers_"):
+            raise UnsupportedPipelineError(f"unsupported step {type(column_transformer).__name__}")
+        names_in = list(getattr(column_transformer, "feature_names_in_", MODEL_FEATURES))
+        for _, transformer, columns in column_transformer.transformers_:
+            columns = [names_in[c] if isinstance(c, (int, np.integer)) else c for c in np.atleast_1d(columns)]
+            compiled["width"] += _compile_transformer(transformer, columns, compiled["width"], compiled)
+    else:
+        compiled["numeric"] = [(f, i, 0.0, 1.0) for i, f in enumerate(MODEL_FEATURES)]
+        compiled["width"] = len(MODEL_FEATURES)
+    compiled["model"] = _compile_estimator(estimator)
+    return compiled
+
+
+def encode_row(compiled, model_data):
+    """The pipeline's transformed vector for one answer dict (missing features count as 0)."""
+    vector = np.zeros(compiled["width"])
+    for feature, lookup in compiled["onehot"].items():
+        column = lookup.get(_key(model_data.get(feature, 0)))
+        if column is not None:
+            vector[column] = 1.0
+    for feature, column, mean, scale in compiled["numeric"]:
+        vector[column] = (float(model_data.get(feature, 0)) - mean) / scale
+    return vector
+
+
+def encode_frame(compiled, frame):
+    """encode_row for every row of a model-format frame, shape (rows, width)."""
+    hot, queries = _index_queries(compiled, frame)
+    matrix = np.zeros((len(frame), compiled["width"]))
+    for columns in hot.T:
+        known = columns >= 0
+        matrix[np.flatnonzero(known), columns[known]] = 1.0
+    for i, (_, column, _, _) in enumerate(compiled["numeric"]):
+        matrix[:, column] = queries[:, i]
+    return matrix
+
+
+def _knn_proba(model, vector):
+    # Same expansion as sklearn's euclidean_distances; the constant |x|^2 is added back for the weights
+    sq_distances = model["fit_sq_norms"] - 2.0 * (model["fit_X"] @ vector) + vector @ vector
+    k = model["k"]
+    if k < len(sq_distances):
+        nearest = np.argpartition(sq_distances, k)[:k + 1]
+        ordered = nearest[np.argsort(sq_distances[nearest])]
+        kth, next_ = sq_distances[ordered[k - 1]], sq_distances[ordered[k]]
+        if next_ - kth <= TIE_TOLERANCE * max(abs(kth), 1.0):
+            # Which tied rows sklearn keeps depends on its search internals, so
+            # take its neighbours (the same single query its predict_proba makes)
+            distances, nearest = model["estimator"].kneighbors(vector[None, :])
+            distances, nearest = distances[0], nearest[0]
+            return _vote(model, model["labels"][nearest], distances), nearest, distances
+        nearest = ordered[:k]
+    else:
+        nearest = np.argsort(sq_distances)
+    distances = np.sqrt(np.maximum(sq_distances[nearest], 0.0))
+    return _vote(model, model["labels"][nearest], distances), nearest, distances
+
+
+def _segment_sq_distances(segment, hot, query):
+    hot_sum = segment["onehot_block"][:, hot].sum(axis=1, dtype=np.float64)
+    numeric_diff = segment["numeric_block"] - query
+    return segment["onehot_sq_norms"] - 2.0 * hot_sum + len(hot) + np.einsum("ij,ij->i", numeric_diff, numeric_diff)
+
+
+def _approx_sq_distances(columns, sq_norms, hot, queries):
+    """
+    Squared distances from a block of queries to every row of a segment,
+    shape (queries, rows), by the |x|^2 - 2 x.q + |q|^2 expansion: one
+    matrix product, off from _segment_sq_distances by rounding. `columns` is
+    the segment's one-hot and numeric blocks stacked as (columns, rows) and
+    `sq_norms` their rows' squared norms; `hot` holds each query's one-hot
+    column per feature, -1 for values not seen in training.
+    """
+    n_onehot = len(columns) - queries.shape[1]
+    encoded = np.zeros((len(hot), len(columns)))
+    query, feature = np.nonzero(hot >= 0)
+    encoded[query, hot[query, feature]] = 1.0
+    encoded[:, n_onehot:] = queries
+    sq_distances = encoded @ columns
+    sq_distances *= -2.0
+    sq_distances += sq_norms
+    sq_distances += np.einsum("ij,ij->i", encoded, encoded)[:, None]
+    return sq_distances
+
+
+def _index_query(compiled, model_data):
+    """The hot one-hot block columns and the scaled numeric vector of one answer dict."""
+    hot = []
+    for feature, lookup in compiled["onehot"].items():
+        column = lookup.get(_key(model_data.get(feature, 0)))
+        if column is not None:
+            hot.append(column)
+    query = np.array([
+        (float(model_data.get(feature, 0)) - mean) / scale for feature, _, mean, scale in compiled["numeric"]
+    ])
+    return hot, query
+
+
+def _index_queries(compiled, frame):
+    """
+    _index_query for every row of a model-format frame: (rows, one-hot
+    features) block columns, -1 where the value was not seen in training,
+    and the (rows, numeric features) scaled numeric values.
+    """
+    hot = np.empty((len(frame), len(compiled["onehot"])), dtype=np.int64)
+    for i, (feature, lookup) in enumerate(compiled["onehot"].items()):
+        values = frame[feature] if feature in frame else pd.Series(0, index=frame.index)
+        codes, uniques = pd.factorize(values)
+        columns = np.array([lookup.get(_key(value), -1) for value in uniques] + [-1], dtype=np.int64)
+        hot[:, i] = columns[codes]
+    queries = np.empty((len(frame), len(compiled["numeric"])))
+    for i, (feature, _, mean, scale) in enumerate(compiled["numeric"]):
+        values = frame[feature].to_numpy(dtype=float) if feature in frame else np.zeros(len(frame))
+        queries[:, i] = (values - mean) / scale
+    return hot, queries
+
+
+def _knn_index_proba(compiled, hot, query):
+    """
+    KNN over an exported bundle. Every row of the one-hot block is compared
+    only on the query's own category columns:
+    |x - q|^2 = |x_onehot|^2 - 2 * sum(x[hot columns]) + len(hot) + |x_num - q_num|^2,
+    which reads len(hot) columns instead of the whole encoded width. The
+    base rows and any appended delta segments are searched together; rows
+    tied at the k-th distance are taken in training (then append) order.
+    """
+    model = compiled["model"]
+    sq_distances = np.concatenate([_segment_sq_distances(segment, hot, query) for segment in model["segments"]])
+
+    k = min(model["k"], len(sq_distances))
+    kth = np.partition(sq_distances, k - 1)[k - 1]
+    closer = np.flatnonzero(sq_distances < kth)
+    tied = np.flatnonzero(sq_distances == kth)[:k - len(closer)]
+    nearest = np.concatenate([closer, tied])
+    nearest = nearest[np.argsort(sq_distances[nearest], kind="stable")]
+    distances = np.sqrt(np.maximum(sq_distances[nearest], 0.0))
+    return _vote(model, model["labels"][nearest], distances), nearest, distances
+
+
+def _candidate_pairs(approx, k, margin):
+    """
+    (query, row) pairs within `margin` of each query's k-th approximate
+    distance: a superset of every query's exact k nearest rows.
+    """
+    kth = np.partition(approx, k - 1, axis=1)[:, k - 1]
+    return np.nonzero(approx <= (kth + margin)[:, None])
+
+
+def _exact_sq_distances(model, query, row, hot, queries):
+    """_segment_sq_distances for (query, row) pairs, row indexing the segments in order."""
+    sq_distances = np.empty(len(row))
+    start = 0
+    for segment in model["segments"]:
+        size = len(segment["onehot_sq_norms"])
+        pairs = np.flatnonzero((row >= start) & (row < start + size))
+        local, q = row[pairs] - start, query[pairs]
+        columns = hot[q]
+        cells = segment["onehot_block"][local[:, None], np.maximum(columns, 0)]
+        hot_sum = np.where(columns >= 0, cells, 0).sum(axis=1, dtype=np.float64)
+        numeric_diff = segment["numeric_block"][local] - queries[q]
+        sq_distances[pairs] = (
+            segment["onehot_sq_norms"][local] - 2.0 * hot_sum + (columns >= 0).sum(axis=1)
+            + np.einsum("ij,ij->i", numeric_diff, numeric_diff)
+        )
+        start += size
+    return sq_distances
+
+
+def _knn_index_proba_frame(compiled, frame):
+    """
+    Class probabilities of every row of a model-format frame from an
+    exported KNN bundle, in blocks of queries. Each block's distances to all
+    rows come from matrix products (_approx_sq_distances); only the rows
+    that may be among a query's k nearest given their rounding are then
+    scored exactly as the row path scores them, and the k nearest of those
+    (ties in row order) vote, so probabilities match predict_proba_compiled.
+    """
+    model = compiled["model"]
+    hot, queries = _index_queries(compiled, frame)
+    segments = []
+    for segment in model["segments"]:
+        numeric_block = segment["numeric_block"]
+        columns = np.vstack([segment["onehot_block"].T, numeric_block.T]).astype(np.float64)
+        segments.append((columns, segment["onehot_sq_norms"] + np.einsum("ij,ij->i", numeric_block, numeric_block)))
+    max_sq_norm = max(sq_norms.max(initial=0.0) for _, sq_norms in segments)
+    n_classes = len(model["classes"])
+    k = min(model["k"], len(model["labels"]))
+    block = max(1, QUERY_BLOCK_CELLS // len(model["labels"]))
+
+    proba = np.empty((len(frame), n_classes))
+    for start in range(0, len(frame), block):
+        rows = slice(start, start + block)
+        approx = np.concatenate([_approx_sq_distances(*segment, hot[rows], queries[rows]) for segment in segments], axis=1)
+        block_queries = queries[rows]
+        query_sq_norms = hot.shape[1] + np.einsum("ij,ij->i", block_queries, block_queries)
+        margin = CANDIDATE_MARGIN * (1.0 + max_sq_norm + query_sq_norms)
+        query, row = _candidate_pairs(approx, k, margin)
+        sq_distances = _exact_sq_distances(model, query, row, hot[rows], block_queries)
+
+        # Each query's candidates nearest first, ties in row order; keep k
+        order = np.lexsort((row, sq_distances, query))
+        query, row, sq_distances = query[order], row[order], sq_distances[order]
+        counts = np.bincount(query, minlength=len(approx))
+        rank = np.arange(len(query)) - np.repeat(np.cumsum(counts) - counts, counts)
+        nearest = rank < k
+        query, row = query[nearest], row[nearest]
+        distances = np.sqrt(np.maximum(sq_distances[nearest], 0.0))
+
+        if model["weights"] == "distance":
+            exact = distances == 0
+            weights = np.divide(1.0, distances, out=np.zeros_like(distances), where=~exact)
+            weights = np.where(np.bincount(query, weights=exact, minlength=len(approx))[query] > 0, exact, weights)
+        else:
+            weights = np.ones(len(query))
+        votes = np.bincount(query * n_classes + model["labels"][row], weights=weights, minlength=len(approx) * n_classes)
+        votes = votes.reshape(len(approx), n_classes)
+        proba[rows] = votes / votes.sum(axis=1, keepdims=True)
+    return proba
+
+
+def _vote(model, class_index, distances):
+    """Class probabilities from the neighbours' class indices, as sklearn weighs them."""
+    if model["weights"] == "distance":
+        if (distances == 0).any():
+            weights = (distances == 0).astype(float)
+        else:
+            weights = 1.0 / distances
+    else:
+        weights = np.ones(len(class_index))
+    proba = np.bincount(class_index, weights=weights, minlength=len(model["classes"]))
+    return proba / proba.sum()
+
+
+def _linear_proba(model, vector):
+    scores = model["coef"] @ vector + model["intercept"]
+    if len(scores) == 1:
+        positive = 1.0 / (1.0 + np.exp(-scores[0]))
+        return np.array([1.0 - positive, positive])
+    scores = np.exp(scores - scores.max())
+    return scores / scores.sum()
+
+
+def _linear_proba_frame(model, matrix):
+    """_linear_proba for every row of an encoded matrix."""
+    scores = matrix @ model["coef"].T + model["intercept"]
+    if scores.shape[1] == 1:
+        positive = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+        return np.column_stack([1.0 - positive, positive])
+    scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+    return scores / scores.sum(axis=1, keepdims=True)
+
+
+def _feature_layout(compiled, numeric_offset):
+    """
+    Per feature, its encoded columns and how to decode them, plus a
+    (columns x features) indicator that sums squared differences per feature.
+    """
+    features = []
+    for feature, lookup in compiled["onehot"].items():
+        features.append((feature, np.array(list(lookup.values()), dtype=int), list(lookup), None))
+    for feature, column, mean, scale in compiled["numeric"]:
+        features.append((feature, np.array([numeric_offset + column]), None, (mean, scale)))
+    width = numeric_offset + len(compiled["numeric"]) if compiled["model"]["kind"] == "knn_index" else compiled["width"]
+    indicator = np.zeros((width, len(features)))
+    for i, (_, columns, _, _) in enumerate(features):
+        indicator[columns, i] = 1.0
+    return features, indicator
+
+
+def _explain(compiled, nearest, rows, query, labels, distances):
+    """
+    The neighbours behind a KNN prediction: each one's training row, label,
+    distance, decoded profile and per-feature contribution to its squared
+    distance (the squared differences summed over the feature's columns).
+    """
+    if "layout" not in compiled:
+        numeric_offset = rows.shape[1] - len(compiled["numeric"]) if compiled["model"]["kind"] == "knn_index" else 0
+        compiled["layout"] = _feature_layout(compiled, numeric_offset)
+    features, indicator = compiled["layout"]
+    contributions = ((rows - query) ** 2) @ indicator
+
+    neighbours = []
+    for index, row, label, distance, contribution in zip(nearest, rows, labels, distances, contributions):
+        profile = {}
+        for feature, columns, values, scaling in features:
+            if scaling is not None:
+                profile[feature] = float(row[columns[0]] * scaling[1] + scaling[0])
+            else:
+                cells = row[columns]
+                profile[feature] = values[int(cells.argmax())] if len(cells) and cells.max() > 0 else None
+        neighbours.append({
+            "row": int(index),
+            "label": _key(label),
+            "distance": float(distance),
+            "profile": profile,
+            "contributions": {feature: float(c) for (feature, _, _, _), c in zip(features, contribution)},
+        })
+    return neighbours
+
+
+def _bundle_rows(model, nearest):
+    """Encoded rows (one-hot block then numeric block) of global neighbour indices across segments."""
+    sizes = [len(segment["onehot_sq_norms"]) for segment in model["segments"]]
+    starts = np.cumsum([0] + sizes[:-1])
+    rows = []
+    for index in nearest:
+        segment_index = int(np.searchsorted(starts, index, side="right")) - 1
+        segment, local = model["segments"][segment_index], index - starts[segment_index]
+        rows.append(np.concatenate([segment["onehot_block"][local].astype(np.float64), segment["numeric_block"][local]]))
+    return np.array(rows)
+
+
+def predict_compiled(compiled, model_data, explain=False):
+    """
+    (probabilities, neighbours) for one answer dict. For KNN models with
+    `explain`, neighbours lists the k nearest training profiles from the
+    same search that produced the probabilities; otherwise it is None.
+    """
+    model = compiled["model"]
+    if model["kind"] == "knn_index":
+        hot, query = _index_query(compiled, model_data)
+        proba, nearest, distances = _knn_index_proba(compiled, hot, query)
+        if not explain:
+            return proba, None
+        onehot_query = np.zeros(model["segments"][0]["onehot_block"].shape[1])
+        onehot_query[hot] = 1.0
+        rows = _bundle_rows(model, nearest)
+        labels = model["classes"][model["labels"][nearest]]
+        return proba, _explain(compiled, nearest, rows, np.concatenate([onehot_query, query]), labels, distances)
+
+    vector = encode_row(compiled, model_data)
+    if model["kind"] == "knn":
+        proba, nearest, distances = _knn_proba(model, vector)
+        if not explain:
+            return proba, None
+        labels = model["classes"][model["labels"][nearest]]
+        return proba, _explain(compiled, nearest, model["fit_X"][nearest], vector, labels, distances)
+    return _linear_proba(model, vector), None
+
+
+def predict_proba_compiled(compiled, model_data):
+    """Class probabilities for one answer dict from the compiled tables."""
+    return predict_compiled(compiled, model_data)[0]
+
+
+_compiled_cache = {}
+_compiled_lock = threading.Lock()
+
+
+def compiled_model_for(model_entry):
+    """
+    The compiled tables for a registry entry, built once per artifact
+    checksum (exported bundles already hold them); None when the pipeline
+    has steps the compiled path does not cover.
+    """
+    if model_entry.get("format") == "bundle":
+        return model_entry["model"]
+    key = model_entry["sha256"]
+    if key not in _compiled_cache:
+        with _compiled_lock:
+            if key not in _compiled_cache:
+                try:
+                    _compiled_cache[key] = compile_pipeline(model_entry["model"])
+                except (UnsupportedPipelineError, AttributeError, ValueError):
+                    _compiled_cache[key] = None
+    return _compiled_cache[key]
+
+
+def model_frame(rows):
+    """DataFrame in the pipeline's column order from model-format dicts, missing features as 0."""
+    return pd.DataFrame([{f: row.get(f, 0) for f in MODEL_FEATURES} for row in rows], columns=MODEL_FEATURES)
+
+
+def predict_one(model_entry, model_data, explain=False):
+    """
+    (classes, probabilities, neighbours) for one answer dict: the compiled
+    tables when they apply, otherwise the pipeline itself on a one-row frame
+    (without neighbours).
+    """
+    compiled = compiled_model_for(model_entry)
+    if compiled is not None:
+        proba, neighbours = predict_compiled(compiled, model_data, explain)
+        return compiled["model"]["classes"], proba, neighbours
+    pipeline = model_entry["model"]
+    return pipeline.classes_, pipeline.predict_proba(model_frame([model_data]))[0], None
+
+
+def predict_proba_one(model_entry, model_data):
+    """(classes, probabilities) for one answer dict."""
+    classes, proba, _ = predict_one(model_entry, model_data)
+    return classes, proba
+
+
+def predict_proba_frame(model_entry, frame):
+    """
+    (classes, probabilities) for a frame of model-format rows: one
+    predict_proba call on a pickled pipeline; for an exported bundle (which
+    has no pipeline to call) a blocked KNN search, or one matrix product
+    for a linear model.
+    """
+    if model_entry.get("format") == "bundle":
+        compiled = model_entry["model"]
+        model = compiled["model"]
+        if model["kind"] == "knn_index":
+            return model["classes"], _knn_index_proba_frame(compiled, frame[MODEL_FEATURES])
+        return model["classes"], _linear_proba_frame(model, encode_frame(compiled, frame[MODEL_FEATURES]))
+    pipeline = model_entry["model"]
+    return pipeline.classes_, pipeline.predict_proba(frame[MODEL_FEATURES])
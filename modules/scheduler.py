@@ -0,0 +1,138 @@
+import argparse
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+from .market_data import fetch_history, fetch_info
+from .fx import BASE_CURRENCY, FX_TICKERS, FxUnavailableError, fx_ticker, major_currency, to_eur, ticker_currency, eur_key
+from .metric_state import refresh_metric_state
+from .stress import PROXY_TICKERS
+from .projection import compute_horizon_returns, save_horizon_table
+from .universe import load_universe, compute_metrics_table, save_metrics_table
+
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL_SECONDS = 6 * 60 * 60
+REFRESH_JITTER_SECONDS = 10 * 60
+REFRESH_CONCURRENCY = 4
+MAX_ATTEMPTS = 4
+BACKOFF_BASE_SECONDS = 5
+
+# Benchmarks and stress-test proxies read by the pages on top of the ETF universe
+EXTRA_TICKERS = ["SPY", *PROXY_TICKERS.values()]
+
+
+def with_backoff(task, *args, attempts=MAX_ATTEMPTS, base_delay=BACKOFF_BASE_SECONDS):
+    """Runs task(*args), retrying failures with jittered exponential backoff."""
+    for attempt in range(attempts):
+        try:
+            return task(*args)
+        except Exception as e:
+            if attempt == attempts - 1:
+                raise
+            delay = base_delay * 2**attempt * random.uniform(0.5, 1.5)
+            logger.warning("Refresh of %s failed (%s); retrying in %.0fs", args, e, delay)
+            time.sleep(delay)
+
+
+def refresh_ticker(ticker):
+    """
+    Downloads a fresh history, then precomputes everything the ETF pages
+    derive from its euro-converted history. Expects the FX series to have
+    been refreshed first.
+    """
+    # Failed downloads raise (leaving the cached copy in place) so with_backoff retries
+    history = fetch_history(ticker, "max", max_age=0, stale_ok=False)
+    try:
+        eur_history = to_eur(history, ticker_currency(ticker, load_universe()))
+    except FxUnavailableError as e:
+        logger.warning("Skipping euro metrics for %s: %s", ticker, e)
+        return history
+    if eur_history.empty:
+        return history
+    refresh_metric_state(eur_key(ticker), eur_history)
+    last_bar = eur_history.index[-1]
+    horizon_returns = compute_horizon_returns(eur_key(ticker), last_bar, eur_history)
+    if horizon_returns is not None:
+        save_horizon_table(eur_key(ticker), last_bar, horizon_returns)
+    return history
+
+
+def refresh_all(tickers=None, concurrency=REFRESH_CONCURRENCY):
+    """
+    One refresh round over the configured universe on a bounded pool, then a
+    rebuild of the universe metrics table from whatever succeeded. FX series
+    go first since every conversion in the round reads them.
+    """
+    universe = load_universe()
+    majors = {major_currency(c) for c in universe["columns"]["currency"]} - {BASE_CURRENCY}
+    for pair in sorted(set(FX_TICKERS.values()) | {fx_ticker(m) for m in majors}):
+        try:
+            with_backoff(fetch_history, pair, "max", 0, False)
+        except Exception as e:
+            logger.error("Giving up on %s: %s", pair, e)
+    tickers = tickers or universe["columns"]["ticker"].tolist() + EXTRA_TICKERS
+    tickers = list(dict.fromkeys(tickers))
+
+    def job(ticker):
+        # Spread requests out so a round does not hit the provider in one burst
+        time.sleep(random.uniform(0, 2))
+        # Retried on its own, not inside refresh_ticker's retries, so a bad info endpoint costs MAX_ATTEMPTS calls
+        try:
+            with_backoff(fetch_info, ticker, 0, False)
+        except Exception as e:
+            logger.warning("Keeping the cached info for %s: %s", ticker, e)
+        try:
+            return ticker, with_backoff(refresh_ticker, ticker)
+        except Exception as e:
+            logger.error("Giving up on %s: %s", ticker, e)
+            return ticker, None
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        histories = {t: h for t, h in pool.map(job, tickers) if h is not None}
+
+    save_metrics_table(universe, compute_metrics_table(universe, histories))
+    logger.info("Refreshed %d of %d tickers", len(histories), len(tickers))
+    return histories
+
+
+def run_forever(interval=REFRESH_INTERVAL_SECONDS, jitter=REFRESH_JITTER_SECONDS, stop_event=None):
+    """Refreshes on a fixed interval plus random jitter until stop_event is set."""
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        try:
+            refresh_all()
+        except Exception:
+            logger.exception("Refresh round failed")
+        stop_event.wait(interval + random.uniform(0, jitter))
+
+
+@st.cache_resource(show_spinner=False)
+def start_background_refresh(interval=REFRESH_INTERVAL_SECONDS):
+    """
+    Starts the refresher as a daemon thread, once per Streamlit process.
+    Deployments running the separate worker (python -m modules.scheduler)
+    can leave this out; pages read the same cache either way.
+    """
+    stop_event = threading.Event()
+    thread = threading.Thread(
+        target=run_forever, kwargs={"interval": interval, "stop_event": stop_event},
+        name="market-data-refresh", daemon=True,
+    )
+    thread.start()
+    return stop_event
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh cached market data and derived ETF metrics.")
+    parser.add_argument("--once", action="store_true", help="run a single refresh round and exit")
+    parser.add_argument("--interval", type=float, default=REFRESH_INTERVAL_SECONDS, help="seconds between rounds")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.once:
+        refresh_all()
+    else:
+        run_forever(interval=args.interval)
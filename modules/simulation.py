@@ -0,0 +1,136 @@
+import numpy as np
+from .inflation import IRISH_HICP_AR1, shock_cholesky, correlated_shocks, initial_inflation, step_inflation, period_price_factor
+from .generators import shock_steps
+
+REBALANCING_POLICIES = {
+    "Annual rebalance": "calendar",
+    "Threshold bands": "threshold",
+    "Contributions only": "contributions",
+}
+
+
+def annual_returns_from_shocks(means, stds, shocks):
+    """
+    Annual returns mean + std * shock per path and asset. Fat-tailed draws
+    can fall below -100%, which would wipe out more than the holding (and
+    has no monthly root), so losses are capped at 99% as for inflation.
+    """
+    return np.maximum(means + stds * shocks, -0.99)
+
+
+def monthly_returns_from_shocks(means, stds, shocks):
+    """
+    One month of returns for every path and asset, shape (runs, assets).
+    Each asset draws a capped annual return (annual_returns_from_shocks)
+    and compounds it down to a month in log space, as the original
+    allocation model did.
+    """
+    return np.expm1(np.log1p(annual_returns_from_shocks(means, stds, shocks)) / 12)
+
+
+def _direct_contributions(holdings, targets, contribution):
+    """
+    Splits each path's contribution across the assets that are furthest
+    below target, in proportion to their shortfall, which moves the mix back
+    towards target without selling anything.
+    """
+    totals = holdings.sum(axis=1, keepdims=True) + contribution
+    gaps = np.clip(targets * totals - holdings, 0.0, None)
+    gap_totals = gaps.sum(axis=1, keepdims=True)
+    shares = np.where(gap_totals > 0, gaps / np.where(gap_totals > 0, gap_totals, 1.0), targets)
+    return shares * contribution
+
+
+def simulate_allocation(
+    allocation, returns, initial_balance, contributions, runs=1000, policy="calendar",
+    rebalance_every=12, band=0.05, transaction_cost=0.001, inflation=IRISH_HICP_AR1,
+    percentiles=(10, 50, 90), generator="normal", rng=None,
+):
+    """
+    Monte Carlo of a multi-asset portfolio holding separate balances per
+    asset, so weights drift with returns until the rebalancing policy acts.
+
+    Policies: "calendar" resets every path to target every `rebalance_every`
+    months; "threshold" resets only paths where some weight is more than
+    `band` away from target; "contributions" never sells and steers new
+    money to underweight assets instead. Rebalancing trades pay
+    `transaction_cost` on the amount traded; contributions are invested at
+    no extra cost.
+
+    Inflation follows the AR(1) model in `inflation`, with its shock drawn
+    jointly with the asset shocks, so real outcomes reflect bad inflation
+    and bad markets arriving together. Contributions are nominal. Asset
+    shocks come from the named return generator (see generators.py),
+    drawn month by month.
+
+    `contributions` holds the amount paid in at the start of each month, so
+    its length is the horizon. The loop runs over months only; every step is
+    vectorized over paths and assets. Nominal and real percentiles are taken
+    month by month, so no (runs, months) array of shocks or balances is ever
+    held; the regime generator alone keeps its (months, runs) regime path.
+
+    Returns a dict with nominal and real percentile paths ({p: (months,)}),
+    final nominal and real balances, final per-asset balances, annualized
+    turnover and total trading costs per path.
+    """
+    rng = rng or np.random.default_rng()
+    assets = list(allocation)
+    targets = np.array([allocation[asset] for asset in assets], dtype=float)
+    targets = targets / targets.sum()
+    means = np.array([returns[asset][0] for asset in assets])
+    stds = np.array([returns[asset][1] for asset in assets])
+    cholesky = shock_cholesky(assets)
+    contributions = np.asarray(contributions, dtype=float)
+    months = len(contributions)
+    asset_shocks = shock_steps(generator, rng, months, runs, len(assets))
+
+    holdings = np.tile(initial_balance * targets, (runs, 1))
+    rates = initial_inflation(runs, inflation)
+    price_level = np.ones(runs)
+    nominal_percentiles = np.empty((months, len(percentiles)))
+    real_percentiles = np.empty((months, len(percentiles)))
+    traded = np.zeros(runs)
+    costs = np.zeros(runs)
+    totals = holdings.sum(axis=1)
+
+    for month, month_shocks in enumerate(asset_shocks):
+        if policy == "contributions":
+            holdings += _direct_contributions(holdings, targets, contributions[month])
+        else:
+            holdings += contributions[month] * targets
+        shocks = correlated_shocks(rng, runs, cholesky, month_shocks)
+        holdings *= 1 + monthly_returns_from_shocks(means, stds, shocks[:, :-1])
+        rates = step_inflation(rates, shocks[:, -1], inflation)
+        price_level *= period_price_factor(rates)
+        totals = holdings.sum(axis=1)
+
+        if policy == "calendar":
+            rebalance = np.full(runs, (month + 1) % rebalance_every == 0)
+        elif policy == "threshold":
+            weights = holdings / np.where(totals > 0, totals, 1.0)[:, None]
+            rebalance = np.abs(weights - targets).max(axis=1) > band
+        else:
+            rebalance = np.zeros(runs, dtype=bool)
+
+        if rebalance.any():
+            trades = np.abs(targets * totals[:, None] - holdings).sum(axis=1) * rebalance
+            cost = transaction_cost * trades
+            # One-way turnover: what was sold (equal to what was bought)
+            traded += np.divide(trades / 2, totals, out=np.zeros(runs), where=totals > 0)
+            costs += cost
+            holdings = np.where(rebalance[:, None], targets * (totals - cost)[:, None], holdings)
+            totals = holdings.sum(axis=1)
+
+        nominal_percentiles[month] = np.percentile(totals, percentiles)
+        real_percentiles[month] = np.percentile(totals / price_level, percentiles)
+
+    years = max(months / 12, 1 / 12)
+    return {
+        "nominal_percentiles": dict(zip(percentiles, nominal_percentiles.T)),
+        "real_percentiles": dict(zip(percentiles, real_percentiles.T)),
+        "final_nominal": totals,
+        "final_real": totals / price_level,
+        "final_holdings": dict(zip(assets, holdings.T)),
+        "annual_turnover": traded / years,
+        "trading_costs": costs,
+    }
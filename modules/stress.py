@@ -0,0 +1,146 @@
+import logging
+import numpy as np
+import pandas as pd
+from .market_data import fetch_many, monthly_returns
+from .fx import histories_to_eur, ticker_currency
+
+logger = logging.getLogger(__name__)
+
+# Long-lived US-listed funds standing in for each asset class; both have
+# monthly history back to before the 2008 crisis
+PROXY_TICKERS = {"equity": "SPY", "bonds": "AGG"}
+
+# Cash earns a flat euro deposit rate, the same one the portfolio page uses
+# for its cash-only comparison; a USD money-market fund converted to euros
+# would mostly measure EUR/USD moves
+CASH_ANNUAL_RATE = 0.01
+
+# Each window starts at the pre-crisis peak and runs long enough to show the recovery
+CRISIS_SCENARIOS = {
+    "Global Financial Crisis (2008)": ("2007-10", "2013-12"),
+    "COVID-19 Crash (2020)": ("2020-01", "2021-12"),
+    "Inflation & Rate Shock (2022)": ("2022-01", "2024-12"),
+}
+
+
+def proxy_monthly_returns(proxies=PROXY_TICKERS, cash_rate=CASH_ANNUAL_RATE):
+    """
+    Monthly returns in euros of the proxy funds plus cash, one column per
+    asset class, over the months the converted histories share. Empty if
+    any proxy cannot be converted, since the stress tests need every asset
+    class.
+    """
+    histories = fetch_many(list(proxies.values()), "max")
+    converted, fx_errors = histories_to_eur(histories, ticker_currency)
+    if fx_errors:
+        logger.warning("Proxy histories unavailable in euros: %s", "; ".join(fx_errors.values()))
+        return pd.DataFrame()
+    returns = monthly_returns({asset: converted[ticker] for asset, ticker in proxies.items()})
+    if not returns.empty:
+        returns["cash"] = (1 + cash_rate) ** (1 / 12) - 1
+    return returns
+
+
+def portfolio_returns(asset_returns, allocation):
+    """Monthly returns of an allocation rebalanced back to its weights every month."""
+    weights = np.array([allocation.get(asset, 0.0) for asset in asset_returns.columns])
+    return pd.Series(asset_returns.to_numpy() @ weights, index=asset_returns.index)
+
+
+def scenario_matrix(asset_returns, allocation, scenarios=CRISIS_SCENARIOS):
+    """
+    Monthly returns of the (monthly rebalanced) allocation for every
+    scenario, stacked into one zero-padded (scenarios, months) array.
+
+    Returns the scenario names, the array, each scenario's length and the
+    month-end dates it covers. Scenarios with no data are left out.
+    """
+    portfolio = portfolio_returns(asset_returns, allocation)
+
+    names, windows = [], []
+    for name, (start, end) in scenarios.items():
+        window = portfolio[start:end]
+        if len(window):
+            names.append(name)
+            windows.append(window)
+    if not windows:
+        return [], np.zeros((0, 0)), np.zeros(0, dtype=int), []
+
+    lengths = np.array([len(w) for w in windows])
+    matrix = np.zeros((len(windows), lengths.max()))
+    for i, window in enumerate(windows):
+        matrix[i, :len(window)] = window.to_numpy()
+    return names, matrix, lengths, [w.index for w in windows]
+
+
+def replay(matrix, lengths, initial_balance, monthly_contribution):
+    """
+    Replays every scenario row of `matrix` at once.
+
+    With growth index G_t = prod(1 + r_k) and a contribution paid at the
+    start of each month, the balance has the closed form
+    V_t = G_t * (V_0 + c * sum_{k<t} 1 / G_k), so the whole value path is
+    a cumulative product and a cumulative sum. Drawdown and recovery are
+    measured on G, which contributions do not distort.
+    """
+    n_scenarios, n_months = matrix.shape
+    growth = np.ones((n_scenarios, n_months + 1))
+    growth[:, 1:] = np.cumprod(1 + matrix, axis=1)
+
+    contributed = monthly_contribution * np.cumsum(1 / growth[:, :-1], axis=1)
+    values = np.empty_like(growth)
+    values[:, 0] = initial_balance
+    values[:, 1:] = growth[:, 1:] * (initial_balance + contributed)
+
+    peaks = np.maximum.accumulate(growth, axis=1)
+    drawdowns = growth / peaks - 1
+    troughs = drawdowns.argmin(axis=1)
+    rows = np.arange(n_scenarios)
+    months = np.arange(n_months + 1)
+    recovered = (months >= troughs[:, None]) & (growth >= peaks[rows, troughs][:, None]) & (months <= lengths[:, None])
+    recovered &= drawdowns[rows, troughs][:, None] < 0
+    has_recovered = recovered.any(axis=1)
+    recovery_months = np.where(has_recovered, recovered.argmax(axis=1) - troughs, -1)
+
+    return {
+        "values": values,
+        "growth": growth,
+        "max_drawdown": drawdowns.min(axis=1),
+        "trough_month": troughs,
+        "recovery_months": recovery_months,
+        "final_value": values[rows, lengths],
+        "lowest_value": np.where(months <= lengths[:, None], values, np.inf).min(axis=1),
+        "total_invested": initial_balance + monthly_contribution * lengths,
+    }
+
+
+def run_stress_tests(allocation, initial_balance, monthly_contribution, scenarios=CRISIS_SCENARIOS, asset_returns=None):
+    """
+    Replays an equity/bond/cash allocation through each historical crisis.
+
+    Returns (summary DataFrame indexed by scenario, {scenario: value path
+    Series}); both are empty when no proxy history is available.
+    """
+    if asset_returns is None:
+        asset_returns = proxy_monthly_returns()
+    if asset_returns.empty:
+        return pd.DataFrame(), {}
+    names, matrix, lengths, dates = scenario_matrix(asset_returns, allocation, scenarios)
+    if not names:
+        return pd.DataFrame(), {}
+
+    result = replay(matrix, lengths, initial_balance, monthly_contribution)
+    summary = pd.DataFrame({
+        "Period": [f"{d[0]:%b %Y} - {d[-1]:%b %Y}" for d in dates],
+        "Max Drawdown": result["max_drawdown"],
+        "Months to Trough": result["trough_month"],
+        "Months to Recover": np.where(result["recovery_months"] >= 0, result["recovery_months"], np.nan),
+        "Lowest Value": result["lowest_value"],
+        "Final Value": result["final_value"],
+        "Total Invested": result["total_invested"],
+    }, index=names)
+    paths = {
+        name: pd.Series(result["values"][i, :lengths[i] + 1], index=np.arange(lengths[i] + 1))
+        for i, name in enumerate(names)
+    }
+    return summary, paths
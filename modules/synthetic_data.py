@@ -0,0 +1,253 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+AGE_BINS = [0, 24, 34, 44, 54, 64, 100]
+AGE_LABELS = ['18-24', '25-34', '35-44', '45-54', '55-64', '65+']
+INCOME_BINS = [0, 30000, 50000, 70000, np.inf]
+INCOME_LABELS = ['<30,000', '30,000–50,000', '50,000–70,000', '>70,000']
+
+REACTIONS = ["Sell everything to avoid further losses", "Hold and wait it out", "Invest more while prices are low"]
+KNOWLEDGE_LEVELS = ['Very poor', 'Beginner', 'Intermediate', 'Advanced']
+
+# Columns the notebook perturbs after simulation, and the share of rows shuffled
+FEATURE_NOISE = {
+    'investment_frequency': 0.5,
+    'has_insurance': 0.4,
+    'saving_frequency': 0.5,
+    'time_horizon': 0.5,
+    'financial_goal': 0.4,
+}
+
+# Kaggle columns renamed to the training names, and the exported column order
+KAGGLE_TO_TRAINING = {
+    'Gender': 'gender',
+    'Employment Status': 'occupation',
+    'Education Level': 'education_level',
+    'Marital Status': 'marital_status',
+    'Years at Current Job': 'job_tenure',
+    'Number of Dependents': 'number_of_dependents',
+    'Credit Score': 'credit_score',
+    'Loan Purpose': 'loan_purpose',
+    'Payment History': 'payment_history',
+    'Debt-to-Income Ratio': 'debt_to_income_ratio',
+    'Risk Rating': 'risk_rating',
+}
+TRAINING_COLUMNS = [
+    'age_bucket', 'income_bucket', 'gender', 'occupation', 'education_level', 'marital_status', 'has_loan',
+    'risk_preference', 'reaction_to_loss', 'financial_knowledge_level', 'credit_score', 'job_tenure',
+    'number_of_dependents', 'loan_purpose', 'payment_history', 'debt_to_income_ratio', 'risk_preference_num',
+    'reaction_to_loss_num', 'financial_knowledge_num', 'saving_frequency', 'investment_frequency',
+    'has_insurance', 'financial_goal', 'time_horizon', 'risk_rating', 'risk_rating_num'
+]
+
+# Marginals of the Kaggle financial_risk_assessment.csv the notebook starts
+# from, for generating base rows when that file is not at hand
+KAGGLE_CATEGORIES = {
+    'Gender': (['Male', 'Female', 'Non-binary'], None),
+    'Education Level': (["High School", "Bachelor's", "Master's", "PhD"], None),
+    'Marital Status': (['Single', 'Married', 'Divorced', 'Widowed'], None),
+    'Loan Purpose': (['Business', 'Auto', 'Home', 'Personal'], None),
+    'Employment Status': (['Employed', 'Unemployed', 'Self-employed'], None),
+    'Payment History': (['Excellent', 'Good', 'Fair', 'Poor'], None),
+    'Risk Rating': (['Low', 'Medium', 'High'], [0.6, 0.3, 0.1]),
+}
+KAGGLE_MISSING_SHARE = 0.15  # Income, Credit Score, Loan Amount and Number of Dependents
+
+
+# Columns are built as category codes: drawing and selecting integers and
+# wrapping them once is far cheaper than materialising millions of strings
+
+def _draw(rng, n, options, p=None):
+    return pd.Categorical.from_codes(rng.choice(len(options), size=n, p=p), options)
+
+
+def _select(rng, n, branches, default):
+    """
+    Vectorized form of the notebook's if/elif chains of np.random.choice:
+    `branches` is [(mask, options, probabilities)], earlier branches win and
+    `default` is either a constant or an (options, probabilities) pair.
+    """
+    default_options = list(default[0]) if isinstance(default, tuple) else [default]
+    vocabulary = list(dict.fromkeys([o for _, options, _ in branches for o in options] + default_options))
+    code = {value: i for i, value in enumerate(vocabulary)}
+
+    def draw_codes(options, p):
+        return np.array([code[o] for o in options])[rng.choice(len(options), size=n, p=p)]
+
+    conditions = [mask for mask, _, _ in branches]
+    choices = [draw_codes(options, p) for _, options, p in branches]
+    default_codes = draw_codes(*default) if isinstance(default, tuple) else code[default]
+    return pd.Categorical.from_codes(np.select(conditions, choices, default=default_codes), vocabulary)
+
+
+def bucket_age(ages):
+    return pd.cut(ages, bins=AGE_BINS, labels=AGE_LABELS)
+
+
+def bucket_income(incomes):
+    return pd.cut(incomes, bins=INCOME_BINS, labels=INCOME_LABELS)
+
+
+def sample_kaggle_rows(n, rng):
+    """Base rows with the Kaggle dataset's columns, value ranges and missing values."""
+    df = pd.DataFrame({
+        'Age': rng.integers(18, 70, n),
+        'Income': rng.uniform(20000, 120000, n).round(),
+        'Credit Score': rng.integers(600, 800, n).astype(float),
+        'Loan Amount': rng.uniform(5000, 50000, n).round(),
+        'Years at Current Job': rng.integers(0, 20, n),
+        'Debt-to-Income Ratio': rng.uniform(0.1, 0.6, n).round(4),
+        'Number of Dependents': rng.integers(0, 5, n).astype(float),
+        'Previous Defaults': rng.integers(0, 5, n),
+    })
+    for column in ['Income', 'Credit Score', 'Loan Amount', 'Number of Dependents']:
+        df.loc[rng.random(n) < KAGGLE_MISSING_SHARE, column] = np.nan
+    for column, (options, p) in KAGGLE_CATEGORIES.items():
+        df[column] = _draw(rng, n, options, p)
+    return df
+
+
+def assign_risk_preference(df, rng):
+    """
+    Score plus jitter, then label noise, as in the notebook. Its income and
+    credit-score conditions compare against labels the data never holds
+    ("70,000+", ">700"), so they never add to the score; that is kept so
+    the simulated distribution is unchanged.
+    """
+    n = len(df)
+    score = (
+        df['age_bucket'].isin(["18-24", "25-34"]).to_numpy(int)
+        + (df['income_bucket'] == "70,000+").to_numpy(int)
+        + df['Credit Score'].isin([">700", "681-700"]).to_numpy(int)
+        + (df['Years at Current Job'] > 5).to_numpy(int)
+        + (df['Number of Dependents'] < 2).to_numpy(int)
+        + (df['has_loan'] == 0).to_numpy(int)
+        + (df['Previous Defaults'] == 0).to_numpy(int)
+        + (df['Payment History'] == "Good").to_numpy(int)
+        + rng.integers(-1, 2, n)
+    )
+    defaulted = ((df['Previous Defaults'] > 2) | (df['Payment History'] == "Poor")).to_numpy()
+    preference = _select(rng, n, [
+        (defaulted, ["Low Risk", "Risk Taker"], [0.9, 0.1]),
+        (score >= 6, ["Risk Taker", "Low Risk"], [0.85, 0.15]),
+        (score >= 3, ["Risk Taker", "Low Risk"], [0.6, 0.4]),
+    ], "Low Risk")
+
+    # flip_label: either label flips with probability 0.15
+    taker = np.asarray(preference == "Risk Taker") ^ (rng.random(n) < 0.15)
+    return pd.Categorical.from_codes(taker.astype(int), ["Low Risk", "Risk Taker"])
+
+
+def simulate_behavioral_features(df, rng):
+    """
+    The notebook's simulate_behavioral_features over whole columns. Age
+    checks against "18-25"/"26-35"/"46-55"/"56-65" and income checks
+    against "50,000-69,999"/"70,000+" never match the bucket labels in the
+    notebook either, so those branches stay unreachable here too.
+    """
+    n = len(df)
+    df = df.copy()
+    age, income = df['age_bucket'], df['income_bucket']
+    young = age.isin(["18-24", "25-34"]).to_numpy()
+    older = age.isin(["55-64", "65+"]).to_numpy()
+
+    df['risk_preference'] = preference = assign_risk_preference(df, rng)
+    taker = np.asarray(preference == "Risk Taker")
+
+    df['reaction_to_loss'] = _select(rng, n, [
+        (taker, REACTIONS, [0.1, 0.3, 0.6]),
+    ], (REACTIONS, [0.4, 0.4, 0.2]))
+    df['saving_frequency'] = _select(rng, n, [
+        ((income == "<30,000").to_numpy(), ["Monthly", "Rarely"], [0.5, 0.5]),
+        (age.isin(["18-25", "26-35"]).to_numpy(), ["Monthly", "Weekly", "Rarely"], [0.7, 0.25, 0.05]),
+    ], (["Monthly", "Weekly"], [0.85, 0.15]))
+    df['investment_frequency'] = _select(rng, n, [
+        ((income == "70,000+").to_numpy() | taker, ["Regularly", "Occasionally"], [0.85, 0.15]),
+    ], (["Occasionally", "Rarely"], [0.7, 0.3]))
+    df['has_insurance'] = _select(rng, n, [
+        ((income.isin(["50,000-69,999", "70,000+"]) | age.isin(["46-55", "56-65", "65+"])).to_numpy(), ["Yes", "No"], [0.97, 0.03]),
+        (age.isin(["18-25", "26-35"]).to_numpy(), ["Yes", "No"], [0.8, 0.2]),
+    ], (["Yes", "No"], [0.9, 0.1]))
+    df['financial_goal'] = _select(rng, n, [
+        (older, ["Retirement"], None),
+        (young, ["General wealth building", "Travel"], [0.85, 0.15]),
+        ((income == "70,000+").to_numpy(), ["Retirement", "General wealth building"], [0.6, 0.4]),
+    ], (["Retirement", "General wealth building"], [0.45, 0.55]))
+    df['time_horizon'] = _select(rng, n, [
+        (older, ["3 - 10 years", "More than 10 years"], [0.8, 0.2]),
+        (young, ["More than 10 years"], None),
+    ], (["3 - 10 years", "More than 10 years"], [0.5, 0.5]))
+
+    # The notebook samples the noisy rows with a fixed random_state, so
+    # columns with the same fraction are shuffled within the same rows
+    noisy_rows = {}
+    for column, fraction in FEATURE_NOISE.items():
+        if fraction not in noisy_rows:
+            noisy_rows[fraction] = rng.choice(n, size=round(fraction * n), replace=False)
+        rows = noisy_rows[fraction]
+        codes = df[column].cat.codes.to_numpy().copy()
+        codes[rows] = rng.permutation(codes[rows])
+        df[column] = pd.Categorical.from_codes(codes, df[column].cat.categories)
+    return df
+
+
+def build_training_frame(kaggle_df, rng):
+    """
+    Kaggle-format rows to the training CSV layout: buckets, simulated
+    behavioural features, the notebook's imputation and numeric encodings.
+    """
+    df = kaggle_df.copy()
+    n = len(df)
+    df['age_bucket'] = bucket_age(df['Age'])
+    df['income_bucket'] = bucket_income(df['Income'])
+    df['has_loan'] = (df['Loan Amount'] > 0).astype(int)
+    df = simulate_behavioral_features(df, rng)
+
+    df['Credit Score'] = df['Credit Score'].fillna(df['Credit Score'].mean())
+    df['Number of Dependents'] = df['Number of Dependents'].fillna(0)
+    # fill_income: the unemployed branch reads a column that does not exist, so every gap is uniform
+    income_codes = df['income_bucket'].cat.codes.to_numpy().copy()
+    missing_income = income_codes < 0
+    income_codes[missing_income] = rng.integers(0, len(INCOME_LABELS), missing_income.sum())
+    df['income_bucket'] = pd.Categorical.from_codes(income_codes, INCOME_LABELS)
+    # assign_financial_knowledge compares string literals, so it always takes its uniform fallback
+    df['financial_knowledge_level'] = _draw(rng, n, KNOWLEDGE_LEVELS)
+
+    numeric_encodings = [
+        ('risk_preference', 'risk_preference_num', {"Low Risk": 0, "Risk Taker": 1}),
+        ('reaction_to_loss', 'reaction_to_loss_num', {r: i for i, r in enumerate(REACTIONS)}),
+        ('financial_knowledge_level', 'financial_knowledge_num', {k: i for i, k in enumerate(KNOWLEDGE_LEVELS)}),
+        ('Risk Rating', 'risk_rating_num', {'Low': 0, 'Medium': 1, 'High': 2}),
+    ]
+    for column, encoded, mapping in numeric_encodings:
+        df[encoded] = df[column].map(mapping).astype(int)
+    return df.rename(columns=KAGGLE_TO_TRAINING)[TRAINING_COLUMNS]
+
+
+def generate_training_data(n, seed=42, kaggle_df=None):
+    """
+    Training rows from `kaggle_df` when given, otherwise from `n` sampled
+    base rows. All randomness comes from one np.random.Generator seeded
+    with `seed`, so a seed reproduces the file.
+    """
+    rng = np.random.default_rng(seed)
+    if kaggle_df is None:
+        kaggle_df = sample_kaggle_rows(n, rng)
+    return build_training_frame(kaggle_df, rng)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic risk-profile training data.")
+    parser.add_argument("output", help="CSV to write")
+    parser.add_argument("--rows", type=int, default=100_000, help="rows to generate (ignored with --kaggle)")
+    parser.add_argument("--kaggle", default=None, help="simulate features for this financial_risk_assessment.csv instead")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    source = pd.read_csv(args.kaggle) if args.kaggle else None
+    data = generate_training_data(args.rows, args.seed, source)
+    data.to_csv(args.output, index=False)
+    print(f"Wrote {len(data)} rows to {args.output} in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,241 @@
+import argparse
+import logging
+import os
+import pickle
+import time
+import numpy as np
+import pandas as pd
+from joblib import Memory, Parallel, delayed
+from sklearn.base import clone
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import f1_score
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from .model_bundle import export_bundle
+from .model_registry import file_sha256, risk_model_path, write_manifest
+from .risk_inference import MODEL_FEATURES, UnsupportedPipelineError, compile_pipeline, predict_proba_compiled
+
+try:
+    from imblearn.over_sampling import SMOTE
+except ImportError:  # imbalanced-learn is only needed to rebalance training folds
+    SMOTE = None
+
+logger = logging.getLogger(__name__)
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(current_dir, '..', 'Assets', 'cache', 'training')
+
+TARGET_COLUMN = 'risk_rating_num'
+CATEGORICAL_FEATURES = [
+    'age_bucket', 'income_bucket', 'gender', 'occupation', 'education_level',
+    'marital_status', 'loan_purpose', 'payment_history', 'reaction_to_loss',
+    'financial_knowledge_level', 'saving_frequency', 'investment_frequency',
+    'has_insurance', 'financial_goal', 'time_horizon'
+]
+NUMERICAL_FEATURES = ['has_loan', 'credit_score', 'job_tenure', 'number_of_dependents', 'debt_to_income_ratio']
+
+# Candidates from the training notebook that the serving environment can load
+CANDIDATE_MODELS = {
+    "KNN": KNeighborsClassifier(n_neighbors=5),
+    "Logistic Regression": LogisticRegression(class_weight='balanced', max_iter=1000, random_state=42),
+    "Random Forest": RandomForestClassifier(class_weight='balanced', random_state=42, n_estimators=100),
+}
+
+
+def load_training_data(path, binary=True):
+    """Features in the order the app sends them, and the target (risk taker vs not when binary)."""
+    df = pd.read_csv(path)
+    y = df[TARGET_COLUMN]
+    if binary:
+        y = (y != 0).astype(int)
+    return df[MODEL_FEATURES], y.to_numpy()
+
+
+def preprocessor():
+    return ColumnTransformer([
+        ("categorical", OneHotEncoder(handle_unknown='ignore', sparse_output=False), CATEGORICAL_FEATURES),
+        ("numerical", StandardScaler(), NUMERICAL_FEATURES),
+    ])
+
+
+def _encode_split(path, data_sha256, binary, test_size, seed):
+    # data_sha256 is part of the cache key, so an edited CSV is re-encoded
+    X, y = load_training_data(path, binary)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, stratify=y, random_state=seed)
+    transformer = preprocessor().fit(X_train)
+    return {
+        "transformer": transformer,
+        "X_train": transformer.transform(X_train),
+        "X_test": transformer.transform(X_test),
+        "y_train": y_train,
+        "y_test": y_test,
+        "test_rows": X_test.to_dict("records"),
+    }
+
+
+def encoded_split(path, binary=True, test_size=0.15, seed=42, cache_dir=CACHE_DIR):
+    """
+    Stratified train/test split with the fitted preprocessor and the encoded
+    matrices, cached on disk by data checksum and split settings so repeat
+    runs skip reading and encoding the CSV.
+    """
+    memory = Memory(cache_dir, verbose=0)
+    return memory.cache(_encode_split)(os.path.abspath(path), file_sha256(path), binary, test_size, seed)
+
+
+def _rebalance(X, y, seed):
+    if SMOTE is None:
+        return X, y
+    return SMOTE(random_state=seed).fit_resample(X, y)
+
+
+def _fit_and_score(estimator, X_fit, y_fit, X_score, seed):
+    """Fits a candidate (SMOTE on its training rows only) and scores the held-out rows."""
+    X_fit, y_fit = _rebalance(X_fit, y_fit, seed)
+    model = clone(estimator).fit(X_fit, y_fit)
+    return model, model.predict_proba(X_score)
+
+
+def threshold_sweep(y_true, scores):
+    """
+    Precision, recall and F1 of predicting the positive class at every
+    distinct score threshold, from one sort: after ordering by descending
+    score, cumulative sums give the true and false positives above each cut.
+    """
+    order = np.argsort(-scores, kind="stable")
+    sorted_scores, sorted_true = scores[order], np.asarray(y_true)[order]
+    true_positives = np.cumsum(sorted_true)
+    false_positives = np.cumsum(1 - sorted_true)
+    # Last position of each run of equal scores: everything up to it is predicted positive
+    cuts = np.r_[np.flatnonzero(np.diff(sorted_scores)), len(sorted_scores) - 1]
+    tp, fp = true_positives[cuts], false_positives[cuts]
+    positives = sorted_true.sum()
+    return pd.DataFrame({
+        "threshold": sorted_scores[cuts],
+        "precision": tp / (tp + fp),
+        "recall": tp / positives if positives else 0.0,
+        "f1": 2 * tp / (tp + fp + positives),
+    })
+
+
+def serving_cost(pipeline, rows, repeats=200):
+    """Single-row latency (p50/p95, microseconds) through the app's inference path and pickled size."""
+    try:
+        compiled = compile_pipeline(pipeline)
+        predict = lambda row: predict_proba_compiled(compiled, row)
+    except UnsupportedPipelineError:
+        predict = lambda row: pipeline.predict_proba(pd.DataFrame([row], columns=MODEL_FEATURES))
+    timings = []
+    for row in (rows * (repeats // max(len(rows), 1) + 1))[:repeats]:
+        started = time.perf_counter()
+        predict(row)
+        timings.append(time.perf_counter() - started)
+    timings = np.array(timings) * 1e6
+    return {
+        "latency_p50_us": float(np.percentile(timings, 50)),
+        "latency_p95_us": float(np.percentile(timings, 95)),
+        "size_mb": len(pickle.dumps(pipeline)) / 1e6,
+    }
+
+
+def train_candidates(split, candidates=CANDIDATE_MODELS, folds=5, n_jobs=-1, seed=42):
+    """
+    Cross-validates every candidate and fits it on the full training set,
+    all (candidate, fold) fits running in parallel. Returns the report (one
+    row per candidate) and the fitted serving pipelines.
+    """
+    X, y = split["X_train"], split["y_train"]
+    classes = np.unique(y)
+    average = "binary" if len(classes) == 2 else "macro"
+    splits = list(StratifiedKFold(folds, shuffle=True, random_state=seed).split(X, y))
+
+    # One job per (candidate, fold), plus the final fit of each candidate scored on the test set
+    jobs = [(name, held_out, (estimator, X[train], y[train], X[held_out]))
+            for name, estimator in candidates.items() for train, held_out in splits]
+    jobs += [(name, None, (estimator, X, y, split["X_test"])) for name, estimator in candidates.items()]
+    results = Parallel(n_jobs=n_jobs)(delayed(_fit_and_score)(*arguments, seed) for _, _, arguments in jobs)
+
+    fold_f1 = {name: [] for name in candidates}
+    final = {}
+    for (name, held_out, _), (model, proba) in zip(jobs, results):
+        if held_out is None:
+            final[name] = (model, proba)
+        else:
+            fold_f1[name].append(f1_score(y[held_out], classes[proba.argmax(axis=1)], average=average))
+
+    rows, pipelines = [], {}
+    for name, (model, proba) in final.items():
+        pipeline = Pipeline([("preprocess", split["transformer"]), ("model", model)])
+        test_f1 = f1_score(split["y_test"], model.classes_[proba.argmax(axis=1)], average=average)
+        row = {"model": name, "cv_f1": np.mean(fold_f1[name]), "cv_f1_std": np.std(fold_f1[name]), "test_f1": test_f1}
+        if average == "binary":
+            sweep = threshold_sweep(split["y_test"], proba[:, 1])
+            best = sweep.loc[sweep["f1"].idxmax()]
+            row.update({"best_threshold": best["threshold"], "best_threshold_f1": best["f1"]})
+        row.update(serving_cost(pipeline, split["test_rows"][:50]))
+        rows.append(row)
+        pipelines[name] = pipeline
+    return pd.DataFrame(rows).set_index("model"), pipelines
+
+
+def choose_model(report, f1_tolerance=0.01):
+    """
+    Cheapest candidate to serve (p95 latency, then size) among those whose
+    cross-validated F1 is within `f1_tolerance` of the best.
+    """
+    eligible = report[report["cv_f1"] >= report["cv_f1"].max() - f1_tolerance]
+    return eligible.sort_values(["latency_p95_us", "size_mb"]).index[0]
+
+
+def publish(pipeline, output_path, version, **metadata):
+    """
+    Pickles the pipeline next to `output_path`, writes the manifest for the
+    staged file, then renames the pickle into place. The registry watches
+    the pickle, so by the time it sees a change the manifest already
+    matches it and the new model is picked up on the next request.
+    """
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(pipeline, f)
+    manifest = write_manifest(output_path, version, staged_path=tmp_path, **metadata)
+    os.replace(tmp_path, output_path)
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train, compare and publish the risk-profile classifier.")
+    parser.add_argument("data", help="training CSV with the model features and risk_rating_num")
+    parser.add_argument("--output", default=None, help="artifact path (default: the one the app loads)")
+    parser.add_argument("--bundle", default=None, help="also export the chosen model as an array bundle here")
+    parser.add_argument("--version", default=None, help="version for the manifest (default: timestamp)")
+    parser.add_argument("--multiclass", action="store_true", help="keep the three risk classes instead of risk taker vs not")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=-1, help="parallel fits (-1: all cores)")
+    parser.add_argument("--f1-tolerance", type=float, default=0.01, help="F1 a cheaper model may give up")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if SMOTE is None:
+        logger.warning("imbalanced-learn is not installed; training folds are not rebalanced")
+    split = encoded_split(args.data, binary=not args.multiclass, cache_dir=args.cache_dir)
+    report, pipelines = train_candidates(split, folds=args.folds, n_jobs=args.jobs)
+    chosen = choose_model(report, args.f1_tolerance)
+    print(report.round(4).to_string())
+    print(f"Chosen: {chosen}")
+
+    version = args.version or time.strftime("%Y%m%d-%H%M%S")
+    metrics = {k: float(v) for k, v in report.loc[chosen].items()}
+    output = args.output or risk_model_path()
+    publish(pipelines[chosen], output, version, model=chosen, metrics=metrics, data_sha256=file_sha256(args.data))
+    print(f"Published {chosen} as {version} to {output}")
+    if args.bundle:
+        try:
+            export_bundle(pipelines[chosen], args.bundle, version, model=chosen, metrics=metrics)
+            print(f"Exported bundle to {args.bundle}")
+        except UnsupportedPipelineError as e:
+            logger.warning("Not exporting a bundle: %s", e)
@@ -0,0 +1,211 @@
+import bisect
+import os
+import re
+import numpy as np
+import pandas as pd
+import streamlit as st
+from .market_data import fetch_many
+from .metric_state import refresh_metric_state, risk_metrics_from_state
+from .fx import FxUnavailableError, to_eur, eur_key
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+UNIVERSE_PATH = os.path.join(current_dir, '..', 'Assets', 'etf_universe.csv')
+METRICS_TABLE_PATH = os.path.join(current_dir, '..', 'Assets', 'cache', 'universe_metrics.npz')
+
+TEXT_COLUMNS = ["ticker", "name", "isin", "domicile", "asset_class", "risk_bucket", "exchange", "currency", "ucits"]
+
+# Columns of the precomputed metrics table, all float64 and aligned with the universe rows
+METRIC_COLUMNS = ["volatility", "sharpe", "max_drawdown", "return_1y", "return_3y", "return_5y", "years_of_history"]
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _tokens(text):
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+def build_universe(df):
+    """
+    Turns the metadata table into a search index.
+
+    Columns are held as NumPy arrays so filters are single vectorized masks.
+    Every token of the ticker, ISIN, name, asset class and domicile is kept in
+    one sorted array; a prefix query is a bisect into it followed by a
+    contiguous slice of row ids.
+    """
+    df = df.reset_index(drop=True)
+    columns = {col: df[col].astype(str).to_numpy() for col in TEXT_COLUMNS}
+    columns["ter"] = df["ter"].astype(float).to_numpy()
+
+    pairs = set()
+    for row, record in enumerate(df.itertuples(index=False)):
+        ticker_base = record.ticker.split(".")[0]
+        for text in (record.ticker, ticker_base, record.isin, record.name, record.asset_class, record.domicile):
+            for token in _tokens(text):
+                pairs.add((token, row))
+    pairs = sorted(pairs)
+
+    return {
+        "size": len(df),
+        "columns": columns,
+        "row_by_ticker": {t: i for i, t in enumerate(columns["ticker"])},
+        "token_keys": [token for token, _ in pairs],
+        "token_rows": np.array([row for _, row in pairs], dtype=np.int64),
+    }
+
+
+@st.cache_resource(show_spinner=False)
+def load_universe(path=UNIVERSE_PATH):
+    """The ETF metadata index, built once per process and shared by every session."""
+    return build_universe(pd.read_csv(path, dtype={"isin": str, "ticker": str}))
+
+
+def _prefix_rows(universe, prefix):
+    keys = universe["token_keys"]
+    start = bisect.bisect_left(keys, prefix)
+    end = bisect.bisect_left(keys, prefix + "\uffff")
+    return universe["token_rows"][start:end]
+
+
+def search_universe(universe, query, mask=None, limit=50):
+    """
+    Row ids matching every word of `query` as a prefix of some token, best
+    first: exact ticker or ISIN matches, then ticker prefixes, then the rest,
+    each ordered by TER. An empty query returns every row of `mask`.
+    """
+    size = universe["size"]
+    selected = np.ones(size, dtype=bool) if mask is None else mask.copy()
+    words = _tokens(query)
+    for word in words:
+        hit = np.zeros(size, dtype=bool)
+        hit[_prefix_rows(universe, word)] = True
+        selected &= hit
+
+    rows = np.flatnonzero(selected)
+    if not len(rows):
+        return rows
+
+    columns = universe["columns"]
+    rank = np.full(len(rows), 2)
+    if words:
+        query_key = "".join(words)
+        tickers = np.char.lower(columns["ticker"][rows].astype(str))
+        bases = np.array([t.split(".")[0] for t in tickers])
+        isins = np.char.lower(columns["isin"][rows].astype(str))
+        rank[np.char.startswith(bases, query_key)] = 1
+        rank[(bases == query_key) | (tickers == query_key) | (isins == query_key)] = 0
+    order = np.lexsort((columns["ter"][rows], rank))
+    return rows[order][:limit]
+
+
+def filter_universe(universe, asset_classes=None, risk_bucket=None, domiciles=None, max_ter=None, ucits_only=False):
+    """Boolean mask over the universe rows for the given metadata filters."""
+    columns = universe["columns"]
+    mask = np.ones(universe["size"], dtype=bool)
+    if asset_classes:
+        mask &= np.isin(columns["asset_class"], list(asset_classes))
+    if risk_bucket:
+        mask &= columns["risk_bucket"] == risk_bucket
+    if domiciles:
+        mask &= np.isin(columns["domicile"], list(domiciles))
+    if max_ter is not None:
+        mask &= columns["ter"] <= max_ter
+    if ucits_only:
+        mask &= columns["ucits"] == "Yes"
+    return mask
+
+
+# --- Precomputed metrics table ---
+
+def compute_metrics_table(universe, histories):
+    """
+    Risk and return columns for every fund, NaN where no history is available.
+    Histories are converted to euros first, so every fund is measured from a
+    euro investor's point of view. Risk metrics come from the persisted
+    per-ticker state, so a refresh only processes bars added since the
+    previous one.
+    """
+    table = {col: np.full(universe["size"], np.nan) for col in METRIC_COLUMNS}
+    for ticker, history in histories.items():
+        row = universe["row_by_ticker"].get(ticker)
+        if row is None or history.empty:
+            continue
+        try:
+            history = to_eur(history, universe["columns"]["currency"][row])
+        except FxUnavailableError:
+            continue
+        close = history["Close"].dropna()
+        if len(close) < 2:
+            continue
+        volatility, sharpe, max_drawdown = risk_metrics_from_state(refresh_metric_state(eur_key(ticker), history))
+        table["volatility"][row] = volatility
+        table["sharpe"][row] = sharpe
+        table["max_drawdown"][row] = max_drawdown
+        for years in (1, 3, 5):
+            start = close.index[-1] - pd.DateOffset(years=years)
+            if close.index[0] <= start:
+                table[f"return_{years}y"][row] = close.iloc[-1] / close[close.index >= start].iloc[0] - 1
+        table["years_of_history"][row] = (close.index[-1] - close.index[0]).days / 365.25
+    return table
+
+
+def save_metrics_table(universe, table, path=METRICS_TABLE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path, tickers=universe["columns"]["ticker"].astype(str), **table)
+    os.replace(tmp_path, path)
+
+
+def load_metrics_table(universe, path=METRICS_TABLE_PATH):
+    """
+    The saved metrics table realigned to the current universe rows; funds
+    added since it was built get NaN until the next refresh.
+    """
+    table = {col: np.full(universe["size"], np.nan) for col in METRIC_COLUMNS}
+    if not os.path.exists(path):
+        return table
+    with np.load(path, allow_pickle=False) as saved:
+        saved_rows = {t: i for i, t in enumerate(saved["tickers"])}
+        positions = np.array([saved_rows.get(t, -1) for t in universe["columns"]["ticker"]])
+        present = positions >= 0
+        for col in METRIC_COLUMNS:
+            if col in saved.files:
+                table[col][present] = saved[col][positions[present]]
+    return table
+
+
+def refresh_metrics_table(universe=None):
+    """Downloads (or reads from cache) every fund's history and rebuilds the saved metrics table."""
+    universe = universe or build_universe(pd.read_csv(UNIVERSE_PATH, dtype={"isin": str, "ticker": str}))
+    histories = fetch_many(universe["columns"]["ticker"].tolist(), "max")
+    table = compute_metrics_table(universe, histories)
+    save_metrics_table(universe, table)
+    return table
+
+
+def universe_frame(universe, rows, metrics=None):
+    """Display DataFrame for a selection of rows, with metric columns when a table is given."""
+    columns = universe["columns"]
+    frame = pd.DataFrame({
+        "Ticker": columns["ticker"][rows],
+        "Name": columns["name"][rows],
+        "ISIN": columns["isin"][rows],
+        "TER (%)": columns["ter"][rows],
+        "Domicile": columns["domicile"][rows],
+        "Asset Class": columns["asset_class"][rows],
+        "Risk": columns["risk_bucket"][rows],
+        "Exchange": columns["exchange"][rows],
+    })
+    if metrics is not None:
+        frame["Volatility"] = metrics["volatility"][rows]
+        frame["Sharpe"] = metrics["sharpe"][rows]
+        frame["Max Drawdown"] = metrics["max_drawdown"][rows]
+        frame["1Y Return"] = metrics["return_1y"][rows]
+        frame["3Y Return"] = metrics["return_3y"][rows]
+        frame["5Y Return"] = metrics["return_5y"][rows]
+    return frame
+
+
+if __name__ == "__main__":
+    refreshed = refresh_metrics_table()
+    print(f"Saved metrics for {int(np.sum(~np.isnan(refreshed['volatility'])))} funds to {METRICS_TABLE_PATH}")
@@ -0,0 +1,161 @@
+import argparse
+import logging
+import os
+import re
+from collections import Counter
+import pandas as pd
+from .universe import TEXT_COLUMNS, UNIVERSE_PATH
+
+logger = logging.getLogger(__name__)
+
+# Vendor export headers (matched case-insensitively) accepted for each
+# universe column. The export has one row per exchange listing, so a fund
+# traded in London and on Xetra is two rows with the same ISIN. TER is in
+# percent ("0.20" or "0.20%"). The UCITS column is optional: exports without
+# it are taken to be UCITS-only screens, as the European screeners are.
+VENDOR_COLUMNS = {
+    "name": ["name", "fund name", "fund"],
+    "isin": ["isin"],
+    "ticker": ["ticker", "symbol", "exchange ticker", "local ticker"],
+    "exchange": ["exchange", "listing", "venue", "stock exchange"],
+    "currency": ["currency", "trading currency", "listing currency"],
+    "ter": ["ter", "ter (%)", "ongoing charges", "ongoing charges (%)"],
+    "domicile": ["domicile", "fund domicile"],
+    "asset_class": ["asset class", "asset_class"],
+    "ucits": ["ucits"],
+}
+OPTIONAL_COLUMNS = {"ucits"}
+
+# Column order of Assets/etf_universe.csv
+UNIVERSE_COLUMNS = TEXT_COLUMNS[:3] + ["ter"] + TEXT_COLUMNS[3:]
+
+# Listing venue names as vendors write them -> (universe exchange, Yahoo suffix)
+EXCHANGES = {
+    "london": ("London", ".L"),
+    "london stock exchange": ("London", ".L"),
+    "lse": ("London", ".L"),
+    "xetra": ("Xetra", ".DE"),
+    "deutsche boerse xetra": ("Xetra", ".DE"),
+    "euronext amsterdam": ("Euronext Amsterdam", ".AS"),
+    "amsterdam": ("Euronext Amsterdam", ".AS"),
+    "euronext paris": ("Euronext Paris", ".PA"),
+    "paris": ("Euronext Paris", ".PA"),
+    "euronext dublin": ("Euronext Dublin", ".IR"),
+    "dublin": ("Euronext Dublin", ".IR"),
+    "borsa italiana": ("Borsa Italiana", ".MI"),
+    "milan": ("Borsa Italiana", ".MI"),
+    "six swiss exchange": ("SIX Swiss Exchange", ".SW"),
+    "six": ("SIX Swiss Exchange", ".SW"),
+    "nyse arca": ("NYSE Arca", ""),
+    "nasdaq": ("NASDAQ", ""),
+}
+
+# Asset classes in the low risk bucket; everything else is high risk
+_LOW_RISK_RE = re.compile(r"bond|money market|treasur|cash", re.IGNORECASE)
+_ISIN_RE = re.compile(r"^[A-Z]{2}[A-Z0-9]{9}[0-9]$")
+
+
+def valid_isin(isin):
+    """Format and check digit of an ISIN (letters as 10-35, then the Luhn check)."""
+    if not _ISIN_RE.match(isin):
+        return False
+    digits = "".join(str(int(c, 36)) for c in isin)
+    total = 0
+    for i, d in enumerate(reversed(digits)):
+        d = int(d) * (2 if i % 2 else 1)
+        total += d - 9 if d > 9 else d
+    return total % 10 == 0
+
+
+def _vendor_column(df, column):
+    headers = {h.strip().lower(): h for h in df.columns}
+    for alias in VENDOR_COLUMNS[column]:
+        if alias in headers:
+            return headers[alias]
+    return None
+
+
+def read_vendor_export(path):
+    """
+    Universe rows from a vendor's ETF listing export (see VENDOR_COLUMNS),
+    plus a Counter of the listings left out and why: an invalid ISIN, a
+    venue missing from EXCHANGES, no TER, or a ticker already taken.
+    Tickers get the venue's Yahoo suffix unless they already carry one.
+    """
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    found = {column: _vendor_column(df, column) for column in VENDOR_COLUMNS}
+    missing = [c for c, header in found.items() if header is None and c not in OPTIONAL_COLUMNS]
+    if missing:
+        raise ValueError(f"{path} has no column for {missing}; expected one of {[VENDOR_COLUMNS[c] for c in missing]}")
+    raw = pd.DataFrame({c: df[header].str.strip() for c, header in found.items() if header is not None})
+
+    dropped = Counter()
+    rows = []
+    for record in raw.to_dict("records"):
+        isin = record["isin"].upper()
+        venue = EXCHANGES.get(record["exchange"].lower())
+        ter = pd.to_numeric(record["ter"].rstrip("%").strip(), errors="coerce")
+        if not valid_isin(isin):
+            dropped["invalid ISIN"] += 1
+        elif venue is None:
+            dropped[f"unknown exchange {record['exchange']!r}"] += 1
+        elif pd.isna(ter):
+            dropped["no TER"] += 1
+        else:
+            exchange, suffix = venue
+            ticker = record["ticker"].upper()
+            ucits = record.get("ucits", "yes").lower() in ("yes", "y", "true", "1", "ucits")
+            rows.append({
+                "ticker": ticker if "." in ticker or not suffix else ticker + suffix,
+                "name": record["name"],
+                "isin": isin,
+                "ter": float(ter),
+                "domicile": record["domicile"],
+                "asset_class": record["asset_class"],
+                "risk_bucket": "Low Risk" if _LOW_RISK_RE.search(record["asset_class"]) else "High Risk",
+                "exchange": exchange,
+                "currency": "GBp" if record["currency"].upper() in ("GBX", "GBP PENCE") else record["currency"].upper(),
+                "ucits": "Yes" if ucits else "No",
+            })
+    imported = pd.DataFrame(rows, columns=UNIVERSE_COLUMNS)
+    duplicated = imported["ticker"].duplicated()
+    if duplicated.any():
+        dropped["duplicate ticker"] = int(duplicated.sum())
+    return imported[~duplicated].reset_index(drop=True), dropped
+
+
+def merge_universe(existing, imported):
+    """
+    The imported listings plus the existing rows whose tickers the import
+    does not cover (hand-added funds stay), grouped by asset class and fund.
+    """
+    kept = existing[~existing["ticker"].isin(imported["ticker"])]
+    merged = pd.concat([imported, kept], ignore_index=True)[UNIVERSE_COLUMNS]
+    return merged.sort_values(["asset_class", "name", "exchange"], kind="stable").reset_index(drop=True)
+
+
+def write_universe(frame, path=UNIVERSE_PATH):
+    """Writes the universe CSV next to `path` and renames it into place."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    frame.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the ETF universe from a vendor listing export.")
+    parser.add_argument("export", help="CSV export with one row per listing (columns: see VENDOR_COLUMNS)")
+    parser.add_argument("--output", default=UNIVERSE_PATH)
+    parser.add_argument("--replace", action="store_true", help="drop existing rows the export does not list")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    imported, dropped = read_vendor_export(args.export)
+    for reason, count in dropped.most_common():
+        logger.warning("Left out %d listings: %s", count, reason)
+    if args.replace or not os.path.exists(args.output):
+        universe = merge_universe(imported.iloc[:0], imported)
+    else:
+        universe = merge_universe(pd.read_csv(args.output, dtype={"isin": str, "ticker": str}), imported)
+    write_universe(universe, args.output)
+    print(f"Wrote {len(universe)} listings ({universe['isin'].nunique()} funds) to {args.output}; "
+          "run `python -m modules.universe` to rebuild the metrics table")
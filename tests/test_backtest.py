@@ -0,0 +1,22 @@
+import numpy as np
+from modules.backtest import rolling_start_values
+
+
+def test_rolling_start_values_match_a_month_by_month_simulation():
+    returns = np.random.default_rng(0).normal(0.006, 0.04, 600)
+    horizon, initial, monthly = 120, 10_000.0, 250.0
+    values = rolling_start_values(returns, horizon, initial, monthly)
+
+    expected = []
+    for start in range(len(returns) - horizon + 1):
+        balance = initial
+        for r in returns[start:start + horizon]:
+            # Contributions at the start of each month
+            balance = (balance + monthly) * (1 + r)
+        expected.append(balance)
+    assert len(values) == len(returns) - horizon + 1
+    np.testing.assert_allclose(values, expected, rtol=1e-9)
+
+
+def test_rolling_start_values_without_enough_history():
+    assert len(rolling_start_values([0.01] * 5, 6, 100.0, 10.0)) == 0
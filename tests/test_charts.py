@@ -0,0 +1,11 @@
+import numpy as np
+from modules.charts import minmax_indices
+
+
+def test_minmax_indices_keep_every_bucket_extreme_in_order():
+    y = np.cumsum(np.random.default_rng(0).normal(size=8000))
+    kept = minmax_indices(y, 800)
+    assert len(kept) <= 802 and (np.diff(kept) > 0).all()
+    assert kept[0] == 0 and kept[-1] == len(y) - 1
+    assert y.argmin() in kept and y.argmax() in kept
+    np.testing.assert_array_equal(minmax_indices(y[:500], 800), np.arange(500))
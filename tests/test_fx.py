@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+from modules import fx
+
+INDEX = pd.date_range("2024-01-01", periods=5, freq="D")
+FX_HISTORIES = {"EURCAD=X": pd.DataFrame({"Close": [1.5] * 5}, index=INDEX)}
+
+
+@pytest.fixture(autouse=True)
+def cached_fx(monkeypatch):
+    monkeypatch.setattr(fx, "fetch_history", lambda ticker, period: FX_HISTORIES.get(ticker, pd.DataFrame()))
+
+
+def _prices(value):
+    return pd.DataFrame({"Close": [value] * 5, "Volume": [10] * 5}, index=INDEX)
+
+
+def test_any_currency_uses_its_euro_pair():
+    assert fx.fx_ticker("CAD") == "EURCAD=X" and fx.fx_ticker("USD") == "EURUSD=X"
+    converted = fx.to_eur(_prices(30.0), "CAD")
+    np.testing.assert_allclose(converted["Close"], 20.0)
+    assert (converted["Volume"] == 10).all()
+
+
+def test_missing_fx_series_is_reported_not_emptied():
+    with pytest.raises(fx.FxUnavailableError, match="JPY"):
+        fx.to_eur(_prices(3000.0), "JPY")
+    assert np.isnan(fx.latest_eur_rate("JPY"))
+
+
+def test_histories_to_eur_keeps_the_convertible_ones():
+    converted, errors = fx.histories_to_eur({"A": _prices(3.0), "B": _prices(3.0)}, {"A": "CAD", "B": "JPY"}.get)
+    assert list(converted) == ["A"] and list(errors) == ["B"]
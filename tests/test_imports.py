@@ -0,0 +1,22 @@
+import importlib
+import pkgutil
+import modules
+
+
+def test_package_imports():
+    # main.py does `from modules import ...`; every page module must import in the app's environment
+    importlib.reload(modules)
+
+
+def test_every_module_imports():
+    for module in pkgutil.iter_modules(modules.__path__):
+        importlib.import_module(f"modules.{module.name}")
+
+
+def test_azure_client_pool_builds_without_network():
+    from modules.azure_clients import AzureClientPool
+    pool = AzureClientPool(max_connections=2, keepalive_expiry=30)
+    client = pool.get("https://example.invalid/", "key", "2024-12-01-preview")
+    assert pool.get("https://example.invalid/", "key", "2024-12-01-preview") is client
+    assert pool.stats()[0]["requests"] == 0
+    pool.close()
@@ -0,0 +1,80 @@
+import pandas as pd
+import pytest
+from modules import market_data
+
+
+class FakeTicker:
+    """Stands in for yf.Ticker; `responses` is consumed one download at a time."""
+    responses = []
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+
+    def history(self, period):
+        response = FakeTicker.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    @property
+    def info(self):
+        response = FakeTicker.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+@pytest.fixture
+def offline(tmp_path, monkeypatch):
+    monkeypatch.setattr(market_data, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(market_data.yf, "Ticker", FakeTicker)
+    monkeypatch.setattr(market_data, "_memory_cache", market_data.OrderedDict())
+    FakeTicker.responses = []
+    return FakeTicker.responses
+
+
+def _history(closes):
+    index = pd.date_range("2024-01-01", periods=len(closes), freq="D", tz="America/New_York")
+    return pd.DataFrame({"Close": closes}, index=index)
+
+
+def test_failed_refresh_keeps_serving_the_last_good_history(offline):
+    offline += [_history([1.0, 2.0, 3.0]), pd.DataFrame(), RuntimeError("rate limited")]
+    assert len(market_data.fetch_history("VWCE.DE")) == 3
+
+    # An empty download and an exception are neither cached nor served
+    assert len(market_data.fetch_history("VWCE.DE", max_age=0)) == 3
+    assert len(market_data.fetch_history("VWCE.DE", max_age=0)) == 3
+    _, cached = market_data._memory_cache[("VWCE.DE", "history")]
+    assert len(cached) == 3
+    assert len(pd.read_pickle(market_data._cache_path("VWCE.DE", "history"))) == 3
+
+
+def test_failed_refresh_raises_for_the_refresher(offline):
+    offline += [_history([1.0, 2.0]), pd.DataFrame()]
+    market_data.fetch_history("IWDA.AS")
+    with pytest.raises(market_data.DownloadError):
+        market_data.fetch_history("IWDA.AS", max_age=0, stale_ok=False)
+    assert len(market_data.fetch_history("IWDA.AS")) == 2
+
+
+def test_first_failed_download_is_not_cached(offline):
+    offline += [RuntimeError("offline"), _history([1.0])]
+    assert market_data.fetch_history("EUNL.DE").empty
+    assert len(market_data.fetch_history("EUNL.DE")) == 1
+
+
+def test_failed_info_keeps_the_last_snapshot(offline):
+    offline += [{"currency": "EUR"}, RuntimeError("timeout"), {}]
+    assert market_data.fetch_info("VWCE.DE") == {"currency": "EUR"}
+    assert market_data.fetch_info("VWCE.DE", max_age=0) == {"currency": "EUR"}
+    with pytest.raises(market_data.DownloadError):
+        market_data.fetch_info("VWCE.DE", max_age=0, stale_ok=False)
+
+
+def test_memory_cache_is_bounded(offline, monkeypatch):
+    monkeypatch.setattr(market_data, "MAX_MEMORY_ENTRIES", 3)
+    offline += [_history([float(i)]) for i in range(5)]
+    for i in range(5):
+        market_data.fetch_history(f"T{i}")
+    assert list(market_data._memory_cache) == [(f"T{i}", "history") for i in (2, 3, 4)]
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+from modules.metric_state import empty_metric_state, risk_metrics_from_state, update_metric_state
+
+
+def history(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0.0004, 0.012, n))
+    return pd.DataFrame({"Close": close}, index=pd.bdate_range("2023-01-02", periods=n))
+
+
+def from_scratch(data):
+    return update_metric_state(empty_metric_state("TEST"), data)
+
+
+def assert_same_metrics(state, expected, rtol=1e-12):
+    assert state["count"] == expected["count"] and state["last_bar"] == expected["last_bar"]
+    np.testing.assert_allclose(risk_metrics_from_state(state), risk_metrics_from_state(expected), rtol=rtol)
+    assert state["peak"] == pytest.approx(expected["peak"], rel=rtol)
+
+
+def test_appended_bars_match_a_full_rebuild():
+    data = history()
+    state = from_scratch(data[:200])
+    for end in (230, 231, 300):
+        state = update_metric_state(state, data[:end])
+    assert_same_metrics(state, from_scratch(data))
+
+
+def test_revisions_of_the_last_bar_replace_each_other():
+    data = history()
+    state = from_scratch(data)
+    # The current session's close moves between refreshes (and with the FX rate)
+    for factor in (1.03, 0.95, 1.01, 1.2):
+        revised = data.copy()
+        revised.iloc[-1, 0] *= factor
+        state = update_metric_state(state, revised)
+    assert_same_metrics(state, from_scratch(revised))
+
+
+def test_back_adjusted_history_rescales_without_changing_returns():
+    data = history()
+    state = from_scratch(data[:250])
+    # A dividend paid after the last refresh scales every earlier close
+    adjusted = data.copy()
+    adjusted.iloc[:250, 0] *= 0.97
+    state = update_metric_state(state, adjusted)
+    assert_same_metrics(state, from_scratch(adjusted), rtol=1e-9)
+
+
+def test_state_saved_before_the_settled_copy_is_rebuilt():
+    data = history()
+    legacy = from_scratch(data[:200])
+    legacy.pop("settled")
+    assert_same_metrics(update_metric_state(legacy, data), from_scratch(data))
@@ -0,0 +1,59 @@
+import os
+import pickle
+from modules.model_registry import ModelRegistry, manifest_path, write_manifest
+from modules.training import publish
+
+
+def test_publish_is_picked_up_by_a_running_registry(tmp_path):
+    path = str(tmp_path / "model.pkl")
+    publish({"weights": [1]}, path, "v1")
+    registry = ModelRegistry(path)
+    assert registry.get()["version"] == "v1"
+
+    publish({"weights": [2]}, path, "v2")
+    entry = registry.get()
+    assert entry["version"] == "v2" and entry["model"] == {"weights": [2]}
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_publish_writes_the_manifest_before_the_artifact(tmp_path, monkeypatch):
+    path = str(tmp_path / "model.pkl")
+    publish({"weights": [1]}, path, "v1")
+    seen = []
+    replace = os.replace
+
+    def checking_replace(src, dst):
+        # The manifest already describes the staged file when the pickle lands
+        if dst == path:
+            with open(manifest_path(path)) as f:
+                seen.append(f.read())
+        replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", checking_replace)
+    publish({"weights": [2]}, path, "v2")
+    assert seen and '"v2"' in seen[0]
+
+
+def test_rejected_replacement_is_retried_once_its_manifest_lands(tmp_path):
+    path = str(tmp_path / "model.pkl")
+    publish({"weights": [1]}, path, "v1")
+    registry = ModelRegistry(path)
+    registry.get()
+
+    # The old order: the new pickle lands before its manifest
+    with open(path, "wb") as f:
+        pickle.dump({"weights": [2]}, f)
+    assert registry.get()["version"] == "v1"
+    write_manifest(path, "v2")
+    assert registry.get()["version"] == "v2"
+
+
+def test_checksum_covers_the_bytes_that_are_unpickled(tmp_path, monkeypatch):
+    path = str(tmp_path / "model.pkl")
+    publish({"weights": [1]}, path, "v1")
+    real_loads = pickle.loads
+    unpickled = []
+    monkeypatch.setattr(pickle, "loads", lambda data: unpickled.append(data) or real_loads(data))
+    ModelRegistry(path).get()
+    with open(path, "rb") as f:
+        assert unpickled == [f.read()]
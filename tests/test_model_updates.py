@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+import numpy as np
+import pytest
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import Pipeline
+from modules.model_bundle import BundleError, export_bundle
+from modules.model_registry import ModelRegistry
+from modules.model_updates import _writer_lock, append_rows, compact, read_labelled_rows
+from modules.risk_inference import MODEL_FEATURES, predict_proba_frame
+from modules.synthetic_data import generate_training_data
+from modules.training import TARGET_COLUMN, preprocessor
+
+
+def test_writer_lock_excludes_a_second_writer(tmp_path):
+    directory = str(tmp_path / "bundle")
+    with _writer_lock(directory):
+        with pytest.raises(BundleError):
+            with _writer_lock(directory):
+                pass
+    with _writer_lock(directory):
+        pass
+
+
+def test_writer_lock_is_released_when_the_holder_is_killed(tmp_path):
+    directory = str(tmp_path / "bundle")
+    holder = subprocess.Popen(
+        [sys.executable, "-c", (
+            "import sys, time; from modules.model_updates import _writer_lock\n"
+            f"with _writer_lock({directory!r}):\n"
+            "    print('locked', flush=True); time.sleep(60)"
+        )],
+        stdout=subprocess.PIPE, text=True, cwd=os.getcwd(),
+        env={**os.environ, "PYTHONPATH": os.path.dirname(os.path.dirname(os.path.abspath(__file__)))},
+    )
+    try:
+        assert holder.stdout.readline().strip() == "locked"
+        with pytest.raises(BundleError):
+            with _writer_lock(directory):
+                pass
+    finally:
+        holder.kill()
+        holder.wait()
+    with _writer_lock(directory):
+        pass
+
+
+def test_appended_and_compacted_bundle_matches_a_pipeline_fitted_on_all_rows(tmp_path):
+    data = generate_training_data(1200, seed=5)
+    X, y = data[MODEL_FEATURES], data[TARGET_COLUMN] + 1  # classes 1..3, not indices
+    base, delta = slice(0, 900), slice(900, None)
+    preprocess = preprocessor().fit(X[base])
+    model = KNeighborsClassifier(5).fit(preprocess.transform(X[base]), y[base])
+    pipeline = Pipeline([("preprocess", preprocess), ("model", model)])
+    directory = str(tmp_path / "bundle")
+    export_bundle(pipeline, directory, version="v1")
+
+    append_rows(directory, X[delta].reset_index(drop=True), y[delta].tolist())
+    everything = KNeighborsClassifier(5).fit(preprocess.transform(X), y)
+    expected = Pipeline([("preprocess", preprocess), ("model", everything)]).predict_proba(X[:300])
+    registry = ModelRegistry(directory)
+    for _ in ("with the delta segment", "after compaction"):
+        classes, proba = predict_proba_frame(registry.get(), X[:300])
+        assert list(classes) == [1, 2, 3]
+        np.testing.assert_allclose(proba, expected, atol=1e-9)
+        compact(directory)
+
+
+def test_labels_are_read_only_under_the_bundles_label_scheme(tmp_path):
+    path = str(tmp_path / "responses.csv")
+    data = generate_training_data(50, seed=6)
+    data.to_csv(path, index=False)
+
+    _, labels = read_labelled_rows(path, [0, 1, 2], binary=False)
+    assert labels == data[TARGET_COLUMN].tolist()
+    _, labels = read_labelled_rows(path, [0, 1], binary=True)
+    assert labels == (data[TARGET_COLUMN] != 0).astype(int).tolist()
+    with pytest.raises(BundleError):
+        read_labelled_rows(path, [0, 1, 2], binary=True)
+    with pytest.raises(BundleError):
+        read_labelled_rows(path, [0, 1], binary=False)
@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+import modules.optimizer as optimizer
+
+
+def closes_for(tickers, seed=0):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0004, 0.01, (500, len(tickers)))
+    return pd.DataFrame(100 * np.cumprod(1 + returns, axis=0), columns=tickers,
+                        index=pd.bdate_range("2020-01-01", periods=500))
+
+
+def test_warm_starts_keep_only_the_most_recent_asset_sets(monkeypatch):
+    monkeypatch.setattr(optimizer, "MAX_WARM_STARTS", 3)
+    monkeypatch.setattr(optimizer, "_warm_starts", type(optimizer._warm_starts)())
+    asset_sets = [[f"A{i}", f"B{i}", f"C{i}"] for i in range(5)]
+    for tickers in asset_sets:
+        optimizer.efficient_frontier(closes_for(tickers))
+    # Reusing the oldest kept set makes it the most recent again
+    optimizer.efficient_frontier(closes_for(asset_sets[2]))
+    optimizer.efficient_frontier(closes_for(["D", "E", "F"]))
+
+    kept = [tickers for tickers, _ in optimizer._warm_starts]
+    assert kept == [tuple(asset_sets[4]), tuple(asset_sets[2]), ("D", "E", "F")]
@@ -0,0 +1,17 @@
+import numpy as np
+import pandas as pd
+from modules.projection import cached_monthly_installments
+
+
+def _history():
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range("2020-01-01", periods=800)
+    return pd.DataFrame({"Close": 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, len(index))))}, index=index)
+
+
+def test_monthly_installments_are_stable_across_reruns():
+    data = _history()
+    first = cached_monthly_installments.__wrapped__("VWCE.DE|EUR", data.index[-1], data, 24, 100.0)
+    again = cached_monthly_installments.__wrapped__("VWCE.DE|EUR", data.index[-1], data, 24, 100.0)
+    assert first["percentiles"] == again["percentiles"]
+    assert first["percentiles"][5] < first["percentiles"][50] < first["percentiles"][95]
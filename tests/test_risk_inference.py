@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import Pipeline
+from modules.model_bundle import export_bundle
+from modules.model_registry import ModelRegistry
+from modules.risk_inference import (
+    MODEL_FEATURES, model_frame, predict_one, predict_proba_compiled, predict_proba_frame,
+)
+from modules.synthetic_data import generate_training_data
+from modules.training import TARGET_COLUMN, preprocessor
+
+ESTIMATORS = {
+    "knn": lambda: KNeighborsClassifier(n_neighbors=5),
+    "knn_distance": lambda: KNeighborsClassifier(n_neighbors=7, weights="distance"),
+    "logistic": lambda: LogisticRegression(max_iter=1000),
+}
+
+# The training target under each label scheme; classes need not be 0..C-1
+LABELINGS = {
+    "binary": lambda y: (y != 0).astype(int),
+    "multiclass": lambda y: y,
+    "shifted": lambda y: y + 1,
+    "named": lambda y: y.map({0: "conservative", 1: "balanced", 2: "aggressive"}),
+}
+
+
+@pytest.fixture(scope="module")
+def training_frame():
+    return generate_training_data(1500, seed=3)
+
+
+@pytest.fixture(scope="module")
+def queries():
+    # Built from answer dicts the way the app builds its frames
+    frame = model_frame(generate_training_data(300, seed=4).to_dict("records"))
+    frame.loc[0, "occupation"] = "not seen in training"
+    return frame
+
+
+def fitted(training_frame, name, labeling):
+    y = LABELINGS[labeling](training_frame[TARGET_COLUMN])
+    return Pipeline([("preprocess", preprocessor()), ("model", ESTIMATORS[name]())]).fit(training_frame[MODEL_FEATURES], y)
+
+
+def untied(pipeline, frame):
+    """Rows whose k-th and (k+1)-th neighbours are apart, where every exact KNN agrees on the neighbour set."""
+    model = pipeline[-1]
+    if not isinstance(model, KNeighborsClassifier):
+        return np.ones(len(frame), dtype=bool)
+    distances, _ = model.kneighbors(pipeline[:-1].transform(frame), model.n_neighbors + 1)
+    return distances[:, -1] - distances[:, -2] > 1e-6
+
+
+@pytest.mark.parametrize("labeling", LABELINGS)
+@pytest.mark.parametrize("name", ESTIMATORS)
+def test_predict_one_matches_the_pickled_pipeline(training_frame, queries, name, labeling):
+    pipeline = fitted(training_frame, name, labeling)
+    entry = {"model": pipeline, "sha256": f"{name}-{labeling}"}
+    expected = pipeline.predict_proba(queries)
+    for i, row in enumerate(queries.head(50).to_dict("records")):
+        classes, proba, _ = predict_one(entry, row)
+        assert list(classes) == list(pipeline.classes_)
+        np.testing.assert_allclose(proba, expected[i], atol=1e-9)
+
+
+@pytest.mark.parametrize("labeling", LABELINGS)
+@pytest.mark.parametrize("name", ESTIMATORS)
+def test_bundle_predict_proba_frame_matches_the_pipeline_and_the_row_path(tmp_path, training_frame, queries,
+                                                                         name, labeling):
+    pipeline = fitted(training_frame, name, labeling)
+    directory = str(tmp_path / "bundle")
+    export_bundle(pipeline, directory, version="v1")
+    entry = ModelRegistry(directory).get()
+
+    classes, proba = predict_proba_frame(entry, queries)
+    assert list(classes) == list(pipeline.classes_)
+    rows = np.vstack([predict_proba_compiled(entry["model"], row) for row in queries.to_dict("records")])
+    np.testing.assert_allclose(proba, rows, rtol=0, atol=1e-12)
+
+    agreed = untied(pipeline, queries)
+    assert agreed.mean() > 0.9
+    np.testing.assert_allclose(proba[agreed], pipeline.predict_proba(queries)[agreed], atol=1e-9)
+
+
+@pytest.mark.parametrize("labeling", ["shifted", "named"])
+def test_pickled_and_bundle_explanations_name_the_neighbours_classes(tmp_path, training_frame, queries, labeling):
+    pipeline = fitted(training_frame, "knn", labeling)
+    directory = str(tmp_path / "bundle")
+    export_bundle(pipeline, directory, version="v1")
+    entries = [{"model": pipeline, "sha256": f"explain-{labeling}"}, ModelRegistry(directory).get()]
+    y = LABELINGS[labeling](training_frame[TARGET_COLUMN]).to_numpy()
+
+    for row in queries.head(20).to_dict("records"):
+        pickled, bundled = (predict_one(entry, row, explain=True)[2] for entry in entries)
+        assert [n["label"] for n in pickled] == [n["label"] for n in bundled]
+        assert [n["label"] for n in pickled] == [y[n["row"]] for n in pickled]
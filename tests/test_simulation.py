@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from modules.generators import RETURN_GENERATORS, draw_shocks, shock_steps
+from modules.simulation import annual_returns_from_shocks, monthly_returns_from_shocks, simulate_allocation
+
+RETURNS = {"equity": (0.1, 0.15), "bonds": (0.05, 0.05), "cash": (0.02, 0.01)}
+ALLOCATION = {"equity": 0.80, "bonds": 0.15, "cash": 0.05}
+
+
+@pytest.mark.parametrize("generator", sorted(RETURN_GENERATORS.values()))
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_simulate_allocation_is_finite_for_every_generator(generator, seed):
+    simulation = simulate_allocation(
+        ALLOCATION, RETURNS, 50_000, np.full(420, 500.0), runs=1000,
+        generator=generator, rng=np.random.default_rng(seed),
+    )
+    assert np.isfinite(simulation["final_nominal"]).all()
+    assert np.isfinite(simulation["final_real"]).all()
+    for paths in (simulation["nominal_percentiles"], simulation["real_percentiles"]):
+        for path in paths.values():
+            assert np.isfinite(path).all()
+
+
+def test_monthly_returns_compound_to_the_annual_return():
+    annual = np.array([0.1, -0.3, -2.5])
+    monthly = monthly_returns_from_shocks(annual, np.zeros(3), np.zeros(3))
+    np.testing.assert_allclose((1 + monthly[:2]) ** 12 - 1, annual[:2])
+    assert np.isfinite(monthly).all() and monthly[2] > -1
+
+
+@pytest.mark.parametrize("generator", sorted(RETURN_GENERATORS.values()))
+@pytest.mark.parametrize("periods_per_year", [12, 1])
+def test_shock_steps_are_the_stacked_draws_one_step_at_a_time(generator, periods_per_year):
+    steps = shock_steps(generator, np.random.default_rng(7), 40, 200, 3, periods_per_year)
+    first = next(steps)
+    assert first.shape == (200, 3)
+    stacked = np.stack([first, *steps])
+    np.testing.assert_array_equal(stacked, draw_shocks(generator, np.random.default_rng(7), 40, 200, 3, periods_per_year))
+
+
+def test_annual_returns_never_lose_more_than_the_holding():
+    means, stds = np.array([0.1, 0.05]), np.array([0.15, 0.05])
+    shocks = draw_shocks("student_t", np.random.default_rng(3), 1, 100_000, 2, periods_per_year=1)[0] * 10
+    annual = annual_returns_from_shocks(means, stds, shocks)
+    assert annual.min() == -0.99
+    assert (annual @ np.array([0.6, 0.4]) >= -0.99).all()
@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+from modules.universe import UNIVERSE_PATH, build_universe, search_universe
+from modules.universe_import import (
+    UNIVERSE_COLUMNS, merge_universe, read_vendor_export, valid_isin, write_universe,
+)
+
+EXPORT = """Fund Name,ISIN,Symbol,Stock Exchange,Trading Currency,TER (%),Fund Domicile,Asset Class
+Vanguard FTSE All-World UCITS ETF (USD) Accumulating,IE00BK5BQT80,VWRA,London Stock Exchange,USD,0.22%,Ireland,Global Equity
+Vanguard FTSE All-World UCITS ETF (USD) Accumulating,IE00BK5BQT80,VWCE,Xetra,EUR,0.22%,Ireland,Global Equity
+iShares Core FTSE 100 UCITS ETF GBP (Dist),IE0005042456,ISF,London Stock Exchange,GBX,0.07,Ireland,UK Equity
+iShares Core EUR Govt Bond UCITS ETF EUR (Dist),IE00B4WXJJ64,EUNH.DE,Xetra,EUR,0.07,Ireland,Government Bonds
+Broken ISIN fund,IE00B4L5Y984,BRKN,Xetra,EUR,0.20,Ireland,Global Equity
+Unlisted venue fund,IE00B4L5Y983,OTCX,Some OTC Venue,EUR,0.20,Ireland,Global Equity
+"""
+
+
+@pytest.fixture
+def export_path(tmp_path):
+    path = tmp_path / "export.csv"
+    path.write_text(EXPORT)
+    return str(path)
+
+
+def test_shipped_universe_isins_are_valid():
+    universe = pd.read_csv(UNIVERSE_PATH, dtype=str)
+    assert list(universe.columns) == UNIVERSE_COLUMNS
+    assert all(valid_isin(isin) for isin in universe["isin"])
+    assert not valid_isin("IE00B4L5Y984")
+
+
+def test_vendor_export_is_mapped_to_universe_rows(export_path):
+    imported, dropped = read_vendor_export(export_path)
+    rows = imported.set_index("ticker")
+    assert list(rows.index) == ["VWRA.L", "VWCE.DE", "ISF.L", "EUNH.DE"]
+    assert rows.loc["VWRA.L", "ter"] == 0.22 and rows.loc["VWRA.L", "exchange"] == "London"
+    assert rows.loc["ISF.L", "currency"] == "GBp"
+    assert rows.loc["EUNH.DE", "risk_bucket"] == "Low Risk" and rows.loc["VWCE.DE", "risk_bucket"] == "High Risk"
+    assert (rows["ucits"] == "Yes").all()
+    assert dropped == {"invalid ISIN": 1, "unknown exchange 'Some OTC Venue'": 1}
+
+
+def test_merged_universe_keeps_hand_added_rows_and_loads(export_path, tmp_path):
+    imported, _ = read_vendor_export(export_path)
+    existing = pd.read_csv(UNIVERSE_PATH, dtype={"isin": str, "ticker": str})
+    merged = merge_universe(existing, imported)
+    assert set(existing["ticker"]) | set(imported["ticker"]) == set(merged["ticker"])
+    assert merged["ticker"].is_unique
+
+    path = str(tmp_path / "universe.csv")
+    write_universe(merged, path)
+    universe = build_universe(pd.read_csv(path, dtype={"isin": str, "ticker": str}))
+    assert universe["columns"]["ticker"][search_universe(universe, "vwce")[0]] == "VWCE.DE"